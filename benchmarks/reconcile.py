@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the reconciliation of issues with tasks for growing numbers of issues
+
+The issues are synthetic and the tasks are held by the in memory MSPDI backend,
+so neither gitlab nor MS Project is required. For every size a project is
+prepared with tasks for nine out of ten issues. Then the sync is planned for all
+issues (matching every issue with its task and comparing their fields) and
+applied, which adds the missing tenth. The time per issue should stay about the
+same for all sizes if the reconciliation scales linearly.
+
+Run it from the repository root::
+
+    PYTHONPATH=src python benchmarks/reconcile.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from types import SimpleNamespace
+from typing import List
+
+from syncgitlab2msproject.custom_types import WebURL
+from syncgitlab2msproject.gitlab_issues import Issue
+from syncgitlab2msproject.helper_classes import SetTaskTypeConservative
+from syncgitlab2msproject.ms_project import Backend, MSProject
+from syncgitlab2msproject.sync import (
+    apply_plan,
+    plan_sync,
+    sync_gitlab_issues_to_ms_project,
+)
+
+GITLAB_URL = WebURL("https://gitlab.com")
+DEFAULT_SIZES = [1_000, 5_000, 20_000, 50_000, 100_000, 200_000]
+
+EMPTY_PROJECT = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Project xmlns="http://schemas.microsoft.com/project">
+    <Name>Benchmark.xml</Name>
+    <StartDate>2020-03-02T08:00:00</StartDate>
+    <Tasks>
+        <Task>
+            <UID>0</UID>
+            <ID>0</ID>
+            <Name>Benchmark</Name>
+            <IsNull>0</IsNull>
+            <OutlineLevel>0</OutlineLevel>
+        </Task>
+    </Tasks>
+</Project>
+"""
+
+
+def make_issue(issue_id: int) -> Issue:
+    """Create an issue without gitlab"""
+    return Issue(
+        SimpleNamespace(  # type: ignore
+            id=issue_id,
+            iid=issue_id,
+            project_id=1,
+            group_id=1,
+            title=f"Issue {issue_id}",
+            description=f"Description of issue {issue_id}",
+            due_date=None,
+            closed_at=None,
+            closed_by=None,
+            state="opened",
+            moved_to_id=None,
+            has_tasks=False,
+            task_completion_status={"count": 0, "completed_count": 0},
+            time_stats={"time_estimate": 3600, "total_time_spent": 0},
+            labels=["benchmark"],
+            assignees=[],
+            web_url=f"https://gitlab.com/group/project/-/issues/{issue_id}",
+        )
+    )
+
+
+def prepare_project(project_file: Path, issues: List[Issue]) -> None:
+    """Create a project with a synced task for every issue"""
+    project_file.write_text(EMPTY_PROJECT, encoding="UTF-8")
+    with MSProject(project_file, backend=Backend.mspdi) as tasks:
+        sync_gitlab_issues_to_ms_project(
+            tasks, issues, GITLAB_URL, SetTaskTypeConservative
+        )
+
+
+def run(size: int, directory: Path) -> None:
+    issues = [make_issue(issue_id) for issue_id in range(1, size + 1)]
+    project_file = directory / f"benchmark_{size}.xml"
+    prepare_project(project_file, issues[: size - size // 10])
+
+    start = perf_counter()
+    with MSProject(project_file, backend=Backend.mspdi) as tasks:
+        loaded = perf_counter()
+        plan = plan_sync(tasks, issues, GITLAB_URL, SetTaskTypeConservative)
+        planned = perf_counter()
+        apply_plan(plan, SetTaskTypeConservative)
+        applied = perf_counter()
+    saved = perf_counter()
+    assert not plan.updates and len(plan.to_add) == size // 10
+
+    plan_time = planned - loaded
+    print(
+        f"{size:>9} {loaded - start:>8.2f} {plan_time:>8.2f} "
+        f"{applied - planned:>8.2f} {saved - applied:>8.2f} "
+        f"{plan_time / size * 1e6:>12.1f}"
+    )
+
+
+def main(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes",
+        help="Numbers of issues to benchmark",
+        nargs="+",
+        type=int,
+        default=DEFAULT_SIZES,
+    )
+    parsed = parser.parse_args(args)
+    print(
+        f"{'issues':>9} {'load':>8} {'plan':>8} {'apply':>8} {'save':>8} "
+        f"{'plan us/iss':>12}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for size in parsed.sizes:
+            run(size, Path(directory))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
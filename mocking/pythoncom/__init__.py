@@ -0,0 +1,2 @@
+def CoInitialize() -> None:
+    """Initialize the COM library for the current thread"""
@@ -83,3 +83,7 @@ class COMObject_MSProject_Application:
 
 def Dispatch(application: str) -> COMObject_MSProject_Application:
     """Create a COM connection"""
+
+
+def GetActiveObject(application: str) -> COMObject_MSProject_Application:
+    """Connect to a running application, raises com_error if there is none"""
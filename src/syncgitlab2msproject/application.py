@@ -0,0 +1,203 @@
+"""
+Keep one MS Project application alive across sync runs
+
+Starting MS Project takes a long time, often longer than the sync itself. A
+:class:`PersistentApplication` starts the application once (or attaches to a
+running one) and hands it to every :class:`~.ms_project.MSProject` session.
+Before each session the application is checked and restarted if it stopped
+responding. An :class:`ApplicationPool` does the same for several backends.
+"""
+
+from logging import getLogger
+from os import PathLike
+from typing import Any, Callable, Dict, Optional
+
+from .custom_types import ComMSProjectApplication
+from .ms_project import (
+    Backend,
+    MSProject,
+    com_error,
+    create_application,
+    get_backend_for_file,
+    win32com,
+)
+
+logger = getLogger(f"{__package__}.{__name__}")
+
+COM_APPLICATION_NAME = "MSProject.Application"
+
+
+def attach_application() -> Optional[ComMSProjectApplication]:
+    """Give the running MS Project application, None if there is none"""
+    if win32com is None:
+        return None
+    try:
+        return win32com.client.GetActiveObject(COM_APPLICATION_NAME)
+    except com_error:
+        return None
+
+
+class PersistentApplication:
+    """
+    A MS Project application kept alive for successive :class:`MSProject` sessions
+
+    Args:
+        backend: the backend to create the application for
+        attach: use an already running MS Project instead of starting one
+                (only for the COM backend)
+        quit_on_close: quit the application on close, if it was started here and
+                       no projects are open in it. An application that was
+                       already running is never quit.
+        factory: create the application with this instead of the backend,
+                 i.e. for a fake application in tests
+    """
+
+    def __init__(
+        self,
+        backend: Backend = Backend.com,
+        attach: bool = True,
+        quit_on_close: bool = True,
+        factory: Optional[Callable[[], ComMSProjectApplication]] = None,
+    ):
+        self.backend: Backend = backend
+        self.attach: bool = attach
+        self.quit_on_close: bool = quit_on_close
+        self._factory = factory
+        self._application: Optional[ComMSProjectApplication] = None
+        self._started: bool = False
+        # Number of times the application had to be started again
+        self.restarts: int = 0
+
+    def __repr__(self):
+        state = "not running" if self._application is None else "running"
+        return f"<PersistentApplication({self.backend.value}, {state})>"
+
+    def __enter__(self) -> "PersistentApplication":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _start(self) -> ComMSProjectApplication:
+        running = None
+        if self._factory is None and self.backend is Backend.com:
+            running = attach_application()
+        if running is not None and self.attach:
+            logger.info("Attached to the running MS Project")
+            self._started = False
+            return running
+        logger.info("Starting MS Project")
+        # COM connects to an already running MS Project as well, it is not ours
+        self._started = running is None
+        if self._factory is not None:
+            return self._factory()
+        return create_application(self.backend)
+
+    def _quit(self) -> None:
+        application, self._application = self._application, None
+        if application is None or not self._started:
+            return
+        try:
+            if list(application.Projects):
+                logger.info("Keeping MS Project running, as projects are open in it")
+                return
+            application.Quit()
+        except com_error as e:
+            logger.info(f"Quitting MS Project failed: {e}")
+
+    def is_healthy(self) -> bool:
+        """Check that the application is running and responds"""
+        if self._application is None:
+            return False
+        try:
+            self._application.Name
+        except (com_error, AttributeError) as e:
+            logger.warning(f"MS Project does not respond: {e}")
+            return False
+        return True
+
+    @property
+    def application(self) -> ComMSProjectApplication:
+        """The application, (re)started if not running or not responding"""
+        if self._application is None:
+            self._application = self._start()
+        elif not self.is_healthy():
+            self.restart()
+        assert self._application is not None
+        return self._application
+
+    def restart(self) -> None:
+        """Quit the application (if possible) and start a new one"""
+        self._quit()
+        self.restarts += 1
+        self._application = self._start()
+
+    def session(self, doc_path: PathLike, **kwargs: Any) -> MSProject:
+        """Give a :class:`MSProject` for the file using the kept application"""
+        return MSProject(
+            doc_path, backend=self.backend, application=self.application, **kwargs
+        )
+
+    def close(self) -> None:
+        """Quit the application if it was started here and shall be quit"""
+        if self.quit_on_close:
+            self._quit()
+        else:
+            self._application = None
+
+
+class ApplicationPool:
+    """
+    One :class:`PersistentApplication` per backend, started when first needed
+
+    Used to sync several files, that might need different backends, with as
+    few applications as possible.
+
+    Args:
+        attach: use an already running MS Project instead of starting one
+        quit_on_close: quit the started applications on close
+        factory: create the applications with this, i.e. a fake in tests
+    """
+
+    def __init__(
+        self,
+        attach: bool = True,
+        quit_on_close: bool = True,
+        factory: Optional[Callable[[], ComMSProjectApplication]] = None,
+    ):
+        self.attach: bool = attach
+        self.quit_on_close: bool = quit_on_close
+        self._factory = factory
+        self._applications: Dict[Backend, PersistentApplication] = {}
+
+    def __enter__(self) -> "ApplicationPool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get(self, backend: Backend) -> PersistentApplication:
+        if (application := self._applications.get(backend)) is None:
+            application = self._applications[backend] = PersistentApplication(
+                backend, self.attach, self.quit_on_close, self._factory
+            )
+        return application
+
+    def session(
+        self, doc_path: PathLike, backend: Optional[Backend] = None, **kwargs: Any
+    ) -> MSProject:
+        """
+        Give a :class:`MSProject` for the file
+
+        Args:
+            doc_path: the file to open
+            backend: the backend to use, by default depending on the file
+            kwargs: passed to :class:`MSProject`
+        """
+        if backend is None:
+            backend = get_backend_for_file(doc_path)
+        return self.get(backend).session(doc_path, **kwargs)
+
+    def close(self) -> None:
+        for application in self._applications.values():
+            application.close()
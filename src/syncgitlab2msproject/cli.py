@@ -7,27 +7,82 @@ import argparse
 import functools
 import logging
 import sys
+import time
+from contextlib import ExitStack
+from datetime import datetime
 from pathlib import Path
 from requests import ConnectionError
-from typing import List
+from typing import Any, Callable, List, Optional, Type
 
-from syncgitlab2msproject import Issue, MSProject, __version__
+from syncgitlab2msproject import Issue, __version__
 
 __author__ = "Carli Freudenberg"
 __copyright__ = "Carli Freudenberg"
 __license__ = "MIT"
 
+from syncgitlab2msproject.application import ApplicationPool
+from syncgitlab2msproject.com_stats import ComStats
 from syncgitlab2msproject.custom_types import WebURL
+from syncgitlab2msproject.exceptions import InvalidFieldError, MSProjectSyncError
 from syncgitlab2msproject.gitlab_issues import (
+    GitlabResource,
+    GroupBy,
+    IssueCache,
     get_gitlab_class,
-    get_group_issues,
-    get_project_issues,
 )
-from syncgitlab2msproject.helper_classes import ForceFixedWork, SetTaskTypeConservative
-from syncgitlab2msproject.sync import sync_gitlab_issues_to_ms_project
+from syncgitlab2msproject.helper_classes import (
+    ForceFixedWork,
+    SetTaskTypeConservative,
+    TaskTyperSetter,
+)
+from syncgitlab2msproject.ms_project import (
+    TEXT_FIELD_IDS,
+    Backend,
+    UndoMode,
+    com_error,
+    resolve_field,
+)
+from syncgitlab2msproject.parallel import (
+    ParallelSync,
+    SyncJob,
+    can_sync_in_parallel,
+)
+from syncgitlab2msproject.sync import (
+    DEFAULT_REFERENCE_FIELD,
+    apply_plan,
+    plan_sync,
+)
+from syncgitlab2msproject.sync_state import SyncState, get_state_path, now
+from syncgitlab2msproject.targets import RESOURCE_TYPES, SyncTarget, read_targets
 
 _logger = logging.getLogger(f"{__package__}.{__name__}")
 
+# Text fields the sync writes the labels and the web url of the issues to
+RESERVED_TEXT_FIELDS = ("Text28", "Text29")
+
+
+def reference_field(value: str) -> str:
+    """Check the ``--reference-field`` is a free text field and give its COM name
+
+    Raises:
+        argparse.ArgumentTypeError: if the field is unknown, no text field or one
+                                    the sync writes otherwise
+    """
+    try:
+        field = resolve_field(int(value) if value.isdigit() else value)
+    except InvalidFieldError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    if field not in TEXT_FIELD_IDS:
+        raise argparse.ArgumentTypeError(
+            f"'{value}' is not a text field, use one of Text1 to Text30"
+        )
+    if field in RESERVED_TEXT_FIELDS:
+        raise argparse.ArgumentTypeError(
+            f"'{value}' is used for the labels and web url of the issues, "
+            f"use another field than {' and '.join(RESERVED_TEXT_FIELDS)}"
+        )
+    return field
+
 
 def parse_args(args):
     """Parse command line parameters
@@ -79,6 +134,110 @@ def parse_args(args):
         action="store_true",
     )
 
+    parser.add_argument(
+        "--buffer-writes",
+        dest="buffer_writes",
+        help="Only write changed values to MS Project, all at once after syncing",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--bulk-edit",
+        dest="bulk_edit",
+        help="Turn off screen updating and automatic calculation of MS Project "
+        "while syncing and recalculate only once at the end",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--undo",
+        dest="undo_mode",
+        help="How the changes of the sync are recorded in the undo stack of "
+        "MS Project: every change (record), as one entry (transaction) or "
+        "as few as possible (off)",
+        default=UndoMode.record.value,
+        choices=[mode.value for mode in UndoMode],
+    )
+
+    parser.add_argument(
+        "--reference-field",
+        dest="reference_field",
+        help="MS Project text field the reference to the gitlab issue is stored in, "
+        "any of Text1 to Text30 except Text28 and Text29",
+        default=DEFAULT_REFERENCE_FIELD,
+        type=reference_field,
+    )
+
+    parser.add_argument(
+        "--group-by",
+        dest="group_by",
+        help="Add new issues as children of a summary task for their epic or "
+        "milestone, which is created if missing",
+        default=GroupBy.none.value,
+        choices=[group_by.value for group_by in GroupBy],
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        dest="dry_run",
+        help="Only print what the sync would change, the project file is opened "
+        "read only",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--incremental",
+        dest="incremental",
+        help="Only fetch and sync the issues changed since the last successful "
+        "sync, which is recorded in a state file next to the project file",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--full-resync",
+        dest="full_resync",
+        help="Sync all tasks even if their issue did not change since the last "
+        "sync, i.e. to undo changes done to the tasks in MS Project. Together "
+        "with --incremental all issues are fetched and it is recorded as last sync",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--com-stats",
+        dest="com_stats",
+        help="Print the number and latency of the calls done to MS Project",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--backend",
+        dest="backend",
+        help="How to access the project file: using MS Project (com) or reading "
+        "and writing MS Project XML files directly (mspdi). For very large XML files "
+        "mspdi-stream only reads the fields needed and patches changed tasks into "
+        "the file. By default mspdi is used for .xml files and com for everything "
+        "else",
+        default=None,
+        choices=[backend.value for backend in Backend],
+    )
+
+    parser.add_argument(
+        "--keep-application",
+        dest="keep_application",
+        help="Use an already running MS Project and keep it running after the "
+        "sync, so that following runs start instantly",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--interval",
+        dest="interval",
+        help="Repeat the sync every INTERVAL seconds with the same MS Project "
+        "until interrupted, MS Project is restarted if it stops responding",
+        default=None,
+        type=float,
+    )
+
     # TODO read from ENV
     parser.add_argument(
         "--gitlab-url",
@@ -98,26 +257,56 @@ def parse_args(args):
         default=None,
     )
 
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        dest="jobs",
+        help="Number of project files synced in parallel by separate processes, "
+        "only for the mspdi and mspdi-stream backends",
+        default=1,
+        type=int,
+    )
+
+    parser.add_argument(
+        "--targets",
+        dest="targets",
+        help="Sync several project files, reading each gitlab resource only once. "
+        "The file contains one target per line: resource type, resource id and "
+        "project file, i.e. 'group 42 plans/Project A.mpp'",
+        default=None,
+        type=str,
+    )
+
     parser.add_argument(
         "gitlab_resource_type",
         help="Gitlab resource type to sync with",
         type=str,
-        choices=["project", "group"],
+        nargs="?",
+        choices=RESOURCE_TYPES,
     )
 
     parser.add_argument(
         "gitlab_resource_id",
         help="Gitlab resource id to sync with",
         type=int,
+        nargs="?",
     )
 
     parser.add_argument(
         dest="project_file",
         help="Microsoft Project File to sync with",
         type=str,
+        nargs="?",
     )
 
-    return parser.parse_args(args)
+    parsed = parser.parse_args(args)
+    target = (parsed.gitlab_resource_type, parsed.gitlab_resource_id)
+    if parsed.project_file is None and (parsed.targets is None or any(target)):
+        parser.error(
+            "a gitlab resource type, resource id and project file or --targets "
+            "are required"
+        )
+    return parsed
 
 
 def setup_logging(loglevel):
@@ -180,6 +369,254 @@ def filter_by_labels(issues: List[Issue], label: str) -> List[Issue]:
     return list(filter(functools.partial(has_not_label, label=label), issues))
 
 
+def get_targets(args: argparse.Namespace) -> List[SyncTarget]:
+    """
+    Give the targets to sync given on the command line and in the targets file
+
+    Raises:
+        ValueError: if a target in the targets file is not valid
+    """
+    targets = []
+    if args.project_file is not None:
+        resource = GitlabResource(args.gitlab_resource_type, args.gitlab_resource_id)
+        targets.append(SyncTarget(resource, Path(args.project_file).absolute()))
+    if args.targets is not None:
+        targets += read_targets(Path(args.targets))
+    return targets
+
+
+def sync_project_file(
+    args: argparse.Namespace,
+    ms_project_file: Path,
+    issues: List[Issue],
+    sync_task_helper: Type[TaskTyperSetter],
+    applications: ApplicationPool,
+) -> List[Issue]:
+    """
+    Sync the issues into the project file
+
+    Args:
+        args: the parsed command line parameters
+        ms_project_file: the file to sync
+        issues: the issues to sync
+        sync_task_helper: sets the task type of the synced tasks
+        applications: give the MS Project application to use
+
+    Returns:
+        the issues whose tasks could not be synced completely
+    """
+    failed: List[Issue] = []
+    include_issue = functools.partial(has_not_label, label=args.ignore_label)
+    com_stats = ComStats() if args.com_stats else None
+    with applications.session(
+        ms_project_file,
+        None if args.backend is None else Backend(args.backend),
+        buffered=args.buffer_writes,
+        com_stats=com_stats,
+        read_only=args.dry_run,
+    ) as tasks, ExitStack() as stack:
+        plan = plan_sync(
+            tasks,
+            issues,
+            WebURL(args.gitlab_url),
+            sync_task_helper,
+            include_issue,
+            args.reference_field,
+            GroupBy(args.group_by),
+            partial=args.incremental and not args.full_resync,
+            skip_unchanged=not args.full_resync,
+        )
+        if args.dry_run:
+            print(plan.report())
+        elif not plan.is_empty:
+            stack.enter_context(tasks.undo_mode(UndoMode(args.undo_mode)))
+            if args.bulk_edit:
+                stack.enter_context(tasks.bulk_edit())
+            apply_plan(plan, sync_task_helper, args.reference_field)
+            # Write buffered changes while the undo and edit modes are still active
+            tasks.flush()
+            failed = plan.failed_issues()
+    if com_stats is not None:
+        print(com_stats.report())
+    if failed:
+        _logger.error(
+            f"{len(failed)} issues could not be synced completely into "
+            f"'{ms_project_file}', they are synced again the next time"
+        )
+    return failed
+
+
+def load_sync_state(
+    args: argparse.Namespace, target: SyncTarget
+) -> Optional[SyncState]:
+    """Give the state of the last sync of the target, None if not incremental"""
+    if not args.incremental:
+        return None
+    path = get_state_path(target)
+    if args.full_resync:
+        return SyncState(path)
+    return SyncState.load(path)
+
+
+def get_target_issues(
+    issue_cache: IssueCache, target: SyncTarget, state: Optional[SyncState]
+) -> List[Issue]:
+    """
+    Give the issues to sync into the project file of the target
+
+    With a state only the issues changed since the last sync are given.
+    """
+    if state is None:
+        return issue_cache.get(target.resource)
+    issues = issue_cache.get(target.resource, state.updated_after)
+    changed = state.changed(issues)
+    _logger.info(
+        f"{len(changed)} of {len(issues)} fetched issues changed since the last "
+        f"sync of '{target.project_file}'"
+    )
+    return changed
+
+
+def save_sync_state(
+    args: argparse.Namespace,
+    state: Optional[SyncState],
+    issues: List[Issue],
+    started: datetime,
+    failed: List[Issue],
+) -> None:
+    """Record the sync of the issues, if incremental, see :meth:`SyncState.update`"""
+    if state is None or args.dry_run:
+        return
+    state.update(issues, started, failed)
+    if state.synced_at is None:
+        # Nothing to remember, everything is synced again the next time
+        return
+    try:
+        state.save()
+    except OSError as e:
+        _logger.error(f"Could not save the sync state '{state.path}': {e}")
+
+
+def skip_unchanged(
+    args: argparse.Namespace,
+    target: SyncTarget,
+    state: Optional[SyncState],
+    issues: List[Issue],
+    started: datetime,
+) -> bool:
+    """
+    Skip the target if none of its issues changed since the last incremental sync
+
+    The project file does not have to be opened then, only the sync state is
+    saved with the new sync time.
+
+    Returns:
+        True if the target is skipped
+    """
+    if state is None or state.synced_at is None or issues:
+        return False
+    _logger.info(f"Nothing changed for '{target.project_file}'")
+    save_sync_state(args, state, issues, started, [])
+    return True
+
+
+def sync_targets(
+    args: argparse.Namespace,
+    targets: List[SyncTarget],
+    issue_cache: IssueCache,
+    sync_task_helper: Type[TaskTyperSetter],
+    applications: ApplicationPool,
+) -> int:
+    """
+    Sync the targets one after another and give the number of failed ones
+
+    The issues of each gitlab resource are only loaded once. If there is more
+    than one target, a failing project file is logged and the others are
+    synced anyway. In incremental mode project files without changed issues are
+    not opened at all.
+    """
+    failed = 0
+    for target in targets:
+        state = load_sync_state(args, target)
+        started = now()
+        issues = get_target_issues(issue_cache, target, state)
+        if skip_unchanged(args, target, state, issues, started):
+            continue
+        try:
+            failed_issues = sync_project_file(
+                args, target.project_file, issues, sync_task_helper, applications
+            )
+        except (com_error, MSProjectSyncError):
+            if len(targets) == 1:
+                raise
+            _logger.exception(f"Syncing '{target.project_file}' failed")
+            failed += 1
+        else:
+            _logger.info(f"Synced '{target.project_file}'")
+            save_sync_state(args, state, issues, started, failed_issues)
+    return failed
+
+
+def sync_targets_parallel(
+    args: argparse.Namespace,
+    targets: List[SyncTarget],
+    issue_cache: IssueCache,
+    sync_task_helper: Type[TaskTyperSetter],
+    workers: ParallelSync,
+) -> int:
+    """
+    Sync the targets in the worker processes and give the number of failed ones
+
+    The issues of each gitlab resource are only loaded once, by this process. In
+    incremental mode project files without changed issues are not synced at all.
+    """
+    states: List[Optional[SyncState]] = []
+    jobs: List[SyncJob] = []
+    started = now()
+    for target in targets:
+        state = load_sync_state(args, target)
+        issues = get_target_issues(issue_cache, target, state)
+        if not skip_unchanged(args, target, state, issues, started):
+            states.append(state)
+            jobs.append(SyncJob(target, issues))
+    sync = functools.partial(sync_project_file, args, sync_task_helper=sync_task_helper)
+    failed = 0
+    backend = None if args.backend is None else Backend(args.backend)
+    results = workers.run(sync, jobs, backend)
+    for result, job, state in zip(results, jobs, states):
+        if result.ok:
+            _logger.info(
+                f"Synced '{result.target.project_file}' in {result.seconds:.1f}s"
+            )
+            save_sync_state(args, state, job.issues, started, result.value)
+        else:
+            _logger.error(
+                f"Syncing '{result.target.project_file}' failed:\n{result.error}"
+            )
+            failed += 1
+    return failed
+
+
+def sync_repeatedly(interval: float, sync: Callable[[], Any]) -> None:
+    """
+    Run the sync every `interval` seconds until interrupted
+
+    A failing run is logged and does not stop the following ones, the
+    applications are checked (and restarted if necessary) before every use.
+    """
+    while True:
+        started = time.monotonic()
+        try:
+            sync()
+        except ConnectionError as e:
+            _logger.error(f"Error contacting gitlab instance: {e}")
+        except (com_error, MSProjectSyncError):
+            _logger.exception("Sync failed, retrying with the next run")
+        else:
+            _logger.info("Finished syncing")
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
 def main(args):
     """Main entry point allowing external calls
 
@@ -188,40 +625,80 @@ def main(args):
     """
     args = parse_args(args)
     setup_logging(args.loglevel)
-    ms_project_file = Path(args.project_file)
-    if not ms_project_file.is_file():
-        _logger.error(
-            f"Could not open '{args.project_file}' - seems not to be a valid file."
-        )
+    try:
+        targets = get_targets(args)
+    except (OSError, ValueError) as e:
+        _logger.error(f"Could not read the targets: {e}")
         exit(128)
+    for target in targets:
+        if not target.project_file.is_file():
+            _logger.error(
+                f"Could not open '{target.project_file}' - seems not to be a valid "
+                "file."
+            )
+            exit(128)
     _logger.debug("Starting loading issues")
 
     gitlab = get_gitlab_class(args.gitlab_url, args.gitlab_token)
 
-    if args.gitlab_resource_type == "project":
-        get_issues_func = get_project_issues
-    elif args.gitlab_resource_type == "group":
-        get_issues_func = get_group_issues
-    else:
-        raise ValueError("Invalid Resource Type")
-
     if args.fixed_work:
         sync_task_helper = ForceFixedWork
     else:
         sync_task_helper = SetTaskTypeConservative
 
-    try:
-        issues = get_issues_func(gitlab, args.gitlab_resource_id)
-    except ConnectionError as e:
-        _logger.error(f"Error contacting gitlab instance: {e}")
-        exit(64)
-    else:
-        include_issue = functools.partial(has_not_label, label=args.ignore_label)
-        with MSProject(ms_project_file.absolute()) as tasks:
-            sync_gitlab_issues_to_ms_project(
-                tasks, issues, WebURL(args.gitlab_url), sync_task_helper, include_issue
+    if args.jobs < 1:
+        _logger.error("At least one job is required")
+        exit(128)
+
+    issue_cache = IssueCache(gitlab, GroupBy(args.group_by))
+    with ApplicationPool(
+        attach=args.keep_application, quit_on_close=not args.keep_application
+    ) as applications, ExitStack() as stack:
+        workers = None
+        if args.jobs > 1 and len(targets) > 1:
+            backend = None if args.backend is None else Backend(args.backend)
+            if all(
+                can_sync_in_parallel(target.project_file, backend) for target in targets
+            ):
+                workers = stack.enter_context(
+                    ParallelSync(
+                        min(args.jobs, len(targets)),
+                        initializer=functools.partial(setup_logging, args.loglevel),
+                        quit_on_close=not args.keep_application,
+                    )
+                )
+            else:
+                _logger.warning(
+                    "Syncing the files one after another, as MS Project serves "
+                    "all COM clients with a single instance"
+                )
+
+        def sync() -> int:
+            # The issues are loaded again for every run
+            issue_cache.clear()
+            if workers is not None:
+                return sync_targets_parallel(
+                    args, targets, issue_cache, sync_task_helper, workers
+                )
+            return sync_targets(
+                args, targets, issue_cache, sync_task_helper, applications
             )
-    _logger.info("Finished syncing")
+
+        if args.interval is None:
+            try:
+                failed = sync()
+            except ConnectionError as e:
+                _logger.error(f"Error contacting gitlab instance: {e}")
+                exit(64)
+            if failed:
+                _logger.error(f"Syncing {failed} of {len(targets)} files failed")
+                exit(1)
+            _logger.info("Finished syncing")
+        else:
+            try:
+                sync_repeatedly(args.interval, sync)
+            except KeyboardInterrupt:
+                _logger.info("Stopped repeating the sync")
 
 
 def run():
@@ -0,0 +1,98 @@
+from bisect import bisect_left
+from collections import defaultdict
+from typing import DefaultDict, Dict, List, Tuple
+
+# Upper bounds (in seconds) of the latency histogram buckets, the last bucket
+# holds everything above
+LATENCY_BUCKETS: Tuple[float, ...] = (0.0001, 0.001, 0.01, 0.1, 1.0)
+
+
+def format_bucket(index: int) -> str:
+    """Give a readable label of the latency histogram bucket"""
+    if index < len(LATENCY_BUCKETS):
+        return f"<={LATENCY_BUCKETS[index] * 1000:g}ms"
+    return f">{LATENCY_BUCKETS[-1] * 1000:g}ms"
+
+
+class ComStats:
+    """
+    Accounting of the COM calls done to communicate with MS Project
+
+    Counts the calls per operation (i.e. ``read``, ``write``, ``FileOpen``) and
+    field and records the latency of every call in a histogram per operation.
+    Pass an instance to :class:`~syncgitlab2msproject.ms_project.MSProject` to
+    enable the accounting.
+    """
+
+    def __init__(self) -> None:
+        self._calls: DefaultDict[Tuple[str, str], int] = defaultdict(int)
+        self._time: DefaultDict[str, float] = defaultdict(float)
+        self._histograms: Dict[str, List[int]] = {}
+
+    def record(self, operation: str, field: str, seconds: float) -> None:
+        """Record a single COM call that took `seconds`"""
+        self._calls[(operation, field)] += 1
+        self._time[operation] += seconds
+        if (histogram := self._histograms.get(operation)) is None:
+            histogram = self._histograms[operation] = [0] * (len(LATENCY_BUCKETS) + 1)
+        histogram[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def reset(self) -> None:
+        self._calls.clear()
+        self._time.clear()
+        self._histograms.clear()
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self._calls.values())
+
+    def calls(self, operation: str) -> int:
+        """Number of calls of an operation over all fields"""
+        return sum(
+            count
+            for (_operation, _), count in self._calls.items()
+            if _operation == operation
+        )
+
+    def calls_by_field(self, operation: str) -> Dict[str, int]:
+        """Number of calls of an operation per field"""
+        return {
+            field: count
+            for (_operation, field), count in self._calls.items()
+            if _operation == operation
+        }
+
+    def total_time(self, operation: str) -> float:
+        """Time in seconds spent in an operation"""
+        return self._time.get(operation, 0.0)
+
+    def histogram(self, operation: str) -> Dict[str, int]:
+        """Number of calls of an operation per latency bucket"""
+        histogram = self._histograms.get(operation, [0] * (len(LATENCY_BUCKETS) + 1))
+        return {format_bucket(index): count for index, count in enumerate(histogram)}
+
+    @property
+    def operations(self) -> List[str]:
+        return sorted(self._histograms)
+
+    def report(self) -> str:
+        """Give a human readable summary of all recorded calls"""
+        lines = [f"COM calls: {self.total_calls}"]
+        for operation in self.operations:
+            lines.append(
+                f"  {operation}: {self.calls(operation)} calls "
+                f"in {self.total_time(operation):.3f}s"
+            )
+            buckets = ", ".join(
+                f"{label}: {count}"
+                for label, count in self.histogram(operation).items()
+                if count
+            )
+            lines.append(f"    latency: {buckets}")
+            by_field = sorted(
+                self.calls_by_field(operation).items(), key=lambda item: -item[1]
+            )
+            for field, count in by_field:
+                if field:
+                    lines.append(f"    {field}: {count}")
+        return "\n".join(lines)
@@ -18,6 +18,10 @@ class MSProjectValueSetError(MSProjectSyncError):
     pass
 
 
+class InvalidFieldError(MSProjectSyncError):
+    """The given field is not known for a MS Project task"""
+
+
 class LoadingError(MSProjectSyncError):
     pass
 
@@ -1,10 +1,13 @@
 import dateutil.parser
+import hashlib
+import json
 from datetime import datetime
+from enum import Enum
 from functools import lru_cache
 from gitlab import Gitlab
 from gitlab.v4.objects import Project
 from logging import getLogger
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
 
 from .custom_types import GitlabIssue, GitlabUserDict
 from .exceptions import MovedIssueNotDefined
@@ -22,6 +25,22 @@ def get_user_identifier(user_dict: GitlabUserDict) -> str:
     return str(user_dict["name"])
 
 
+class GroupBy(Enum):
+    """What new issues are grouped by in the project, each group is a summary task"""
+
+    none = "none"
+    epic = "epic"
+    milestone = "milestone"
+
+
+class IssueGroup(NamedTuple):
+    """An epic or milestone issues are grouped by"""
+
+    kind: GroupBy
+    id: int
+    title: str
+
+
 class Issue:
     """
     Wrapper class around Group/Project Issues
@@ -32,6 +51,7 @@ class Issue:
         "obj",
         "_moved_reference",
         "_fixed_group_id",
+        "_group",
     ]
 
     def __init__(self, obj: GitlabIssue, fixed_group_id: Optional[int] = None):
@@ -43,11 +63,19 @@ class Issue:
         self._fixed_group_id = fixed_group_id
         self.obj: GitlabIssue = obj
         self._moved_reference: Optional[Issue] = None
+        self._group: Optional[IssueGroup] = None
 
     def __getattr__(self, item: str):
         """Default to get the values from the original objext"""
         return getattr(self.obj, item)
 
+    def __getstate__(self):
+        """Allow pickling, i.e. to hand issues to other processes"""
+        return self.obj, self._moved_reference, self._fixed_group_id, self._group
+
+    def __setstate__(self, state):
+        self.obj, self._moved_reference, self._fixed_group_id, self._group = state
+
     @property
     def moved_reference(self) -> Optional["Issue"]:
         """
@@ -72,6 +100,15 @@ class Issue:
             raise ValueError("Can only set an Issue object as moved reference!")
         self._moved_reference = value
 
+    @property
+    def group(self) -> Optional[IssueGroup]:
+        """The epic or milestone the issue is grouped by, see :class:`IssueGroups`"""
+        return self._group
+
+    @group.setter
+    def group(self, value: Optional[IssueGroup]):
+        self._group = value
+
     def __str__(self):
         return f"'{self.title}' (ID: {self.id})"
 
@@ -241,6 +278,54 @@ class Issue:
         """
         return self.obj.web_url
 
+    @property
+    def fingerprint(self) -> str:
+        """
+        Compact hash of all issue fields synced to the task
+
+        If it did not change, syncing the issue again would not change its task.
+        """
+        values = [
+            self.title,
+            self.description,
+            self.labels,
+            self.obj.due_date,
+            self._get_from_time_stats("time_estimate"),
+            self._get_from_time_stats("total_time_spent"),
+            self.obj.state,
+            self.obj.closed_at,
+            self.moved_to_id,
+            self.has_tasks and self.task_completion_status,
+            self.web_url,
+        ]
+        data = json.dumps(values, sort_keys=True, default=str).encode()
+        return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+    @property
+    def milestone(self) -> Optional[Dict[str, Any]]:
+        """
+        The milestone of the issue (with id and title), None if not set
+        """
+        return getattr(self.obj, "milestone", None)
+
+    @property
+    def epic(self) -> Optional[Dict[str, Any]]:
+        """
+        The epic of the issue (with id, iid, title and group_id), None if not set
+        or not available (only in the premium editions)
+        """
+        return getattr(self.obj, "epic", None)
+
+    @property
+    def epic_iid(self) -> Optional[int]:
+        """
+        The iid of the epic within its group, given by older gitlab versions
+        instead of the epic itself
+        """
+        if (epic := self.epic) is not None:
+            return epic["iid"]
+        return getattr(self.obj, "epic_iid", None)
+
 
 @lru_cache(10)
 def get_group_id_from_gitlab_project(project: Project) -> Optional[int]:
@@ -271,14 +356,142 @@ def get_gitlab_class(server: str, personal_token: Optional[str] = None) -> Gitla
         return Gitlab(server, private_token=personal_token)
 
 
-def get_group_issues(gitlab: Gitlab, group_id: int) -> List[Issue]:
+def _list_filters(updated_after: Optional[datetime]) -> Dict[str, Any]:
+    if updated_after is None:
+        return {}
+    return {"updated_after": updated_after.isoformat()}
+
+
+def get_group_issues(
+    gitlab: Gitlab, group_id: int, updated_after: Optional[datetime] = None
+) -> List[Issue]:
+    """Give the issues of the group, only the ones updated after if given"""
     group = gitlab.groups.get(group_id, lazy=True)
-    return [Issue(issue) for issue in group.issues.list(all=True)]
+    return [
+        Issue(issue)
+        for issue in group.issues.list(all=True, **_list_filters(updated_after))
+    ]
 
 
-def get_project_issues(gitlab: Gitlab, project_id: int) -> List[Issue]:
+def get_project_issues(
+    gitlab: Gitlab, project_id: int, updated_after: Optional[datetime] = None
+) -> List[Issue]:
+    """Give the issues of the project, only the ones updated after if given"""
     project = gitlab.projects.get(project_id)
     return [
         Issue(issue, fixed_group_id=get_group_id_from_gitlab_project(project))
-        for issue in project.issues.list(all=True)
+        for issue in project.issues.list(all=True, **_list_filters(updated_after))
     ]
+
+
+class GitlabResource(NamedTuple):
+    """A gitlab project or group to get the issues of"""
+
+    type: str
+    id: int
+
+
+def get_resource_issues(
+    gitlab: Gitlab, resource: GitlabResource, updated_after: Optional[datetime] = None
+) -> List[Issue]:
+    if resource.type == "project":
+        return get_project_issues(gitlab, resource.id, updated_after)
+    elif resource.type == "group":
+        return get_group_issues(gitlab, resource.id, updated_after)
+    else:
+        raise ValueError(f"Invalid Resource Type '{resource.type}'")
+
+
+class IssueGroups:
+    """
+    Give the epic or milestone of issues, each is only fetched once
+
+    The title of a milestone is part of the issue. Epics are only fetched from
+    gitlab if the issue just gives the iid of its epic.
+    """
+
+    def __init__(self, gitlab: Gitlab, group_by: GroupBy):
+        self.gitlab = gitlab
+        self.group_by: GroupBy = group_by
+        # By (group_by, id) or for not yet fetched epics by (group id, iid)
+        self._groups: Dict[Tuple[Any, int], IssueGroup] = {}
+
+    def __len__(self) -> int:
+        return len(set(self._groups.values()))
+
+    def _fetch_epic(self, group_id: int, iid: int) -> IssueGroup:
+        logger.debug(f"Loading epic {iid} of group {group_id}")
+        group = self.gitlab.groups.get(group_id, lazy=True)
+        epic = group.epics.get(iid)
+        return IssueGroup(GroupBy.epic, epic.id, epic.title)
+
+    def get(self, issue: Issue) -> Optional[IssueGroup]:
+        """Give the group of the issue, None if it has none"""
+        if self.group_by is GroupBy.milestone:
+            if (milestone := issue.milestone) is None:
+                return None
+            key: Tuple[Any, int] = (GroupBy.milestone, milestone["id"])
+            if (group := self._groups.get(key)) is None:
+                group = self._groups[key] = IssueGroup(
+                    GroupBy.milestone, milestone["id"], milestone["title"]
+                )
+            return group
+        if self.group_by is GroupBy.epic:
+            if (epic := issue.epic) is not None:
+                key = (GroupBy.epic, epic["id"])
+                if (group := self._groups.get(key)) is None:
+                    group = self._groups[key] = IssueGroup(
+                        GroupBy.epic, epic["id"], epic["title"]
+                    )
+                return group
+            if (iid := issue.epic_iid) is None or issue.group_id is None:
+                return None
+            key = (issue.group_id, iid)
+            if (group := self._groups.get(key)) is None:
+                group = self._groups[key] = self._fetch_epic(issue.group_id, iid)
+            return group
+        return None
+
+    def assign(self, issues: Iterable[Issue]) -> None:
+        """Set the group of all issues"""
+        for issue in issues:
+            issue.group = self.get(issue)
+
+    def clear(self) -> None:
+        """Forget all groups, so that they are fetched again"""
+        self._groups.clear()
+
+
+class IssueCache:
+    """
+    Get the issues of each gitlab resource only once
+
+    Used when syncing several project files with the same or overlapping
+    resources. If the issues are grouped, their groups are assigned when loaded.
+    """
+
+    def __init__(self, gitlab: Gitlab, group_by: GroupBy = GroupBy.none):
+        self.gitlab = gitlab
+        self._issues: Dict[Tuple[GitlabResource, Optional[datetime]], List[Issue]] = {}
+        self.groups: IssueGroups = IssueGroups(gitlab, group_by)
+
+    def __contains__(self, resource: GitlabResource) -> bool:
+        return (resource, None) in self._issues
+
+    def get(
+        self, resource: GitlabResource, updated_after: Optional[datetime] = None
+    ) -> List[Issue]:
+        """Give the issues of the resource, only the ones updated after if given"""
+        key = (resource, updated_after)
+        if (issues := self._issues.get(key)) is None:
+            logger.debug(f"Loading issues of {resource.type} {resource.id}")
+            issues = self._issues[key] = get_resource_issues(
+                self.gitlab, resource, updated_after
+            )
+            self.groups.assign(issues)
+        return issues
+
+    def clear(self) -> None:
+        """Forget all issues and groups, so that they are loaded again"""
+        self._issues.clear()
+        self.groups.clear()
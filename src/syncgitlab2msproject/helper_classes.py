@@ -40,8 +40,9 @@ class SetTaskTypeConservative(TaskTyperSetter):
         if task.has_children:
             # Can't update tasks with children
             return
-        self._type_before_sync = task.type
-        self._effort_driven_before_sync = task.effort_driven
+        values = task.get_fields(["type", "effort_driven"])
+        self._type_before_sync = values["type"]
+        self._effort_driven_before_sync = values["effort_driven"]
         self._is_initial = is_inital
         task.type = PjTaskFixedType.pjFixedWork
 
@@ -53,9 +54,10 @@ class SetTaskTypeConservative(TaskTyperSetter):
             assert self._effort_driven_before_sync is not None
             assert self._type_before_sync is not None
             # Only update if required
-            if task.type != self._type_before_sync:
+            values = task.get_fields(["type", "effort_driven"])
+            if values["type"] != self._type_before_sync:
                 task.type = self._type_before_sync
-            if task.effort_driven != self._effort_driven_before_sync:
+            if values["effort_driven"] != self._effort_driven_before_sync:
                 task.effort_driven = self._effort_driven_before_sync
 
 
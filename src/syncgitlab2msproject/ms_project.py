@@ -1,18 +1,55 @@
-import dateutil
-import pywintypes
-import win32com.client
-from datetime import datetime
-from enum import IntEnum
+import dateutil.parser
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from enum import Enum, IntEnum
+from functools import lru_cache
 from logging import getLogger
 from os import PathLike
-from typing import Any, List, Optional, Sequence, Union
-from win32com.universal import com_error
-
+from time import perf_counter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .com_stats import ComStats
 from .custom_types import ComMSProjectApplication, ComMSProjectProject
 from .decorators import make_none_safe
-from .exceptions import ClassNotInitiated, LoadingError, MSProjectValueSetError
+from .exceptions import (
+    ClassNotInitiated,
+    InvalidFieldError,
+    LoadingError,
+    MSProjectValueSetError,
+)
 from .funcions import convert_to_int_or_raise_exception, raise_exception_if_not_datetime
 
+try:
+    import win32com.client
+    from win32com.universal import com_error
+except ImportError:
+    # Not running on Windows, so only the file based backends can be used
+    win32com = None  # type: ignore
+
+    class com_error(Exception):  # type: ignore
+        """Placeholder for the COM error if pywin32 is not installed"""
+
+
+if TYPE_CHECKING:
+    import pywintypes
+
 # Classes and functions to access Microsoft Project
 # Inspired by https://gist.github.com/zlorb/ff122e8563793bb28f79
 
@@ -31,18 +68,101 @@ class PjTaskFixedType(IntEnum):
     pjFixedWork = 2  # Fixed Work
 
 
+class PjCalculation(IntEnum):
+    """
+    MS Project Calculation Mode as defined in
+    https://docs.microsoft.com/en-us/office/vba/api/project.pjcalculation
+    """
+
+    pjAutomatic = -1  # Automatic calculation
+    pjManual = 0  # Manual calculation
+
+
+class Backend(Enum):
+    """How the MS Project files are accessed"""
+
+    com = "com"  # the MS Project application using COM (only on Windows)
+    mspdi = "mspdi"  # reading and writing MS Project XML files directly
+    mspdi_stream = "mspdi-stream"  # like mspdi but with bounded memory for large files
+
+
+def get_backend_for_file(doc_path: PathLike) -> Backend:
+    """Give the backend to use by default for a file, depending on its suffix"""
+    if str(doc_path).lower().endswith(".xml"):
+        return Backend.mspdi
+    return Backend.com
+
+
+def create_application(backend: Backend) -> ComMSProjectApplication:
+    """
+    Create the application object used by :class:`MSProject` to access the files
+
+    All backends offer the same (COM) interface as the MS Project application.
+    """
+    if backend is Backend.mspdi:
+        # Imported here as the MSPDI backends use the definitions of this module
+        from .mspdi import MSPDIApplication
+
+        return MSPDIApplication()
+    if backend is Backend.mspdi_stream:
+        from .mspdi import MSPDIApplication
+        from .mspdi_stream import MSPDIStreamProject
+
+        return MSPDIApplication(MSPDIStreamProject)
+    if win32com is None:
+        raise LoadingError(
+            "Accessing MS Project using COM requires Windows with pywin32 installed"
+        )
+    return win32com.client.Dispatch("MSProject.Application")
+
+
+class UndoMode(Enum):
+    """How changes done by the sync are recorded in the undo stack of MS Project"""
+
+    record = "record"  # every change is an undo entry (default of MS Project)
+    transaction = "transaction"  # all changes are grouped in one undo entry
+    off = "off"  # keep as few undo entries as possible
+
+
+@lru_cache(maxsize=1024)
+def _build_datetime(
+    year: int,
+    month: int,
+    day: int,
+    hour: int,
+    minute: int,
+    second: int,
+    microsecond: int,
+    utc_offset: Optional[timedelta],
+) -> datetime:
+    """Build a datetime from its components, memorized as dates repeat a lot"""
+    tzinfo = None if utc_offset is None else timezone(utc_offset)
+    return datetime(year, month, day, hour, minute, second, microsecond, tzinfo)
+
+
 @make_none_safe
 def win2python_datetime(win32datetime: "pywintypes.datetime") -> datetime:
     """
     Convert MSProject time to Python time
 
-    might be a cumbersome to convert to string first but seems the only way
-    to be sure the timezone is correct
-    see http://timgolden.me.uk/python/win32_how_do_i/use-a-pytime-value.html
-    for an alternative.
-    This solution is taken from:
-    https://stackoverflow.com/questions/39028290/
+    `pywintypes.datetime` is a subclass of `datetime`, so the datetime is build
+    directly from its components keeping the UTC offset the value was given with.
+    This gives the same result as converting it to string and parsing it again
+    (see http://timgolden.me.uk/python/win32_how_do_i/use-a-pytime-value.html and
+    https://stackoverflow.com/questions/39028290/) which is only used as fallback
+    for values that are not a datetime.
     """
+    if isinstance(win32datetime, datetime):
+        return _build_datetime(
+            win32datetime.year,
+            win32datetime.month,
+            win32datetime.day,
+            win32datetime.hour,
+            win32datetime.minute,
+            win32datetime.second,
+            win32datetime.microsecond,
+            win32datetime.utcoffset(),
+        )
     return dateutil.parser.parse(str(win32datetime))
 
 
@@ -70,20 +190,440 @@ def get_project_path(ms_project) -> str:
     return ms_project.Path + "\\" + ms_project.Name
 
 
+# FieldIDs of the task text fields as defined in
+# https://docs.microsoft.com/en-us/office/vba/api/project.pjfield
+TEXT_FIELD_IDS: Dict[str, int] = {
+    "Text1": 188743731,
+    "Text2": 188743734,
+    "Text3": 188743737,
+    "Text4": 188743740,
+    "Text5": 188743743,
+    "Text6": 188743746,
+    "Text7": 188743747,
+    "Text8": 188743748,
+    "Text9": 188743749,
+    "Text10": 188743750,
+    **{f"Text{nr}": 188743986 + nr for nr in range(11, 31)},
+}
+
+# Python property name of `Task` to the COM field name
+TASK_FIELDS: Dict[str, str] = {
+    "id": "ID",
+    "unique_id": "UniqueID",
+    "name": "Name",
+    "start": "Start",
+    "finish": "Finish",
+    "actual_start": "ActualStart",
+    "actual_finish": "ActualFinish",
+    "deadline": "Deadline",
+    "notes": "Notes",
+    "duration": "Duration",
+    "percent_complete": "PercentComplete",
+    "work": "Work",
+    "actual_work": "ActualWork",
+    "estimated": "Estimated",
+    "hyperlink_name": "Hyperlink",
+    "hyperlink_address": "HyperlinkAddress",
+    "outline_level": "OutlineLevel",
+    **{f"text{nr}": f"Text{nr}" for nr in range(1, 31)},
+    "type": "Type",
+    "effort_driven": "EffortDriven",
+}
+
+# COM field name to python property name
+_COM_TO_PROPERTY: Dict[str, str] = {com: prop for prop, com in TASK_FIELDS.items()}
+# Any known identifier (lower case) to COM field name
+_FIELD_LOOKUP: Dict[Union[str, int], str] = {
+    **{com.lower(): com for com in TASK_FIELDS.values()},
+    **{prop: com for prop, com in TASK_FIELDS.items()},
+    **{field_id: com for com, field_id in TEXT_FIELD_IDS.items()},
+}
+
+FieldIdentifier = Union[str, int]
+
+
+@lru_cache(maxsize=None)
+def resolve_field(field: FieldIdentifier) -> str:
+    """
+    Give the COM field name for a field identifier
+
+    Args:
+        field: the python property name (``"text30"``), the COM field
+               name (``"Text30"``) or the FieldID (``188744016``) of a task field
+
+    Raises:
+        InvalidFieldError: if the field is not known
+    """
+    key = field.lower() if isinstance(field, str) else field
+    try:
+        return _FIELD_LOOKUP[key]
+    except KeyError:
+        raise InvalidFieldError(f"'{field}' is not a known task field")
+
+
+# MS Project allows between 1 and 99 undo levels
+MIN_UNDO_LEVELS = 1
+
+# COM field names loaded by default with :meth:`MSProject.snapshot`
+DEFAULT_SNAPSHOT_FIELDS: Tuple[str, ...] = (
+    "ID",
+    "UniqueID",
+    "Text28",
+    "Text29",
+    "Text30",
+    "HyperlinkAddress",
+    "Work",
+    "Duration",
+    "PercentComplete",
+    "Type",
+    "EffortDriven",
+    "OutlineLevel",
+    "Summary",
+)
+
+# COM field names depending on the position of the task in the project, they
+# change for other tasks when tasks are added or deleted
+LAYOUT_FIELDS: Tuple[str, ...] = (
+    "ID",
+    "OutlineLevel",
+    "OutlineNumber",
+    "Summary",
+    "WBS",
+)
+
+
+class TaskSnapshot:
+    """
+    Columnar in-memory copy of task fields of a project
+
+    Created by :meth:`MSProject.snapshot`. Every requested COM field is stored as
+    one column, every not empty task of the project as one row. Reading values
+    from the snapshot does not touch COM at all, so it is meant for matching and
+    comparing. Writes still have to go through the :class:`Task` objects that
+    can be obtained with :meth:`task`.
+    """
+
+    __slots__ = ("_project", "fields", "unique_ids", "_ms_tasks", "_columns")
+
+    def __init__(self, project: "MSProject", fields: Sequence[str]):
+        self._project = project
+        self.fields: Tuple[str, ...] = tuple(fields)
+        # UniqueIDs of the tasks in the order of the project
+        self.unique_ids: List[int] = []
+        self._ms_tasks: List[Any] = []
+        self._columns: Dict[str, List[Any]] = {field: [] for field in self.fields}
+
+    def __repr__(self):
+        return f"<TaskSnapshot({self._project!r}, {len(self)} tasks)>"
+
+    def __len__(self) -> int:
+        return len(self.unique_ids)
+
+    def append(self, ms_task: Any) -> int:
+        """
+        Read all fields of the given COM task and add them as new row
+
+        Returns:
+            the UniqueID of the task
+        """
+        self._ms_tasks.append(ms_task)
+        for field, column in self._columns.items():
+            column.append(self._project.read_field(ms_task, field))
+        if "UniqueID" in self._columns:
+            unique_id = self._columns["UniqueID"][-1]
+        else:
+            unique_id = self._project.read_field(ms_task, "UniqueID")
+        self.unique_ids.append(unique_id)
+        return unique_id
+
+    def column(self, field: str) -> List[Any]:
+        """Give all values of a field, ordered like :attr:`unique_ids`"""
+        return self._columns[field]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Give all values of the task in the row with the given index"""
+        return {field: column[index] for field, column in self._columns.items()}
+
+    def value(self, index: int, field: str) -> Any:
+        return self._columns[field][index]
+
+    def task(self, index: int) -> "Task":
+        """Give the task object of the row to read or write further fields"""
+        return Task(self._project, self.unique_ids[index], self._ms_tasks[index])
+
+    def __iter__(self) -> Iterator[Tuple["Task", Dict[str, Any]]]:
+        """Iterate over all rows giving the task object and the loaded values"""
+        for index in range(len(self)):
+            yield self.task(index), self.row(index)
+
+
+T = TypeVar("T")
+RefT = TypeVar("RefT", bound=Hashable)
+UrlT = TypeVar("UrlT", bound=Hashable)
+
+
+class TaskReferenceIndex(Generic[RefT, UrlT]):
+    """
+    Index of tasks (by UniqueID) referring to external items
+
+    Every task can refer with a reference ID and a web url to an item (i.e. a
+    gitlab issue). The index allows to look up the task for a reference in both
+    directions without scanning the tasks. Items referred to by several tasks
+    are reported as duplicates.
+    """
+
+    __slots__ = ("_by_ref_id", "_by_web_url", "_references", "_duplicates")
+
+    def __init__(self) -> None:
+        self._by_ref_id: Dict[RefT, int] = {}
+        self._by_web_url: Dict[UrlT, int] = {}
+        self._references: Dict[int, Tuple[Optional[RefT], Optional[UrlT]]] = {}
+        self._duplicates: Dict[Union[RefT, UrlT], List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._references)
+
+    def __contains__(self, ref_id: object) -> bool:
+        return ref_id in self._by_ref_id
+
+    def _add_key(self, index: Dict[Any, int], key: Any, unique_id: int):
+        if (existing := index.setdefault(key, unique_id)) != unique_id:
+            duplicates = self._duplicates.setdefault(key, [existing])
+            if unique_id not in duplicates:
+                duplicates.append(unique_id)
+
+    def add(
+        self,
+        unique_id: int,
+        ref_id: Optional[RefT] = None,
+        web_url: Optional[UrlT] = None,
+    ) -> None:
+        """Register the references of a task, the first task of a reference wins"""
+        self._references[unique_id] = (ref_id, web_url)
+        if ref_id is not None:
+            self._add_key(self._by_ref_id, ref_id, unique_id)
+        if web_url is not None:
+            self._add_key(self._by_web_url, web_url, unique_id)
+
+    def by_ref_id(self, ref_id: RefT) -> Optional[int]:
+        """Give the UniqueID of the task referring to the reference ID"""
+        return self._by_ref_id.get(ref_id)
+
+    def by_web_url(self, web_url: UrlT) -> Optional[int]:
+        """Give the UniqueID of the task referring to the web url"""
+        return self._by_web_url.get(web_url)
+
+    def references(self, unique_id: int) -> Tuple[Optional[RefT], Optional[UrlT]]:
+        """Give the reference ID and web url of a task, both None if not known"""
+        return self._references.get(unique_id, (None, None))
+
+    @property
+    def duplicates(self) -> Dict[Union[RefT, UrlT], List[int]]:
+        """References (IDs or web urls) used by several tasks with their UniqueIDs"""
+        return self._duplicates
+
+
+class TaskOutline:
+    """
+    Outline hierarchy of the tasks (by UniqueID): level, parent and children
+
+    Built once from the outline levels of all tasks in the order of the project,
+    so checking for children, looking up the parent or walking a subtree does not
+    require any COM call. Top level tasks have no parent (the project summary
+    task is not part of the outline).
+    """
+
+    __slots__ = ("_levels", "_parents", "_children", "_last")
+
+    def __init__(self) -> None:
+        self._levels: Dict[int, int] = {}
+        self._parents: Dict[int, Optional[int]] = {}
+        self._children: Dict[Optional[int], List[int]] = {None: []}
+        # The task in the last row, new tasks at the end are placed relative to it
+        self._last: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._levels)
+
+    def __contains__(self, unique_id: object) -> bool:
+        return unique_id in self._levels
+
+    def _link(self, unique_id: int, parent: Optional[int], level: int) -> None:
+        self._levels[unique_id] = level
+        self._parents[unique_id] = parent
+        self._children[unique_id] = []
+        self._children[parent].append(unique_id)
+
+    def append(self, unique_id: int, level: int) -> None:
+        """Add the task in the row after the last task with the given level"""
+        if unique_id in self._levels:
+            raise ValueError(f"Task {unique_id} is already part of the outline")
+        parent = self._last
+        while parent is not None and self._levels[parent] >= level:
+            parent = self._parents[parent]
+        self._link(unique_id, parent, level)
+        self._last = unique_id
+
+    def add_children(self, parent: Optional[int], unique_ids: Iterable[int]) -> None:
+        """Add the tasks as the last children of `parent` (None for top level)"""
+        level = 1 if parent is None else self._levels[parent] + 1
+        # If the subtree of the parent reaches to the end of the project, so do
+        # the new tasks
+        ends_project = True
+        if parent is not None:
+            ancestor = self._last
+            while ancestor is not None and ancestor != parent:
+                ancestor = self._parents[ancestor]
+            ends_project = ancestor == parent
+        for unique_id in unique_ids:
+            if unique_id in self._levels:
+                raise ValueError(f"Task {unique_id} is already part of the outline")
+            self._link(unique_id, parent, level)
+            if ends_project:
+                self._last = unique_id
+
+    def level(self, unique_id: int) -> int:
+        """Give the outline level of the task"""
+        return self._levels[unique_id]
+
+    def parent(self, unique_id: int) -> Optional[int]:
+        """Give the UniqueID of the parent, None for top level tasks"""
+        return self._parents[unique_id]
+
+    def children(self, unique_id: Optional[int]) -> List[int]:
+        """Give the UniqueIDs of the direct children, None for the top level"""
+        return list(self._children[unique_id])
+
+    def has_children(self, unique_id: int) -> bool:
+        return len(self._children[unique_id]) > 0
+
+    def subtree(self, unique_id: int, include_self: bool = False) -> Iterator[int]:
+        """Iterate depth first over all descendants in the order of the project"""
+        if include_self:
+            yield unique_id
+        stack = list(reversed(self._children[unique_id]))
+        while stack:
+            current = stack.pop()
+            yield current
+            stack.extend(reversed(self._children[current]))
+
+    def last_descendant(self, unique_id: int) -> int:
+        """Give the task in the last row of the subtree (the task itself if none)"""
+        while children := self._children[unique_id]:
+            unique_id = children[-1]
+        return unique_id
+
+    @classmethod
+    def from_levels(cls, levels: Iterable[Tuple[int, int]]) -> "TaskOutline":
+        """Build the outline from (UniqueID, outline level) in project order"""
+        outline = cls()
+        for unique_id, level in levels:
+            outline.append(unique_id, level)
+        return outline
+
+
+class TaskWriteBuffer:
+    """
+    Last known and not yet written values of a single task
+
+    Used by :class:`MSProject` in buffered mode. Values are read from COM only
+    once and writes are collected, dropping the ones that do not change the
+    last known value, until they are written with :meth:`MSProject.flush`.
+    The known values of the :data:`LAYOUT_FIELDS` are only valid for the
+    ``layout_version`` of the project they were read at.
+    """
+
+    __slots__ = ("known", "pending", "layout_version")
+
+    def __init__(self, layout_version: int = 0) -> None:
+        self.known: Dict[str, Any] = {}
+        self.pending: Dict[str, Any] = {}
+        self.layout_version = layout_version
+
+    def forget_layout(self, layout_version: int) -> None:
+        """Forget the known values that changed with the task layout"""
+        for field in LAYOUT_FIELDS:
+            self.known.pop(field, None)
+        self.layout_version = layout_version
+
+    def get(self, attribute: str, read: Callable[[str], Any]) -> Any:
+        """Give the value of the attribute, using `read` if it is not known yet"""
+        if attribute in self.pending:
+            return self.pending[attribute]
+        if attribute not in self.known:
+            self.known[attribute] = read(attribute)
+        return self.known[attribute]
+
+    def set(self, attribute: str, value: Any, read: Callable[[str], Any]) -> None:
+        """Remember the value to write if it differs from the known one"""
+        if attribute not in self.known:
+            # A single read is still a lot cheaper than a write that triggers
+            # the recalculation of the project
+            self.known[attribute] = read(attribute)
+        if self.known[attribute] == value:
+            self.pending.pop(attribute, None)
+        else:
+            self.pending[attribute] = value
+
+
 class MSProject(Sequence[Optional["Task"]]):
     """
     Python Wrapper around the Communication with MS Project
 
     Offers at task list
+
+    In buffered mode the values of tasks are only read once and all writes that
+    change a value are collected and written at once with :meth:`flush`, which
+    is done automatically when leaving the context successfully.
+    Note that in this mode values that are calculated by MS Project (i.e. the
+    duration after changing the work) are only updated after the flush.
     """
 
-    def __init__(self, doc_path: PathLike):
+    def __init__(
+        self,
+        doc_path: PathLike,
+        buffered: bool = False,
+        com_stats: Optional[ComStats] = None,
+        backend: Optional[Backend] = None,
+        application: Optional[ComMSProjectApplication] = None,
+        read_only: bool = False,
+    ):
+        """
+        Args:
+            doc_path: path of the MS Project file
+            buffered: use the buffered mode
+            com_stats: if given all COM calls are recorded there
+            backend: how to access the file, by default MSPDI for ``.xml``
+                     files and COM for everything else
+            application: use this (already running) MS Project application
+                         instead of starting one, it is not quit on close
+            read_only: open the file read only, it is not saved on exit
+        """
+        self.read_only: bool = read_only
+        self.com_stats: Optional[ComStats] = com_stats
         self.project: ComMSProjectProject = None
         self._close_after: Optional[bool] = None
-        self.mpp: ComMSProjectApplication = win32com.client.Dispatch(
-            "MSProject.Application"
-        )
+        if backend is None:
+            backend = get_backend_for_file(doc_path)
+        self.backend: Backend = backend
+        self._owns_application: bool = application is None
+        if application is None:
+            application = create_application(backend)
+        self.mpp: ComMSProjectApplication = application
         self.doc_path: PathLike = doc_path
+        # Increased each time tasks are deleted, so that Task objects
+        # know that their cached COM task might not be valid anymore
+        self._structure_version: int = 0
+        self._layout_version: int = 0
+        # All COM tasks resolved so far by their UniqueID
+        self._tasks_by_unique_id: Dict[int, Any] = {}
+        self.buffered: bool = buffered
+        self._write_buffers: Dict[int, TaskWriteBuffer] = {}
+        # UniqueIDs of the tasks a value could not be written for
+        self.failed_writes: Set[int] = set()
+        self._in_bulk_edit: bool = False
+        self.reference_index: Optional[TaskReferenceIndex[Any, Any]] = None
+        self.outline: Optional[TaskOutline] = None
 
     def __repr__(self):
         if self.project is None:
@@ -97,19 +637,70 @@ class MSProject(Sequence[Optional["Task"]]):
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         # Only save on success
-        if exc_type is None:
+        if self.read_only:
+            self.discard_pending()
+        elif exc_type is None:
+            self.flush()
             self.save()
+        else:
+            self.discard_pending()
         if self._close_after:
             self.close()
 
+    def _com_call(self, operation: str, func: Callable[..., T], *args: Any) -> T:
+        """Call the COM function, recording it if COM stats are enabled"""
+        if self.com_stats is None:
+            return func(*args)
+        start = perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.com_stats.record(operation, "", perf_counter() - start)
+
+    def read_field(self, ms_task: Any, field: str) -> Any:
+        """Read a field of a COM task, recording it if COM stats are enabled"""
+        if self.com_stats is None:
+            return getattr(ms_task, field)
+        start = perf_counter()
+        try:
+            return getattr(ms_task, field)
+        finally:
+            self.com_stats.record("read", field, perf_counter() - start)
+
+    def write_field(self, ms_task: Any, field: str, value: Any) -> None:
+        """Write a field of a COM task, recording it if COM stats are enabled"""
+        if self.com_stats is None:
+            setattr(ms_task, field, value)
+            return
+        start = perf_counter()
+        try:
+            setattr(ms_task, field, value)
+        finally:
+            self.com_stats.record("write", field, perf_counter() - start)
+
+    def _iter_com_tasks(self) -> Iterator[Any]:
+        """Iterate with the COM enumerator, recording it if COM stats are enabled"""
+        if self.com_stats is None:
+            yield from self.project.Tasks
+            return
+        enumerator = iter(self._com_call("Tasks", lambda: self.project.Tasks))
+        while True:
+            try:
+                ms_task = self._com_call("enumerate", next, enumerator)
+            except StopIteration:
+                return
+            yield ms_task
+
     def _open_projects(self) -> List[str]:
         return [get_project_path(project) for project in self.mpp.Projects]
 
     def load(self) -> None:
         """Load a given MSProject file."""
-        already_open = self._open_projects()
         try:
-            self.mpp.FileOpen(str(self.doc_path))
+            already_open = self._open_projects()
+            self._com_call(
+                "FileOpen", self.mpp.FileOpen, str(self.doc_path), self.read_only
+            )
             self.project = self.mpp.ActiveProject
             self._close_after = get_project_path(self.project) not in already_open
         except Exception as e:
@@ -123,34 +714,379 @@ class MSProject(Sequence[Optional["Task"]]):
                 self.mpp.FileClose(False)
             except com_error as e:
                 logger.info(f"File close failed: {e}")
-        self.mpp.Quit()
+        # MS Project might have been running before, keep the projects open in it
+        if self._owns_application and not self._open_projects():
+            self.mpp.Quit()
         del self.mpp
 
     def save(self) -> None:
         """Close an open MSProject, saving changes."""
+        if self.read_only:
+            raise MSProjectValueSetError(f"'{self.doc_path}' was opened read only")
         if self.project is not None:
-            self.mpp.FileSave()
+            self._com_call("FileSave", self.mpp.FileSave)
+
+    @contextmanager
+    def bulk_edit(self) -> Iterator["MSProject"]:
+        """
+        Context in which screen updating and automatic calculation are turned off
+
+        Without it every write might trigger a recalculation of the schedule and
+        a repaint of MS Project. On success pending buffered writes are flushed
+        and the project is recalculated once. The previous settings are always
+        restored.
+        """
+        if self._in_bulk_edit:
+            yield self
+            return
+        screen_updating = self.mpp.ScreenUpdating
+        calculation = self.mpp.Calculation
+        self._in_bulk_edit = True
+        try:
+            self.mpp.ScreenUpdating = False
+            self.mpp.Calculation = PjCalculation.pjManual.value
+            yield self
+            self.flush()
+            self.mpp.CalculateProject()
+        finally:
+            self._in_bulk_edit = False
+            try:
+                self.mpp.Calculation = calculation
+                self.mpp.ScreenUpdating = screen_updating
+            except com_error as e:
+                logger.error(f"Could not restore calculation and screen updating: {e}")
+
+    @contextmanager
+    def undo_transaction(self, label: str = "Sync Gitlab Issues") -> Iterator[None]:
+        """All changes done within the context are a single undo entry"""
+        self.mpp.OpenUndoTransaction(label)
+        try:
+            yield
+        finally:
+            self.mpp.CloseUndoTransaction()
+
+    @contextmanager
+    def undo_disabled(self) -> Iterator[None]:
+        """
+        Reduce the undo levels to the minimum within the context
+
+        The undo stack is cleared and the previous undo levels restored afterwards.
+        """
+        undo_levels = self.mpp.UndoLevels
+        self.mpp.UndoClear()
+        self.mpp.UndoLevels = MIN_UNDO_LEVELS
+        try:
+            yield
+        finally:
+            try:
+                self.mpp.UndoClear()
+                self.mpp.UndoLevels = undo_levels
+            except com_error as e:
+                logger.error(f"Could not restore the undo levels: {e}")
+
+    @contextmanager
+    def undo_mode(self, mode: UndoMode) -> Iterator[None]:
+        """Record the changes within the context as defined by `mode`"""
+        if mode is UndoMode.transaction:
+            with self.undo_transaction():
+                yield
+        elif mode is UndoMode.off:
+            with self.undo_disabled():
+                yield
+        else:
+            yield
+
+    def get_write_buffer(self, unique_id: int) -> Optional[TaskWriteBuffer]:
+        """Give the write buffer for the task, None if not in buffered mode"""
+        if not self.buffered:
+            return None
+        if (buffer := self._write_buffers.get(unique_id)) is None:
+            buffer = self._write_buffers[unique_id] = TaskWriteBuffer(
+                self._layout_version
+            )
+        elif buffer.layout_version != self._layout_version:
+            # Tasks have been added or deleted since the values were read
+            buffer.forget_layout(self._layout_version)
+        return buffer
+
+    @property
+    def pending_writes(self) -> int:
+        """Number of values that have been set but not yet written"""
+        return sum(len(buffer.pending) for buffer in self._write_buffers.values())
+
+    def flush(self) -> None:
+        """Write all changed values collected in buffered mode task by task"""
+        for unique_id, buffer in self._write_buffers.items():
+            self._flush_buffer(unique_id, buffer)
+
+    def flush_task(self, unique_id: int) -> None:
+        """Write the changed values of a single task collected in buffered mode"""
+        if (buffer := self._write_buffers.get(unique_id)) is not None:
+            self._flush_buffer(unique_id, buffer)
+
+    def _flush_buffer(self, unique_id: int, buffer: TaskWriteBuffer) -> None:
+        if buffer.pending:
+            task = Task(self, unique_id)
+            for attribute, value in buffer.pending.items():
+                task._write_task_val(attribute, value)
+        # Values might have been recalculated by MS Project, so read them again
+        buffer.known.clear()
+        buffer.pending.clear()
+
+    def discard_pending(self) -> None:
+        """Forget all changed values collected in buffered mode"""
+        if pending := self.pending_writes:
+            logger.warning(f"Discarding {pending} not written values of {self}")
+        self._write_buffers.clear()
 
     def __len__(self) -> int:
         if self.project is None:
             raise ClassNotInitiated("Can't get length for a not loaded project")
-        return self.project.Tasks.Count
+        return self._com_call("Count", lambda: self.project.Tasks.Count)
+
+    @property
+    def structure_version(self) -> int:
+        """Version of the task list structure, see :meth:`invalidate_tasks`"""
+        return self._structure_version
+
+    def invalidate_tasks(self) -> None:
+        """
+        Mark all COM tasks cached by :class:`Task` objects as invalid
+
+        As tasks are addressed by their UniqueID inserting or moving tasks does not
+        require this, but it has to be called after tasks have been deleted.
+        """
+        self._structure_version += 1
+        self._layout_version += 1
+        self._tasks_by_unique_id.clear()
+        # The outline does not know about the deleted tasks
+        self.outline = None
+
+    def register_task(self, ms_task: Any, unique_id: Optional[int] = None) -> int:
+        """
+        Remember the COM task so it can be resolved by its UniqueID later on
+
+        Returns:
+            the UniqueID of the task
+        """
+        if unique_id is None:
+            unique_id = self.read_field(ms_task, "UniqueID")
+        self._tasks_by_unique_id[unique_id] = ms_task
+        return unique_id
 
     def add_task(self, name: str) -> "Task":
-        ms_task = self.project.Tasks.Add(name)
-        return Task(self, ms_task.ID - 1)
+        ms_task = self._com_call("Add", self.project.Tasks.Add, name)
+        self._layout_version += 1
+        task = Task(self, self.register_task(ms_task), ms_task)
+        if self.outline is not None:
+            self.outline.append(task.unique_id, task.outline_level)
+        return task
+
+    def _get_insert_position(self, parent: "Task") -> Optional[int]:
+        """
+        Give the ID a task has to be inserted before to be the last child of
+        `parent`, None if it has to be appended at the end of the project
+        """
+        if self.outline is not None and parent.unique_id in self.outline:
+            last = self.get_task_by_unique_id(
+                self.outline.last_descendant(parent.unique_id)
+            )
+        else:
+            last = parent._get_task()
+            children = self.read_field(last, "OutlineChildren")
+            while (count := children.Count) > 0:
+                last = self._com_call("OutlineChildren", children, count)
+                children = self.read_field(last, "OutlineChildren")
+        if (last_id := self.read_field(last, "ID")) >= len(self):
+            return None
+        return last_id + 1
+
+    def add_tasks(
+        self,
+        names: Sequence[str],
+        *,
+        parent: Optional["Task"] = None,
+        outline_level: Optional[int] = None,
+        fields: Optional[Sequence[Mapping[FieldIdentifier, Any]]] = None,
+    ) -> List["Task"]:
+        """
+        Add several tasks at once
+
+        The tasks are inserted as one block. As every insert might trigger a
+        recalculation, callers adding many tasks should do it within
+        :meth:`bulk_edit`. Like in MS Project a new task is on the level of the
+        task above, so the outline level is only written where it differs.
+
+        Args:
+            names: the names of the tasks to add
+            parent: add the tasks as last children of this task, if not given
+                    they are added at the end of the project
+            outline_level: outline level of the tasks if no parent is given
+            fields: initial values of the tasks, ordered like `names`
+
+        Returns:
+            the added tasks, ordered like `names`
+        """
+        if fields is not None and len(fields) != len(names):
+            raise ValueError("For every task to add exactly one field set is required")
+        if not names:
+            return []
+        before: Optional[int] = None
+        if parent is not None:
+            before = self._get_insert_position(parent)
+            outline_level = parent.outline_level + 1
+        added = [self._add_com_task(names[0], before)]
+        if outline_level is not None:
+            # The following tasks inherit the level of the first one
+            self._set_outline_level(added[0], outline_level)
+        for nr, name in enumerate(names[1:], start=1):
+            added.append(
+                self._add_com_task(name, None if before is None else before + nr)
+            )
+        if outline_level is not None and len(added) > 1:
+            if added[-1]._read_task_val("OutlineLevel") != outline_level:
+                for task in added[1:]:
+                    self._set_outline_level(task, outline_level)
+        self._layout_version += 1
+        if fields is not None:
+            for task, task_fields in zip(added, fields):
+                task.set_fields(task_fields)
+        if self.outline is not None:
+            self._add_to_outline(self.outline, added, parent, outline_level)
+        return added
+
+    def _add_com_task(self, name: str, before: Optional[int]) -> "Task":
+        """Add a task at the end or before the task with the given ID"""
+        if before is None:
+            ms_task = self._com_call("Add", self.project.Tasks.Add, name)
+        else:
+            ms_task = self._com_call("Add", self.project.Tasks.Add, name, before)
+        return Task(self, self.register_task(ms_task), ms_task)
+
+    @staticmethod
+    def _set_outline_level(task: "Task", outline_level: int) -> None:
+        """Write the outline level of an added task unbuffered, if it differs"""
+        if task._read_task_val("OutlineLevel") != outline_level:
+            # Written at once, as the position of following inserts depends on it
+            task._write_task_val("OutlineLevel", outline_level)
+
+    @staticmethod
+    def _add_to_outline(
+        outline: TaskOutline,
+        added: Sequence["Task"],
+        parent: Optional["Task"],
+        outline_level: Optional[int],
+    ) -> None:
+        if parent is not None and parent.unique_id in outline:
+            outline.add_children(parent.unique_id, (task.unique_id for task in added))
+            return
+        for task in added:
+            level = task.outline_level if outline_level is None else outline_level
+            outline.append(task.unique_id, level)
 
     def get_task(self, task_nr: int) -> Optional["Task"]:
-        return self.project.Tasks(task_nr + 1)
+        return self._com_call("get_task", self.project.Tasks, task_nr + 1)
+
+    def get_task_by_unique_id(self, unique_id: int) -> Any:
+        """Give the COM task with the given UniqueID"""
+        if (ms_task := self._tasks_by_unique_id.get(unique_id)) is None:
+            ms_task = self._com_call(
+                "get_task_by_unique_id", self.project.Tasks.UniqueID, unique_id
+            )
+            self._tasks_by_unique_id[unique_id] = ms_task
+        return ms_task
+
+    def snapshot(self, fields: Sequence[str] = DEFAULT_SNAPSHOT_FIELDS) -> TaskSnapshot:
+        """
+        Read the given fields of all tasks in a single pass
+
+        Args:
+            fields: COM names of the task fields to load, i.e. ``"Text30"``
+
+        Returns:
+            the loaded values, empty task rows are skipped
+        """
+        if self.project is None:
+            raise ClassNotInitiated("Can't create snapshot for a not loaded project")
+        snapshot = TaskSnapshot(self, fields)
+        for ms_task in self._iter_com_tasks():
+            if ms_task is not None:
+                unique_id = self.register_task(ms_task, snapshot.append(ms_task))
+                if (buffer := self.get_write_buffer(unique_id)) is not None:
+                    # Loaded values are known, so unchanged writes can be skipped
+                    for field in snapshot.fields:
+                        buffer.known.setdefault(field, snapshot.column(field)[-1])
+        return snapshot
+
+    def __iter__(self) -> Iterator[Optional["Task"]]:
+        """
+        Iterate over all tasks using the COM enumerator of the task collection
+
+        Empty task rows are given as None.
+        """
+        if self.project is None:
+            raise ClassNotInitiated("Can't iterate over a not loaded project")
+        for ms_task in self._iter_com_tasks():
+            if ms_task is None:
+                yield None
+            else:
+                yield Task(self, None, ms_task)
+
+    def build_reference_index(
+        self,
+        get_references: Callable[
+            [Dict[str, Any]], Tuple[Optional[RefT], Optional[UrlT]]
+        ],
+        snapshot: Optional[TaskSnapshot] = None,
+    ) -> TaskReferenceIndex[RefT, UrlT]:
+        """
+        Build the :attr:`reference_index` in one pass over all tasks
+
+        Args:
+            get_references: extracts the reference ID and web url from the values
+                            of a task, each None if the task is not referring
+            snapshot: already loaded values to build the index from, needs the
+                      ``UniqueID`` and all fields `get_references` requires.
+                      If not given a new snapshot is created.
+        """
+        if snapshot is None:
+            snapshot = self.snapshot()
+        index: TaskReferenceIndex[RefT, UrlT] = TaskReferenceIndex()
+        for row in range(len(snapshot)):
+            values = snapshot.row(row)
+            index.add(values["UniqueID"], *get_references(values))
+        self.reference_index = index
+        return index
+
+    def build_outline(self, snapshot: Optional[TaskSnapshot] = None) -> TaskOutline:
+        """
+        Build the :attr:`outline` of all tasks in one pass
+
+        Once built, it is used to answer structure queries like
+        :attr:`Task.has_children` without COM calls and is kept up to date when
+        tasks are added with :meth:`add_task` or :meth:`add_tasks`. It is dropped
+        by :meth:`invalidate_tasks`.
+
+        Args:
+            snapshot: already loaded values to build the outline from, needs the
+                      ``UniqueID`` and ``OutlineLevel``. If not given a new
+                      snapshot is created.
+        """
+        if snapshot is None:
+            snapshot = self.snapshot(("UniqueID", "OutlineLevel"))
+        self.outline = TaskOutline.from_levels(
+            zip(snapshot.unique_ids, snapshot.column("OutlineLevel"))
+        )
+        return self.outline
 
     # TODO: Fix MYPY
     def __getitem__(self, i: int) -> Optional["Task"]:  # type: ignore
         if i >= len(self):
             raise IndexError("Out of tasks")
-        if self.get_task(i) is None:
+        if (ms_task := self.get_task(i)) is None:
             return None
         else:
-            return Task(self, i)
+            return Task(self, None, ms_task)
 
 
 class Task:
@@ -165,44 +1101,225 @@ class Task:
     Properties naming follows PEP8 (lower case naming)
     """
 
-    __slots__ = ("_project", "_tasknr")
+    __slots__ = ("_project", "_unique_id", "_ms_task", "_structure_version")
 
-    def __init__(self, project: MSProject, task_number: int):
+    def __init__(
+        self, project: MSProject, unique_id: Optional[int], ms_task: Any = None
+    ):
+        """
+        Args:
+            project: the project the task belongs to
+            unique_id: the UniqueID of the task, it stays the same even if tasks
+                       are inserted, deleted or moved. Might be None if
+                       `ms_task` is given, it is then read when required.
+            ms_task: the already resolved COM task, if not given it will be
+                     resolved on first access
+        """
+        if unique_id is None and ms_task is None:
+            raise ValueError("Either the UniqueID or the COM task has to be given")
         self._project = project
-        self._tasknr = task_number
+        self._unique_id = unique_id
+        self._ms_task = ms_task
+        self._structure_version = project.structure_version
 
     def __repr__(self):
-        return f"<Task({self._project.__repr__()}, {self._tasknr}) '{self.name}'>"
+        return f"<Task({self._project.__repr__()}, {self.unique_id}) '{self.name}'>"
 
     def __str__(self):
         return f"'{self.name}' (ID: {self.id})"
 
     def _get_task(self):
-        return self._project.get_task(self._tasknr)
+        """
+        Give the COM task object
+
+        The object is only resolved once by the UniqueID (each resolve is a COM
+        round trip) and cached as long as the tasks of the project are not
+        invalidated.
+        """
+        if (
+            self._ms_task is None
+            or self._structure_version != self._project.structure_version
+        ):
+            self._ms_task = self._project.get_task_by_unique_id(self.unique_id)
+            self._structure_version = self._project.structure_version
+        return self._ms_task
+
+    def invalidate(self) -> None:
+        """Drop the cached COM task, it will be resolved again on next access"""
+        # The UniqueID has to be known to be able to resolve the task again
+        self._resolve_unique_id()
+        self._ms_task = None
+
+    def _get_write_buffer(self) -> Optional[TaskWriteBuffer]:
+        """Give the write buffer of the task, None if not in buffered mode"""
+        # Checked first, as the UniqueID might have to be read otherwise
+        if not self._project.buffered:
+            return None
+        return self._project.get_write_buffer(self.unique_id)
+
+    def _get_task_val(self, attribute: str) -> Any:
+        """
+        Get attribute from MS Project task, in buffered mode from the buffer
+        """
+        if (buffer := self._get_write_buffer()) is not None:
+            return buffer.get(attribute, self._read_task_val)
+        return self._read_task_val(attribute)
+
+    def _read_task_val(self, attribute: str) -> Any:
+        """
+        Read attribute directly from MS Project task
+        """
+        return self._project.read_field(self._get_task(), attribute)
 
     def _set_task_val(self, attribute: str, value: Any):
         """
         Set attribute to MS Project task but do not fail if set is not working
+
+        In buffered mode the value is only written on flush and only if it
+        differs from the last known value.
+        """
+        if (buffer := self._get_write_buffer()) is not None:
+            buffer.set(attribute, value, self._read_task_val)
+        else:
+            self._write_task_val(attribute, value)
+
+    def _write_task_val(self, attribute: str, value: Any):
+        """
+        Write attribute directly to MS Project task, log if not working
+
+        The failure is remembered, see :attr:`write_failed`.
         """
         try:
-            setattr(self._get_task(), attribute, value)
+            self._project.write_field(self._get_task(), attribute, value)
         except com_error as e:
+            self.write_failed = True
             logger.error(
                 f"Could not set attribute {attribute} with value '{value}' "
                 f"({type(value)}) for {self}.\n Exception: '{e}'"
             )
 
+    @property
+    def write_failed(self) -> bool:
+        """True if a value could not be written to the task"""
+        return self.unique_id in self._project.failed_writes
+
+    @write_failed.setter
+    def write_failed(self, value: bool):
+        if value:
+            self._project.failed_writes.add(self.unique_id)
+        else:
+            self._project.failed_writes.discard(self.unique_id)
+
+    def flush(self) -> None:
+        """In buffered mode write the changed values of this task"""
+        if self._project.buffered:
+            self._project.flush_task(self.unique_id)
+
+    def get_fields(self, fields: Iterable[FieldIdentifier]) -> Dict[Any, Any]:
+        """
+        Read several fields of the task at once
+
+        Args:
+            fields: identifiers of the fields, see :func:`resolve_field`
+
+        Returns:
+            the values (converted like the properties) by the given identifiers
+        """
+        values: Dict[Any, Any] = {}
+        for field in fields:
+            com_name = resolve_field(field)
+            values[field] = getattr(self, _COM_TO_PROPERTY[com_name])
+        return values
+
+    def set_fields(self, values: Mapping[FieldIdentifier, Any]) -> None:
+        """
+        Set several fields of the task at once in the given order
+
+        Args:
+            values: new values by field identifier, see :func:`resolve_field`
+        """
+        for field, value in values.items():
+            com_name = resolve_field(field)
+            setattr(self, _COM_TO_PROPERTY[com_name], value)
+
+    def set_com_values(self, values: Mapping[str, Any]) -> None:
+        """
+        Set several fields to values that are already converted for COM
+
+        Args:
+            values: new values by COM field name, i.e. as recorded by
+                    :class:`PlannedTask`
+        """
+        for field, value in values.items():
+            self._set_task_val(field, value)
+
     @property
     def id(self) -> int:
-        return self._get_task().ID
+        return self._get_task_val("ID")
+
+    def _resolve_unique_id(self) -> int:
+        """Read the UniqueID of the task and register it, if not known yet"""
+        if self._unique_id is None:
+            self._unique_id = self._project.register_task(self._ms_task)
+        return self._unique_id
+
+    @property
+    def unique_id(self) -> int:
+        """The UniqueID of the task, only read once as it can't change"""
+        return self._resolve_unique_id()
+
+    def _get_outline(self) -> Optional[TaskOutline]:
+        """Give the outline of the project if it knows the task"""
+        outline = self._project.outline
+        if outline is None or self.unique_id not in outline:
+            return None
+        return outline
 
     @property
     def has_children(self) -> bool:
-        return len(self._get_task().OutlineChildren) > 0
+        if (outline := self._get_outline()) is not None:
+            return outline.has_children(self.unique_id)
+        return len(self._read_task_val("OutlineChildren")) > 0
+
+    @property
+    def parent(self) -> Optional["Task"]:
+        """The task this one is a child of, None for top level tasks"""
+        if (outline := self._get_outline()) is not None:
+            if (parent_id := outline.parent(self.unique_id)) is None:
+                return None
+            return Task(self._project, parent_id)
+        ms_parent = self._read_task_val("OutlineParent")
+        # Top level tasks have the project summary task (ID 0) as parent
+        if ms_parent is None or self._project.read_field(ms_parent, "ID") == 0:
+            return None
+        return Task(self._project, None, ms_parent)
+
+    @property
+    def children(self) -> List["Task"]:
+        """The direct children of the task"""
+        if (outline := self._get_outline()) is not None:
+            return [
+                Task(self._project, unique_id)
+                for unique_id in outline.children(self.unique_id)
+            ]
+        return [
+            Task(self._project, None, ms_task)
+            for ms_task in self._read_task_val("OutlineChildren")
+        ]
+
+    def iter_subtree(self) -> Iterator["Task"]:
+        """Iterate depth first over all descendants of the task"""
+        if (outline := self._get_outline()) is not None:
+            for unique_id in outline.subtree(self.unique_id):
+                yield Task(self._project, unique_id)
+            return
+        for child in self.children:
+            yield child
+            yield from child.iter_subtree()
 
     @property
     def name(self) -> str:
-        return self._get_task().Name
+        return self._get_task_val("Name")
 
     @name.setter
     def name(self, value: str):
@@ -210,7 +1327,7 @@ class Task:
 
     @property
     def start(self) -> datetime:
-        assert (val := win2python_datetime(self._get_task().Start)) is not None
+        assert (val := win2python_datetime(self._get_task_val("Start"))) is not None
         return val
 
     @start.setter
@@ -220,7 +1337,7 @@ class Task:
 
     @property
     def finish(self) -> datetime:
-        assert (val := win2python_datetime(self._get_task().Finish)) is not None
+        assert (val := win2python_datetime(self._get_task_val("Finish"))) is not None
         return val
 
     @finish.setter
@@ -230,7 +1347,7 @@ class Task:
 
     @property
     def actual_start(self) -> Optional[datetime]:
-        return na_win2py_datetime(self._get_task().ActualStart)
+        return na_win2py_datetime(self._get_task_val("ActualStart"))
 
     @actual_start.setter
     def actual_start(self, value: Optional[datetime]):
@@ -240,7 +1357,7 @@ class Task:
 
     @property
     def actual_finish(self) -> Optional[datetime]:
-        return na_win2py_datetime(self._get_task().ActualFinish)
+        return na_win2py_datetime(self._get_task_val("ActualFinish"))
 
     @actual_finish.setter
     def actual_finish(self, value: Optional[datetime]):
@@ -250,7 +1367,7 @@ class Task:
 
     @property
     def deadline(self) -> Optional[datetime]:
-        return na_win2py_datetime(self._get_task().Deadline)
+        return na_win2py_datetime(self._get_task_val("Deadline"))
 
     @deadline.setter
     def deadline(self, value: Optional[datetime]):
@@ -260,7 +1377,7 @@ class Task:
 
     @property
     def notes(self) -> str:
-        return self._get_task().Notes
+        return self._get_task_val("Notes")
 
     @notes.setter
     def notes(self, value: str):
@@ -270,15 +1387,15 @@ class Task:
     def duration(self) -> Optional[int]:
         """Gets  the duration (in minutes) of a task.
         Read-only for summary tasks. Read/write Variant."""
-        return self._get_task().duration
+        return self._get_task_val("Duration")
 
     @duration.setter
     def duration(self, value: int):
-        self._set_task_val("duration", convert_to_int_or_raise_exception(value))
+        self._set_task_val("Duration", convert_to_int_or_raise_exception(value))
 
     @property
     def percent_complete(self) -> int:
-        return self._get_task().PercentComplete
+        return self._get_task_val("PercentComplete")
 
     @percent_complete.setter
     def percent_complete(self, value: int):
@@ -293,7 +1410,7 @@ class Task:
     @property
     def work(self) -> int:
         """Gets or sets the work (in minutes) for the task. Read/write Variant."""
-        return self._get_task().Work
+        return self._get_task_val("Work")
 
     @work.setter
     def work(self, value: int):
@@ -305,7 +1422,7 @@ class Task:
         Gets or sets the actual work (in minutes) for the task.
         Read/write Variant.
         """
-        return self._get_task().ActualWork
+        return self._get_task_val("ActualWork")
 
     @actual_work.setter
     def actual_work(self, value: int):
@@ -317,7 +1434,7 @@ class Task:
         True if the task duration is an estimate.
         False if the task duration is a set value. Read/write Variant.
         """
-        return self._get_task().Estimated
+        return self._get_task_val("Estimated")
 
     @estimated.setter
     def estimated(self, value: bool):
@@ -328,7 +1445,7 @@ class Task:
         """set or get hyplerlink (name)
         see https://docs.microsoft.com/en-us/office/vba/api/project.task.hyperlink
         """
-        return self._get_task().Hyperlink
+        return self._get_task_val("Hyperlink")
 
     @hyperlink_name.setter
     def hyperlink_name(self, value: str):
@@ -339,7 +1456,7 @@ class Task:
         """set or get hyplerlink (url)
         see https://docs.microsoft.com/en-us/office/vba/api/project.task.hyperlink
         """
-        return self._get_task().HyperlinkAddress
+        return self._get_task_val("HyperlinkAddress")
 
     @hyperlink_address.setter
     def hyperlink_address(self, value: str):
@@ -347,12 +1464,16 @@ class Task:
 
     @property
     def outline_level(self) -> int:
-        return self._get_task().OutlineLevel
+        return self._get_task_val("OutlineLevel")
 
     @outline_level.setter
     def outline_level(self, value: int):
         value = convert_to_int_or_raise_exception(value)
         if value >= 1:
+            if (outline := self._get_outline()) is not None:
+                if outline.level(self.unique_id) != value:
+                    # Changes the parent of this and maybe of following tasks
+                    self._project.outline = None
             self._set_task_val("OutlineLevel", value)
         else:
             raise MSProjectValueSetError(
@@ -362,7 +1483,7 @@ class Task:
     @property
     def text1(self) -> str:
         """get or sets the Text1 Property"""
-        return self._get_task().Text1
+        return self._get_task_val("Text1")
 
     @text1.setter
     def text1(self, value: str):
@@ -371,7 +1492,7 @@ class Task:
     @property
     def text2(self) -> str:
         """get or sets the Text2 Property"""
-        return self._get_task().Text2
+        return self._get_task_val("Text2")
 
     @text2.setter
     def text2(self, value: str):
@@ -380,7 +1501,7 @@ class Task:
     @property
     def text3(self) -> str:
         """get or sets the Text3 Property"""
-        return self._get_task().Text3
+        return self._get_task_val("Text3")
 
     @text3.setter
     def text3(self, value: str):
@@ -389,7 +1510,7 @@ class Task:
     @property
     def text4(self) -> str:
         """get or sets the Text4 Property"""
-        return self._get_task().Text4
+        return self._get_task_val("Text4")
 
     @text4.setter
     def text4(self, value: str):
@@ -398,7 +1519,7 @@ class Task:
     @property
     def text5(self) -> str:
         """get or sets the Text5 Property"""
-        return self._get_task().Text5
+        return self._get_task_val("Text5")
 
     @text5.setter
     def text5(self, value: str):
@@ -407,7 +1528,7 @@ class Task:
     @property
     def text6(self) -> str:
         """get or sets the Text6 Property"""
-        return self._get_task().Text6
+        return self._get_task_val("Text6")
 
     @text6.setter
     def text6(self, value: str):
@@ -416,7 +1537,7 @@ class Task:
     @property
     def text7(self) -> str:
         """get or sets the Text7 Property"""
-        return self._get_task().Text7
+        return self._get_task_val("Text7")
 
     @text7.setter
     def text7(self, value: str):
@@ -425,7 +1546,7 @@ class Task:
     @property
     def text8(self) -> str:
         """get or sets the Text8 Property"""
-        return self._get_task().Text8
+        return self._get_task_val("Text8")
 
     @text8.setter
     def text8(self, value: str):
@@ -434,7 +1555,7 @@ class Task:
     @property
     def text9(self) -> str:
         """get or sets the Text9 Property"""
-        return self._get_task().Text9
+        return self._get_task_val("Text9")
 
     @text9.setter
     def text9(self, value: str):
@@ -443,7 +1564,7 @@ class Task:
     @property
     def text10(self) -> str:
         """get or sets the Text10 Property"""
-        return self._get_task().Text10
+        return self._get_task_val("Text10")
 
     @text10.setter
     def text10(self, value: str):
@@ -452,7 +1573,7 @@ class Task:
     @property
     def text11(self) -> str:
         """get or sets the Text11 Property"""
-        return self._get_task().Text11
+        return self._get_task_val("Text11")
 
     @text11.setter
     def text11(self, value: str):
@@ -461,7 +1582,7 @@ class Task:
     @property
     def text12(self) -> str:
         """get or sets the Text12 Property"""
-        return self._get_task().Text12
+        return self._get_task_val("Text12")
 
     @text12.setter
     def text12(self, value: str):
@@ -470,7 +1591,7 @@ class Task:
     @property
     def text13(self) -> str:
         """get or sets the Text13 Property"""
-        return self._get_task().Text13
+        return self._get_task_val("Text13")
 
     @text13.setter
     def text13(self, value: str):
@@ -479,7 +1600,7 @@ class Task:
     @property
     def text14(self) -> str:
         """get or sets the Text14 Property"""
-        return self._get_task().Text14
+        return self._get_task_val("Text14")
 
     @text14.setter
     def text14(self, value: str):
@@ -488,7 +1609,7 @@ class Task:
     @property
     def text15(self) -> str:
         """get or sets the Text15 Property"""
-        return self._get_task().Text15
+        return self._get_task_val("Text15")
 
     @text15.setter
     def text15(self, value: str):
@@ -497,7 +1618,7 @@ class Task:
     @property
     def text16(self) -> str:
         """get or sets the Text16 Property"""
-        return self._get_task().Text16
+        return self._get_task_val("Text16")
 
     @text16.setter
     def text16(self, value: str):
@@ -506,7 +1627,7 @@ class Task:
     @property
     def text17(self) -> str:
         """get or sets the Text17 Property"""
-        return self._get_task().Text17
+        return self._get_task_val("Text17")
 
     @text17.setter
     def text17(self, value: str):
@@ -515,7 +1636,7 @@ class Task:
     @property
     def text18(self) -> str:
         """get or sets the Text18 Property"""
-        return self._get_task().Text18
+        return self._get_task_val("Text18")
 
     @text18.setter
     def text18(self, value: str):
@@ -524,7 +1645,7 @@ class Task:
     @property
     def text19(self) -> str:
         """get or sets the Text19 Property"""
-        return self._get_task().Text19
+        return self._get_task_val("Text19")
 
     @text19.setter
     def text19(self, value: str):
@@ -533,7 +1654,7 @@ class Task:
     @property
     def text20(self) -> str:
         """get or sets the Text20 Property"""
-        return self._get_task().Text20
+        return self._get_task_val("Text20")
 
     @text20.setter
     def text20(self, value: str):
@@ -542,7 +1663,7 @@ class Task:
     @property
     def text21(self) -> str:
         """get or sets the Text21 Property"""
-        return self._get_task().Text21
+        return self._get_task_val("Text21")
 
     @text21.setter
     def text21(self, value: str):
@@ -551,7 +1672,7 @@ class Task:
     @property
     def text22(self) -> str:
         """get or sets the Text22 Property"""
-        return self._get_task().Text22
+        return self._get_task_val("Text22")
 
     @text22.setter
     def text22(self, value: str):
@@ -560,7 +1681,7 @@ class Task:
     @property
     def text23(self) -> str:
         """get or sets the Text23 Property"""
-        return self._get_task().Text23
+        return self._get_task_val("Text23")
 
     @text23.setter
     def text23(self, value: str):
@@ -569,7 +1690,7 @@ class Task:
     @property
     def text24(self) -> str:
         """get or sets the Text24 Property"""
-        return self._get_task().Text24
+        return self._get_task_val("Text24")
 
     @text24.setter
     def text24(self, value: str):
@@ -578,7 +1699,7 @@ class Task:
     @property
     def text25(self) -> str:
         """get or sets the Text25 Property"""
-        return self._get_task().Text25
+        return self._get_task_val("Text25")
 
     @text25.setter
     def text25(self, value: str):
@@ -587,7 +1708,7 @@ class Task:
     @property
     def text26(self) -> str:
         """get or sets the Text26 Property"""
-        return self._get_task().Text26
+        return self._get_task_val("Text26")
 
     @text26.setter
     def text26(self, value: str):
@@ -596,7 +1717,7 @@ class Task:
     @property
     def text27(self) -> str:
         """get or sets the Text27 Property"""
-        return self._get_task().Text27
+        return self._get_task_val("Text27")
 
     @text27.setter
     def text27(self, value: str):
@@ -605,7 +1726,7 @@ class Task:
     @property
     def text28(self) -> str:
         """get or sets the Text28 Property"""
-        return self._get_task().Text28
+        return self._get_task_val("Text28")
 
     @text28.setter
     def text28(self, value: str):
@@ -614,7 +1735,7 @@ class Task:
     @property
     def text29(self) -> str:
         """get or sets the Text29 Property"""
-        return self._get_task().Text29
+        return self._get_task_val("Text29")
 
     @text29.setter
     def text29(self, value: str):
@@ -623,7 +1744,7 @@ class Task:
     @property
     def text30(self) -> str:
         """get or sets the Text30 Property"""
-        return self._get_task().Text30
+        return self._get_task_val("Text30")
 
     @text30.setter
     def text30(self, value: str):
@@ -631,7 +1752,7 @@ class Task:
 
     @property
     def type(self) -> PjTaskFixedType:
-        return PjTaskFixedType(self._get_task().Type)
+        return PjTaskFixedType(self._get_task_val("Type"))
 
     @type.setter
     def type(self, value: Union[PjTaskFixedType, int]):
@@ -643,7 +1764,7 @@ class Task:
 
     @property
     def effort_driven(self) -> bool:
-        return self._get_task().EffortDriven
+        return self._get_task_val("EffortDriven")
 
     @effort_driven.setter
     def effort_driven(self, value: bool):
@@ -654,3 +1775,55 @@ class Task:
             # ignore it
         else:
             self._set_task_val("EffortDriven", bool(value))
+
+
+class PlannedTask(Task):
+    """
+    Task reading the already loaded values and recording all changes
+
+    Used to find out what a sync would change without writing anything. Fields
+    that were not loaded are read from the project once. Changes are not
+    written but kept (as COM values) until a later change restores the loaded
+    value. Values MS Project calculates, i.e. the duration after setting the
+    work, are not updated.
+    """
+
+    __slots__ = ("_values", "_changes")
+
+    def __init__(self, project: MSProject, unique_id: int, values: Dict[str, Any]):
+        """
+        Args:
+            project: the project the task belongs to
+            unique_id: the UniqueID of the task
+            values: the loaded values by COM field name, see :class:`TaskSnapshot`
+        """
+        super().__init__(project, unique_id)
+        self._values: Dict[str, Any] = dict(values)
+        self._changes: Dict[str, Any] = {}
+
+    def _get_loaded_val(self, attribute: str) -> Any:
+        if attribute not in self._values:
+            self._values[attribute] = self._read_task_val(attribute)
+        return self._values[attribute]
+
+    def _get_task_val(self, attribute: str) -> Any:
+        if attribute in self._changes:
+            return self._changes[attribute]
+        return self._get_loaded_val(attribute)
+
+    def _set_task_val(self, attribute: str, value: Any):
+        if self._get_loaded_val(attribute) == value:
+            self._changes.pop(attribute, None)
+        else:
+            self._changes[attribute] = value
+
+    def flush(self) -> None:
+        """Nothing is written, the changes are only recorded"""
+
+    @property
+    def changes(self) -> Dict[str, Tuple[Any, Any]]:
+        """The loaded and the new value of all changed fields by COM field name"""
+        return {
+            field: (self._values[field], value)
+            for field, value in self._changes.items()
+        }
@@ -0,0 +1,658 @@
+"""
+Access MS Project XML (MSPDI) files without MS Project
+
+The classes mimic the parts of the COM interface of MS Project that are used by
+:class:`~syncgitlab2msproject.ms_project.MSProject`, so the same wrapper (and the
+whole sync) works with both. The file is held in memory and only written back on
+save. Note that no scheduling is done, MS Project recalculates the plan once the
+file is opened there.
+
+The format is described in
+https://docs.microsoft.com/office-project/xml-data-interchange/project-xml-data-interchange-schema-reference
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .exceptions import MSProjectValueSetError
+from .ms_project import TEXT_FIELD_IDS, PjCalculation, PjTaskFixedType
+
+logger = getLogger(f"{__package__}.{__name__}")
+
+NAMESPACE = "http://schemas.microsoft.com/project"
+NS = f"{{{NAMESPACE}}}"
+ET.register_namespace("", NAMESPACE)
+
+# Value used by MS Project for dates that are not set
+NA = "NA"
+
+DEFAULT_DURATION = "PT8H0M0S"
+
+# Order of the task elements as defined by the MSPDI schema, new elements are
+# inserted at the correct position to keep the file valid
+TASK_ELEMENT_ORDER: Tuple[str, ...] = (
+    "UID",
+    "GUID",
+    "ID",
+    "Name",
+    "Active",
+    "Manual",
+    "Type",
+    "IsNull",
+    "CreateDate",
+    "Contact",
+    "WBS",
+    "WBSLevel",
+    "OutlineNumber",
+    "OutlineLevel",
+    "Priority",
+    "Start",
+    "Finish",
+    "Duration",
+    "ManualStart",
+    "ManualFinish",
+    "ManualDuration",
+    "DurationFormat",
+    "Work",
+    "Stop",
+    "Resume",
+    "ResumeValid",
+    "EffortDriven",
+    "Recurring",
+    "OverAllocated",
+    "Estimated",
+    "Milestone",
+    "Summary",
+    "DisplayAsSummary",
+    "Critical",
+    "IsSubproject",
+    "IsSubprojectReadOnly",
+    "SubprojectName",
+    "ExternalTask",
+    "ExternalTaskProject",
+    "EarlyStart",
+    "EarlyFinish",
+    "LateStart",
+    "LateFinish",
+    "StartVariance",
+    "FinishVariance",
+    "WorkVariance",
+    "FreeSlack",
+    "TotalSlack",
+    "StartSlack",
+    "FinishSlack",
+    "FixedCost",
+    "FixedCostAccrual",
+    "PercentComplete",
+    "PercentWorkComplete",
+    "Cost",
+    "OvertimeCost",
+    "OvertimeWork",
+    "ActualStart",
+    "ActualFinish",
+    "ActualDuration",
+    "ActualCost",
+    "ActualOvertimeCost",
+    "ActualWork",
+    "ActualOvertimeWork",
+    "RegularWork",
+    "RemainingDuration",
+    "RemainingCost",
+    "RemainingWork",
+    "RemainingOvertimeCost",
+    "RemainingOvertimeWork",
+    "ACWP",
+    "CV",
+    "ConstraintType",
+    "CalendarUID",
+    "ConstraintDate",
+    "Deadline",
+    "LevelAssignments",
+    "LevelingCanSplit",
+    "LevelingDelay",
+    "LevelingDelayFormat",
+    "PreLeveledStart",
+    "PreLeveledFinish",
+    "Hyperlink",
+    "HyperlinkAddress",
+    "HyperlinkSubAddress",
+    "IgnoreResourceCalendar",
+    "Notes",
+    "HideBar",
+    "Rollup",
+    "BCWS",
+    "BCWP",
+    "PhysicalPercentComplete",
+    "EarnedValueMethod",
+    "PredecessorLink",
+    "ActualWorkProtected",
+    "ActualOvertimeWorkProtected",
+    "ExtendedAttribute",
+    "Baseline",
+    "OutlineCode",
+    "IsPublished",
+    "StatusManager",
+    "CommitmentStart",
+    "CommitmentFinish",
+    "CommitmentType",
+    "TimephasedData",
+)
+_TASK_ELEMENT_POSITION = {tag: nr for nr, tag in enumerate(TASK_ELEMENT_ORDER)}
+
+# Project elements the extended attribute definitions have to be placed before
+_BEFORE_EXTENDED_ATTRIBUTES = ("Calendars", "Tasks", "Resources", "Assignments")
+
+_DURATION_PATTERN = re.compile(
+    r"^-?P(?:(?P<days>[\d.]+)D)?"
+    r"(?:T(?:(?P<hours>[\d.]+)H)?(?:(?P<minutes>[\d.]+)M)?(?:(?P<seconds>[\d.]+)S)?)?$"
+)
+
+
+def parse_duration(value: Optional[str]) -> int:
+    """Convert a MSPDI duration (i.e. ``PT8H0M0S``) into minutes"""
+    if not value:
+        return 0
+    if (match := _DURATION_PATTERN.match(value.strip())) is None:
+        raise ValueError(f"'{value}' is not a valid MSPDI duration")
+    parts = {key: float(val) for key, val in match.groupdict().items() if val}
+    minutes = (
+        parts.get("days", 0) * 24 * 60
+        + parts.get("hours", 0) * 60
+        + parts.get("minutes", 0)
+        + parts.get("seconds", 0) / 60
+    )
+    return round(-minutes if value.strip().startswith("-") else minutes)
+
+
+def format_duration(minutes: Union[int, float]) -> str:
+    """Convert minutes into a MSPDI duration"""
+    hours, rest = divmod(int(round(minutes)), 60)
+    return f"PT{hours}H{rest}M0S"
+
+
+def parse_datetime(value: Optional[str]) -> Union[datetime, str]:
+    """Convert a MSPDI datetime, give ``NA`` like MS Project if not set"""
+    if not value:
+        return NA
+    return datetime.fromisoformat(value.strip())
+
+
+def format_datetime(value: Union[datetime, str, None]) -> Optional[str]:
+    """Convert a datetime for MSPDI, None if the value is not set"""
+    if value is None or (isinstance(value, str) and value.upper() == NA):
+        return None
+    if not isinstance(value, datetime):
+        raise MSProjectValueSetError(f"'{value}' is not a valid date")
+    if value.tzinfo is not None:
+        # Dates in the file are local dates
+        value = value.astimezone().replace(tzinfo=None)
+    return value.replace(microsecond=0).isoformat()
+
+
+def parse_bool(value: Optional[str]) -> bool:
+    return (value or "0").strip() == "1"
+
+
+def format_bool(value: Any) -> str:
+    return "1" if value else "0"
+
+
+def parse_int(value: Optional[str]) -> int:
+    return int(float(value)) if value else 0
+
+
+def format_int(value: Any) -> str:
+    try:
+        return str(int(value))
+    except (TypeError, ValueError) as e:
+        raise MSProjectValueSetError(f"'{value}' is not a valid integer: {e}")
+
+
+def parse_text(value: Optional[str]) -> str:
+    return value or ""
+
+
+def format_text(value: Any) -> Optional[str]:
+    return None if value is None or value == "" else str(value)
+
+
+# Converters (reading, writing) of the task field kinds
+CONVERTERS: Dict[str, Tuple[Callable[[Optional[str]], Any], Callable[[Any], Any]]] = {
+    "text": (parse_text, format_text),
+    "int": (parse_int, format_int),
+    "bool": (parse_bool, format_bool),
+    "datetime": (parse_datetime, format_datetime),
+    "duration": (parse_duration, format_duration),
+}
+
+# COM field name to the MSPDI element name and its kind
+TASK_FIELDS: Dict[str, Tuple[str, str]] = {
+    "ID": ("ID", "int"),
+    "UniqueID": ("UID", "int"),
+    "Name": ("Name", "text"),
+    "Notes": ("Notes", "text"),
+    "Type": ("Type", "int"),
+    "OutlineLevel": ("OutlineLevel", "int"),
+    "Start": ("Start", "datetime"),
+    "Finish": ("Finish", "datetime"),
+    "Deadline": ("Deadline", "datetime"),
+    "ActualStart": ("ActualStart", "datetime"),
+    "ActualFinish": ("ActualFinish", "datetime"),
+    "Duration": ("Duration", "duration"),
+    "Work": ("Work", "duration"),
+    "ActualWork": ("ActualWork", "duration"),
+    "PercentComplete": ("PercentComplete", "int"),
+    "Estimated": ("Estimated", "bool"),
+    "EffortDriven": ("EffortDriven", "bool"),
+    "Hyperlink": ("Hyperlink", "text"),
+    "HyperlinkAddress": ("HyperlinkAddress", "text"),
+}
+
+# Fields that are calculated and can't be written
+READ_ONLY_FIELDS = ("ID", "UniqueID", "Summary", "OutlineChildren", "OutlineParent")
+
+
+def insert_ordered(parent: ET.Element, child: ET.Element, order: Dict[str, int]):
+    """Insert the child before the first element that follows it in `order`"""
+    position = order[child.tag[len(NS) :]]
+    for nr, element in enumerate(parent):
+        if order.get(element.tag[len(NS) :], -1) > position:
+            parent.insert(nr, child)
+            return
+    parent.append(child)
+
+
+class MSPDICollection:
+    """Read only collection of tasks like the COM collections (1 based index)"""
+
+    __slots__ = ("_items",)
+
+    def __init__(self, items: List["MSPDITask"]):
+        self._items = items
+
+    @property
+    def Count(self) -> int:
+        return len(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __call__(self, index: int) -> "MSPDITask":
+        return self._items[index - 1]
+
+    def __iter__(self) -> Iterator["MSPDITask"]:
+        return iter(self._items)
+
+
+class MSPDITask:
+    """A task of a MSPDI file, accessible like a COM task"""
+
+    __slots__ = ("_tasks", "element")
+
+    def __init__(self, tasks: "MSPDITasks", element: ET.Element):
+        object.__setattr__(self, "_tasks", tasks)
+        object.__setattr__(self, "element", element)
+
+    def __repr__(self):
+        return f"<MSPDITask({self.UniqueID}) '{self.Name}'>"
+
+    def _get(self, tag: str) -> Optional[str]:
+        return self.element.findtext(f"{NS}{tag}")
+
+    def _set(self, tag: str, text: Optional[str]) -> None:
+        child = self.element.find(f"{NS}{tag}")
+        if text is None:
+            if child is not None:
+                self.element.remove(child)
+        else:
+            if child is None:
+                child = ET.Element(f"{NS}{tag}")
+                insert_ordered(self.element, child, _TASK_ELEMENT_POSITION)
+            child.text = text
+
+    def _find_extended_attribute(self, field_id: int) -> Optional[ET.Element]:
+        for attribute in self.element.iterfind(f"{NS}ExtendedAttribute"):
+            if attribute.findtext(f"{NS}FieldID") == str(field_id):
+                return attribute
+        return None
+
+    def _get_extended(self, field_id: int) -> str:
+        if (attribute := self._find_extended_attribute(field_id)) is None:
+            return ""
+        return attribute.findtext(f"{NS}Value") or ""
+
+    def _set_extended(self, field_id: int, field_name: str, value: Any) -> None:
+        attribute = self._find_extended_attribute(field_id)
+        if value is None or value == "":
+            if attribute is not None:
+                self.element.remove(attribute)
+            return
+        if attribute is None:
+            self._tasks.project.define_extended_attribute(field_id, field_name)
+            attribute = ET.Element(f"{NS}ExtendedAttribute")
+            ET.SubElement(attribute, f"{NS}FieldID").text = str(field_id)
+            ET.SubElement(attribute, f"{NS}Value")
+            insert_ordered(self.element, attribute, _TASK_ELEMENT_POSITION)
+        value_element = attribute.find(f"{NS}Value")
+        assert value_element is not None
+        value_element.text = str(value)
+
+    @property
+    def is_null(self) -> bool:
+        """True for empty task rows"""
+        return parse_bool(self._get("IsNull"))
+
+    @property
+    def ID(self) -> int:
+        # IDs of the following tasks are only updated when read after adding tasks
+        self._tasks.update_ids()
+        return self.__getattr__("ID")
+
+    @property
+    def OutlineChildren(self) -> MSPDICollection:
+        return MSPDICollection(self._tasks.outline_children(self))
+
+    @property
+    def OutlineParent(self) -> Optional["MSPDITask"]:
+        return self._tasks.outline_parent(self)
+
+    @property
+    def Summary(self) -> bool:
+        return not self.is_null and self._tasks.has_outline_children(self)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in TEXT_FIELD_IDS:
+            return self._get_extended(TEXT_FIELD_IDS[name])
+        try:
+            tag, kind = TASK_FIELDS[name]
+        except KeyError:
+            raise AttributeError(f"MSPDI task has no field '{name}'")
+        return CONVERTERS[kind][0](self._get(tag))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in READ_ONLY_FIELDS:
+            raise MSProjectValueSetError(f"The task field '{name}' is read only")
+        if name in TEXT_FIELD_IDS:
+            self._set_extended(TEXT_FIELD_IDS[name], name, value)
+            return
+        try:
+            tag, kind = TASK_FIELDS[name]
+        except KeyError:
+            raise MSProjectValueSetError(f"MSPDI task field '{name}' is not supported")
+        self._set(tag, CONVERTERS[kind][1](value))
+
+
+class MSPDITasks:
+    """The tasks of a MSPDI file, accessible like the COM task collection"""
+
+    # Highest UniqueID given so far, only searched for on the first added task
+    _last_unique_id: Optional[int] = None
+    # First row with an outdated ID, None if all IDs are up to date
+    _stale_row: Optional[int] = None
+    # True if tasks were inserted and the elements are not ordered like the rows
+    _unordered: bool = False
+
+    def __init__(self, project: "MSPDIProject", element: ET.Element):
+        self.project = project
+        self._element = element
+        self._rows: List[MSPDITask] = []
+        self._by_unique_id: Dict[int, MSPDITask] = {}
+        for task_element in element.iterfind(f"{NS}Task"):
+            task = MSPDITask(self, task_element)
+            self._by_unique_id[task.UniqueID] = task
+            # ID 0 is the project summary task that is not part of the collection
+            if task.ID > 0:
+                self._rows.append(task)
+        self._rows.sort(key=lambda row: row.ID)
+
+    @property
+    def Count(self) -> int:
+        return len(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __call__(self, index: int) -> Optional[MSPDITask]:
+        if not 1 <= index <= len(self._rows):
+            raise IndexError(f"There is no task with the ID {index}")
+        task = self._rows[index - 1]
+        return None if task.is_null else task
+
+    def __iter__(self) -> Iterator[Optional[MSPDITask]]:
+        for task in self._rows:
+            yield None if task.is_null else task
+
+    def UniqueID(self, unique_id: int) -> MSPDITask:
+        return self._by_unique_id[unique_id]
+
+    def _level(self, row: int) -> int:
+        return self._rows[row].OutlineLevel
+
+    def _subtree_rows(self, task: MSPDITask) -> Iterator[int]:
+        """Give the rows of all not empty tasks below the task in the outline"""
+        row = task.ID - 1
+        level = task.OutlineLevel
+        for next_row in range(row + 1, len(self._rows)):
+            if self._rows[next_row].is_null:
+                continue
+            if self._level(next_row) <= level:
+                return
+            yield next_row
+
+    def outline_children(self, task: MSPDITask) -> List[MSPDITask]:
+        level = task.OutlineLevel
+        return [
+            self._rows[row]
+            for row in self._subtree_rows(task)
+            if self._level(row) == level + 1
+        ]
+
+    def outline_parent(self, task: MSPDITask) -> Optional[MSPDITask]:
+        """Give the parent, the project summary task for top level tasks"""
+        level = task.OutlineLevel
+        for row in range(task.ID - 2, -1, -1):
+            if not self._rows[row].is_null and self._level(row) < level:
+                return self._rows[row]
+        return next(
+            (other for other in self._by_unique_id.values() if other.ID == 0), None
+        )
+
+    def has_outline_children(self, task: MSPDITask) -> bool:
+        return next(self._subtree_rows(task), None) is not None
+
+    def _create_element(self, name: str, outline_level: int) -> ET.Element:
+        if self._last_unique_id is None:
+            self._last_unique_id = max(self._by_unique_id, default=0)
+        self._last_unique_id += 1
+        unique_id = self._last_unique_id
+        start = self.project.start_date
+        element = ET.Element(f"{NS}Task")
+        for tag, text in (
+            ("UID", str(unique_id)),
+            ("ID", "0"),
+            ("Name", name),
+            ("Type", str(PjTaskFixedType.pjFixedUnits.value)),
+            ("IsNull", "0"),
+            ("OutlineLevel", str(outline_level)),
+            ("Start", format_datetime(start)),
+            ("Finish", format_datetime(start + timedelta(hours=8))),
+            ("Duration", DEFAULT_DURATION),
+            ("Work", format_duration(0)),
+            ("Estimated", "1"),
+            ("PercentComplete", "0"),
+        ):
+            ET.SubElement(element, f"{NS}{tag}").text = text
+        return element
+
+    def Add(self, Name: str, Before: Optional[int] = None) -> MSPDITask:
+        """Add a task at the end or before the task with the given ID"""
+        row = len(self._rows) if Before is None else max(Before - 1, 0)
+        row = min(row, len(self._rows))
+        # Like in MS Project the new task is on the level of the task above
+        level = max(self._level(row - 1), 1) if row > 0 else 1
+        task = self._insert(row, self._create_element(Name, level))
+        self._rows.insert(row, task)
+        self._by_unique_id[task.UniqueID] = task
+        self._renumber(row)
+        return task
+
+    def _insert(self, row: int, element: ET.Element) -> MSPDITask:
+        """
+        Add the task element to the file, before the given row
+
+        Searching the position of the row is linear, so the elements are only
+        ordered once on save, see :meth:`update_order`.
+        """
+        if row < len(self._rows):
+            self._unordered = True
+        self._element.append(element)
+        return MSPDITask(self, element)
+
+    def _renumber(self, row: int) -> None:
+        """Mark the IDs of all tasks starting from the given row as outdated"""
+        if self._stale_row is None or row < self._stale_row:
+            self._stale_row = row
+
+    def update_ids(self) -> None:
+        """Update the outdated IDs at once for all tasks added since the last time"""
+        if (row := self._stale_row) is not None:
+            self._stale_row = None
+            self._write_ids(row)
+
+    def _write_ids(self, row: int) -> None:
+        for nr in range(row, len(self._rows)):
+            self._rows[nr]._set("ID", str(nr + 1))
+
+    def update_order(self) -> None:
+        """Order the task elements in the file like the rows"""
+        if self._unordered:
+            self._unordered = False
+            rows = {id(task.element) for task in self._rows}
+            others = [element for element in self._element if id(element) not in rows]
+            self._element[:] = others + [task.element for task in self._rows]
+
+    def update_summary_flags(self) -> None:
+        """Set the summary flags of all tasks according to the outline"""
+        for task in self._rows:
+            task._set("Summary", format_bool(task.Summary))
+
+
+class MSPDIProject:
+    """A MSPDI file loaded into memory, accessible like a COM project"""
+
+    def __init__(self, path: Path, read_only: bool = False):
+        self.FullName = str(path)
+        self.ReadOnly = read_only
+        self._path = path
+        self._tree = ET.parse(path)
+        self._root = self._tree.getroot()
+        if self._root.tag != f"{NS}Project":
+            raise ValueError(f"'{path}' is not a MS Project XML file")
+        if (tasks := self._root.find(f"{NS}Tasks")) is None:
+            tasks = ET.SubElement(self._root, f"{NS}Tasks")
+        self.Tasks = MSPDITasks(self, tasks)
+
+    @property
+    def Name(self) -> str:
+        return self._path.name
+
+    @property
+    def Path(self) -> str:
+        return str(self._path.parent)
+
+    @property
+    def start_date(self) -> datetime:
+        start = parse_datetime(self._root.findtext(f"{NS}StartDate"))
+        if isinstance(start, datetime):
+            return start
+        return datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+
+    def define_extended_attribute(self, field_id: int, field_name: str) -> None:
+        """Make sure the extended attribute (i.e. Text30) is defined in the project"""
+        if (definitions := self._root.find(f"{NS}ExtendedAttributes")) is None:
+            definitions = ET.Element(f"{NS}ExtendedAttributes")
+            for nr, element in enumerate(self._root):
+                if element.tag[len(NS) :] in _BEFORE_EXTENDED_ATTRIBUTES:
+                    self._root.insert(nr, definitions)
+                    break
+            else:
+                self._root.append(definitions)
+        for definition in definitions.iterfind(f"{NS}ExtendedAttribute"):
+            if definition.findtext(f"{NS}FieldID") == str(field_id):
+                return
+        definition = ET.SubElement(definitions, f"{NS}ExtendedAttribute")
+        ET.SubElement(definition, f"{NS}FieldID").text = str(field_id)
+        ET.SubElement(definition, f"{NS}FieldName").text = field_name
+
+    def save(self) -> None:
+        if self.ReadOnly:
+            raise MSProjectValueSetError(f"'{self._path}' was opened read only")
+        self.Tasks.update_ids()
+        self.Tasks.update_order()
+        self.Tasks.update_summary_flags()
+        self._tree.write(self._path, encoding="UTF-8", xml_declaration=True)
+
+
+class MSPDIApplication:
+    """
+    Stand-in for the MS Project application working on MSPDI files
+
+    Args:
+        project_class: used to open the files, i.e. to stream large files
+    """
+
+    def __init__(
+        self, project_class: Callable[[Path, bool], MSPDIProject] = MSPDIProject
+    ) -> None:
+        self._project_class = project_class
+        self.Name: str = "MSPDI"
+        self.Projects: List[MSPDIProject] = []
+        self.ActiveProject: Optional[MSPDIProject] = None
+        # Settings that have no effect as no scheduling is done
+        self.ScreenUpdating: bool = True
+        self.Calculation: int = PjCalculation.pjAutomatic.value
+        self.UndoLevels: int = 20
+
+    def FileOpen(self, Name: str, ReadOnly: bool = False) -> bool:
+        path = Path(Name).absolute()
+        for project in self.Projects:
+            if project.FullName == str(path):
+                self.ActiveProject = project
+                return True
+        project = self._project_class(path, ReadOnly)
+        self.Projects.append(project)
+        self.ActiveProject = project
+        return True
+
+    def FileSave(self) -> bool:
+        if self.ActiveProject is not None:
+            self.ActiveProject.save()
+        return True
+
+    def FileClose(self, Save: int = 0, NoAuto: bool = True) -> None:
+        if (project := self.ActiveProject) is None:
+            return
+        if Save == 1:
+            project.save()
+        self.Projects.remove(project)
+        self.ActiveProject = self.Projects[-1] if self.Projects else None
+
+    def Quit(self, SaveChanges: int = 0) -> None:
+        while self.ActiveProject is not None:
+            self.FileClose(SaveChanges)
+
+    def CalculateProject(self) -> None:
+        """Nothing to calculate, MS Project does it when opening the file"""
+
+    def OpenUndoTransaction(self, Label: str) -> None:
+        """There is no undo stack for files"""
+
+    def CloseUndoTransaction(self) -> None:
+        """There is no undo stack for files"""
+
+    def UndoClear(self) -> None:
+        """There is no undo stack for files"""
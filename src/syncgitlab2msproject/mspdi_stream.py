@@ -0,0 +1,524 @@
+"""
+Stream MS Project XML (MSPDI) files that are too large to be held in memory
+
+Instead of building the whole document like :mod:`.mspdi`, the file is scanned
+once and only the fields needed by the sync are kept for every task, together
+with the position of the task in the file. All other fields are read from the
+file when they are accessed. Changed tasks are held in memory until the file is
+saved, where they are patched into a copy of the file. Everything else is copied
+unchanged, so the file is never serialised as a whole.
+"""
+
+import os
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime
+from logging import getLogger
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import IO, Any, Dict, Iterable, List, Optional, Set, Tuple
+from xml.parsers import expat
+
+from .exceptions import InvalidFieldError, MSProjectValueSetError
+from .ms_project import TEXT_FIELD_IDS
+from .mspdi import (
+    _BEFORE_EXTENDED_ATTRIBUTES,
+    CONVERTERS,
+    NAMESPACE,
+    NS,
+    TASK_FIELDS,
+    MSPDIProject,
+    MSPDITask,
+    MSPDITasks,
+    format_bool,
+    parse_datetime,
+)
+
+logger = getLogger(f"{__package__}.{__name__}")
+
+# Size of the blocks the file is read and copied in
+CHUNK_SIZE = 64 * 1024
+
+# Maximal length of the end tag of a task (including whitespace)
+MAX_END_TAG_LENGTH = 256
+
+# Fields extracted for every task, other fields are read from the file on access.
+# All fields loaded to plan a sync besides the notes, which can be large.
+STREAM_FIELDS: Tuple[str, ...] = (
+    "Name",
+    "Text28",
+    "Text29",
+    "Text30",
+    "HyperlinkAddress",
+    "Hyperlink",
+    "Work",
+    "Duration",
+    "ActualWork",
+    "ActualFinish",
+    "Deadline",
+    "Estimated",
+    "PercentComplete",
+    "Type",
+    "EffortDriven",
+)
+
+# Fields that are always extracted as they define the structure of the plan
+STRUCTURE_FIELDS: Dict[str, Tuple[str, str]] = {
+    "ID": ("ID", "int"),
+    "UniqueID": ("UID", "int"),
+    "IsNull": ("IsNull", "bool"),
+    "OutlineLevel": ("OutlineLevel", "int"),
+    "Summary": ("Summary", "bool"),
+}
+
+_TEXT_FIELD_NAMES = {str(field_id): name for name, field_id in TEXT_FIELD_IDS.items()}
+_ID_PATTERN = re.compile(rb"<ID>\s*-?\d+\s*</ID>")
+
+
+def to_bytes(element: ET.Element) -> bytes:
+    """Serialise an element to be placed within the project element of the file"""
+    text = ET.tostring(element, encoding="unicode")
+    return text.replace(f' xmlns="{NAMESPACE}"', "", 1).encode("utf-8")
+
+
+def from_bytes(data: bytes) -> ET.Element:
+    """Parse an element cut out of the project element of the file"""
+    return ET.fromstring(
+        b'<Project xmlns="%s">%s</Project>' % (NAMESPACE.encode(), data)
+    )[0]
+
+
+def copy_range(source: IO[bytes], target: IO[bytes], start: int, end: int) -> None:
+    """Copy the bytes from `start` up to `end`"""
+    source.seek(start)
+    remaining = end - start
+    while remaining > 0 and (chunk := source.read(min(CHUNK_SIZE, remaining))):
+        target.write(chunk)
+        remaining -= len(chunk)
+
+
+def copy_rest(source: IO[bytes], target: IO[bytes], start: int) -> None:
+    """Copy everything from `start` to the end of the file"""
+    source.seek(start)
+    while chunk := source.read(CHUNK_SIZE):
+        target.write(chunk)
+
+
+@dataclass
+class TaskRecord:
+    """Position and the raw values of the extracted fields of a task in the file"""
+
+    start: int
+    # position of the end tag, the end of the task is only known when reading it
+    end_tag: int
+    values: Dict[str, str] = field(default_factory=dict)
+
+
+class MSPDIScanner:
+    """
+    Scan a MSPDI file and extract the values of some task fields
+
+    The file is parsed in blocks by expat, keeping only the extracted values and
+    the byte positions of the tasks and the extended attribute definitions.
+    ElementTree's ``iterparse`` uses the same parser but does not give these
+    positions, which are needed to patch the file later.
+    """
+
+    def __init__(self, tags: Iterable[str], text_field_ids: Iterable[int]):
+        self.tasks: List[TaskRecord] = []
+        self.root: Optional[str] = None
+        self.start_date: Optional[str] = None
+        self.defined_field_ids: Set[int] = set()
+        # position of the end tag of the extended attribute definitions
+        self.extended_attributes_end: Optional[int] = None
+        # position of the first element the definitions have to be placed before
+        self.extended_attributes_before: Optional[int] = None
+        self._tags = set(tags)
+        self._text_field_ids = {str(field_id) for field_id in text_field_ids}
+        self._path: List[str] = []
+        self._text: Optional[List[str]] = None
+        self._record: Optional[TaskRecord] = None
+        self._attribute: Dict[str, str] = {}
+        self._parser = expat.ParserCreate(namespace_separator="}")
+        self._parser.buffer_text = True
+        self._parser.XmlDeclHandler = self._declaration
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        self._parser.CharacterDataHandler = self._data
+
+    def parse(self, path: Path) -> "MSPDIScanner":
+        with open(path, "rb") as file:
+            while chunk := file.read(CHUNK_SIZE):
+                self._parser.Parse(chunk, False)
+            self._parser.Parse(b"", True)
+        return self
+
+    def _declaration(self, version: str, encoding: Optional[str], standalone: int):
+        if encoding is not None and encoding.lower().replace("-", "") != "utf8":
+            raise ValueError(
+                f"Only UTF-8 encoded files can be streamed, not {encoding}"
+            )
+
+    def _collect_text(self) -> bool:
+        path = self._path
+        depth = len(path)
+        if depth < 2:
+            return False
+        if depth == 2:
+            return path[1] == "StartDate"
+        if path[1] == "ExtendedAttributes":
+            return depth == 4 and path[3] == "FieldID"
+        if self._record is None:
+            return False
+        if depth == 4:
+            return path[3] in self._tags
+        return depth == 5 and path[3] == "ExtendedAttribute"
+
+    def _start(self, name: str, attributes: Dict[str, str]) -> None:
+        tag = name.rpartition("}")[2]
+        self._path.append(tag)
+        depth = len(self._path)
+        position = self._parser.CurrentByteIndex
+        if depth == 1:
+            self.root = tag
+        elif depth == 2:
+            if (
+                tag in _BEFORE_EXTENDED_ATTRIBUTES
+                and self.extended_attributes_before is None
+            ):
+                self.extended_attributes_before = position
+        elif depth == 3 and self._path[1] == "Tasks" and tag == "Task":
+            self._record = TaskRecord(position, position)
+        self._text = [] if self._collect_text() else None
+
+    def _data(self, data: str) -> None:
+        if self._text is not None:
+            self._text.append(data)
+
+    def _end(self, name: str) -> None:
+        path = self._path
+        depth = len(path)
+        tag = path[-1]
+        text = None if self._text is None else "".join(self._text)
+        self._text = None
+        record = self._record
+        if depth == 2 and tag == "StartDate":
+            self.start_date = text
+        elif depth == 2 and tag == "ExtendedAttributes":
+            self.extended_attributes_end = self._parser.CurrentByteIndex
+        elif depth == 4 and path[1] == "ExtendedAttributes" and text is not None:
+            self.defined_field_ids.add(int(text))
+        elif record is not None:
+            if depth == 3:
+                record.end_tag = self._parser.CurrentByteIndex
+                self.tasks.append(record)
+                self._record = None
+            elif depth == 4 and tag == "ExtendedAttribute":
+                field_id = self._attribute.get("FieldID", "").strip()
+                if field_id in self._text_field_ids:
+                    name = _TEXT_FIELD_NAMES[field_id]
+                    record.values[name] = self._attribute.get("Value", "")
+                self._attribute = {}
+            elif depth == 4 and text is not None:
+                record.values[tag] = text
+            elif depth == 5 and text is not None:
+                self._attribute[tag] = text
+        path.pop()
+
+
+class MSPDIStreamTask(MSPDITask):
+    """
+    A task of a streamed MSPDI file
+
+    Only the extracted fields are held in memory, all other fields are read from
+    the file on access. Once a field is changed, the whole task is held until the
+    file is saved.
+    """
+
+    __slots__ = ("_values", "_span", "_file_id", "_changed")
+
+    def __init__(
+        self,
+        tasks: "MSPDIStreamTasks",
+        values: Dict[str, Any],
+        span: Optional[Tuple[int, int]] = None,
+        changed: Optional[ET.Element] = None,
+    ):
+        object.__setattr__(self, "_tasks", tasks)
+        object.__setattr__(self, "_changed", changed)
+        self.load(values, span)
+
+    def load(self, values: Dict[str, Any], span: Optional[Tuple[int, int]]) -> None:
+        """Set the extracted values and the position of the task in the file"""
+        object.__setattr__(self, "_values", values)
+        object.__setattr__(self, "_span", span)
+        object.__setattr__(self, "_file_id", values["ID"] if span else None)
+        if span is not None:
+            object.__setattr__(self, "_changed", None)
+
+    @property  # type: ignore[override]
+    def element(self) -> ET.Element:
+        if self._changed is not None:
+            return self._changed
+        return self._tasks.read_element(self)
+
+    @property
+    def span(self) -> Optional[Tuple[int, int]]:
+        """Start and end tag position of the task in the file, None if new"""
+        return self._span
+
+    @property
+    def changed(self) -> bool:
+        """True if the task has to be written on save"""
+        return self._changed is not None
+
+    @property
+    def moved(self) -> bool:
+        """True if the ID of the task differs from the one in the file"""
+        return self._values["ID"] != self._file_id
+
+    @property
+    def is_null(self) -> bool:
+        return bool(self._values["IsNull"])
+
+    def _hold(self) -> None:
+        if self._changed is None:
+            object.__setattr__(self, "_changed", self._tasks.read_element(self))
+
+    def _set(self, tag: str, text: Optional[str]) -> None:
+        self._hold()
+        super()._set(tag, text)
+
+    def _set_extended(self, field_id: int, field_name: str, value: Any) -> None:
+        self._hold()
+        super()._set_extended(field_id, field_name, value)
+
+    def read_field(self, name: str) -> Any:
+        """Read the field from the task element, also if it was extracted"""
+        if name in STRUCTURE_FIELDS:
+            tag, kind = STRUCTURE_FIELDS[name]
+            return CONVERTERS[kind][0](self._get(tag))
+        return super().__getattr__(name)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in self._values:
+            return self._values[name]
+        return super().__getattr__(name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in self._values:
+            self._values[name] = self.read_field(name)
+
+
+class MSPDIStreamTasks(MSPDITasks):
+    """The tasks of a streamed MSPDI file"""
+
+    project: "MSPDIStreamProject"
+
+    def __init__(self, project: "MSPDIStreamProject", records: List[TaskRecord]):
+        self.project = project
+        self._rows: List[MSPDITask] = []
+        self._by_unique_id: Dict[int, MSPDITask] = {}
+        # The last task read from the file, as fields are often read in a row
+        self._cached: Optional[Tuple[MSPDIStreamTask, ET.Element]] = None
+        self.update(records)
+
+    def update(self, records: List[TaskRecord]) -> None:
+        """Take over the tasks of a scan of the file, keeping the task objects"""
+        self._cached = None
+        rows = []
+        for record in records:
+            values = self.project.convert(record.values)
+            span = (record.start, record.end_tag)
+            task = self._by_unique_id.get(values["UniqueID"])
+            if isinstance(task, MSPDIStreamTask):
+                task.load(values, span)
+            else:
+                task = MSPDIStreamTask(self, values, span)
+                self._by_unique_id[task.UniqueID] = task
+            # ID 0 is the project summary task that is not part of the collection
+            if task.ID > 0:
+                rows.append(task)
+        self._rows = sorted(rows, key=lambda row: row.ID)
+
+    def read_bytes(self, task: MSPDIStreamTask, source: IO[bytes]) -> bytes:
+        """Read the task as it is stored in the file"""
+        if task.span is None:
+            raise ValueError(f"The task {task.UniqueID} is not stored in the file")
+        start, end_tag = task.span
+        source.seek(start)
+        data = source.read(end_tag - start + MAX_END_TAG_LENGTH)
+        return data[: data.index(b">", end_tag - start) + 1]
+
+    def read_element(self, task: MSPDIStreamTask) -> ET.Element:
+        if self._cached is None or self._cached[0] is not task:
+            with open(self.project.FullName, "rb") as source:
+                self._cached = (task, from_bytes(self.read_bytes(task, source)))
+        return self._cached[1]
+
+    def to_bytes(self, task: MSPDIStreamTask, source: IO[bytes]) -> bytes:
+        """Give the task as it has to be written to the file"""
+        if task.changed:
+            MSPDITask._set(task, "ID", str(task.ID))
+            return to_bytes(task.element)
+        data = self.read_bytes(task, source)
+        if task.moved:
+            data = _ID_PATTERN.sub(b"<ID>%d</ID>" % task.ID, data, count=1)
+        return data
+
+    def all_tasks(self) -> List[MSPDIStreamTask]:
+        """All tasks including the project summary task, ordered by ID"""
+        tasks = [task for task in self._by_unique_id.values() if task.ID == 0]
+        return tasks + self._rows  # type: ignore
+
+    def _insert(self, row: int, element: ET.Element) -> MSPDITask:
+        task = MSPDIStreamTask(self, {}, changed=element)
+        task.load({name: task.read_field(name) for name in self.project.fields}, None)
+        return task
+
+    def _write_ids(self, row: int) -> None:
+        for nr in range(row, len(self._rows)):
+            self._rows[nr]._values["ID"] = nr + 1  # type: ignore
+
+    def update_summary_flags(self) -> None:
+        """Set the summary flags of the tasks where it changed"""
+        for task in self._rows:
+            summary = task.Summary
+            if summary != task._values["Summary"]:  # type: ignore
+                task._set("Summary", format_bool(summary))
+                task._values["Summary"] = summary  # type: ignore
+
+
+class MSPDIStreamProject(MSPDIProject):
+    """
+    A MSPDI file accessed with bounded memory, accessible like a COM project
+
+    Args:
+        path: the MSPDI file
+        read_only: don't allow saving the file
+        fields: the task fields to extract, all others are read when accessed
+    """
+
+    Tasks: MSPDIStreamTasks
+
+    def __init__(
+        self, path: Path, read_only: bool = False, fields: Iterable[str] = STREAM_FIELDS
+    ):
+        self.FullName = str(path)
+        self.ReadOnly = read_only
+        self._path = path
+        self._kinds: Dict[str, Tuple[str, str]] = dict(STRUCTURE_FIELDS)
+        for name in fields:
+            if name in TEXT_FIELD_IDS:
+                self._kinds[name] = (name, "text")
+            elif name in TASK_FIELDS:
+                self._kinds[name] = TASK_FIELDS[name]
+            else:
+                raise InvalidFieldError(f"The field '{name}' can't be streamed")
+        self._new_definitions: Dict[int, str] = {}
+        self.Tasks = MSPDIStreamTasks(self, self._scan())
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        """Names of the extracted task fields"""
+        return tuple(self._kinds)
+
+    def _scan(self) -> List[TaskRecord]:
+        """Scan the file, keeping the positions needed for saving"""
+        tags = [tag for tag, kind in self._kinds.values() if tag not in TEXT_FIELD_IDS]
+        text_field_ids = [
+            TEXT_FIELD_IDS[name] for name in TEXT_FIELD_IDS if name in self._kinds
+        ]
+        scan = MSPDIScanner(tags, text_field_ids).parse(self._path)
+        if scan.root != "Project":
+            raise ValueError(f"'{self._path}' is not a MS Project XML file")
+        if not scan.tasks:
+            raise ValueError(f"'{self._path}' has no tasks and can't be streamed")
+        # The records are converted by the tasks, so don't keep them twice
+        records, scan.tasks = scan.tasks, []
+        self._scanned = scan
+        return records
+
+    def convert(self, raw: Dict[str, str]) -> Dict[str, Any]:
+        """Convert the raw values of a scanned task"""
+        values = {}
+        for name, (tag, kind) in self._kinds.items():
+            values[name] = CONVERTERS[kind][0](raw.get(tag))
+        return values
+
+    @property
+    def start_date(self) -> datetime:
+        start = parse_datetime(self._scanned.start_date)
+        if isinstance(start, datetime):
+            return start
+        return datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+
+    def define_extended_attribute(self, field_id: int, field_name: str) -> None:
+        if field_id not in self._scanned.defined_field_ids:
+            self._new_definitions[field_id] = field_name
+
+    def _definitions(self) -> bytes:
+        data = b""
+        for field_id, field_name in self._new_definitions.items():
+            definition = ET.Element(f"{NS}ExtendedAttribute")
+            ET.SubElement(definition, f"{NS}FieldID").text = str(field_id)
+            ET.SubElement(definition, f"{NS}FieldName").text = field_name
+            data += to_bytes(definition)
+        return data
+
+    def _write(self, source: IO[bytes], target: IO[bytes]) -> None:
+        scan = self._scanned
+        tasks = self.Tasks
+        stored = sorted(
+            (task for task in tasks.all_tasks() if task.span is not None),
+            key=lambda task: task.span[0],  # type: ignore
+        )
+        first, last = stored[0], stored[-1]
+        assert first.span is not None and last.span is not None
+        first_end = first.span[0] + len(tasks.read_bytes(first, source))
+        last_end = last.span[0] + len(tasks.read_bytes(last, source))
+        separator = b"\n"
+        if len(stored) > 1:
+            assert stored[1].span is not None
+            source.seek(first_end)
+            separator = source.read(stored[1].span[0] - first_end)
+
+        position = 0
+        if self._new_definitions:
+            if scan.extended_attributes_end is not None:
+                position = scan.extended_attributes_end
+                definitions = self._definitions()
+            else:
+                assert scan.extended_attributes_before is not None
+                position = scan.extended_attributes_before
+                definitions = (
+                    b"<ExtendedAttributes>%s</ExtendedAttributes>" % self._definitions()
+                )
+            copy_range(source, target, 0, position)
+            target.write(definitions)
+        copy_range(source, target, position, first.span[0])
+        for nr, task in enumerate(tasks.all_tasks()):
+            if nr:
+                target.write(separator)
+            target.write(tasks.to_bytes(task, source))
+        copy_rest(source, target, last_end)
+
+    def save(self) -> None:
+        if self.ReadOnly:
+            raise MSProjectValueSetError(f"'{self._path}' was opened read only")
+        self.Tasks.update_ids()
+        self.Tasks.update_summary_flags()
+        with open(self._path, "rb") as source, NamedTemporaryFile(
+            "wb", dir=self._path.parent, prefix=f".{self._path.name}.", delete=False
+        ) as target:
+            try:
+                self._write(source, target)
+            except BaseException:
+                target.close()
+                os.remove(target.name)
+                raise
+        os.replace(target.name, self._path)
+        self._new_definitions = {}
+        self.Tasks.update(self._scan())
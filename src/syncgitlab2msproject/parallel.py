@@ -0,0 +1,176 @@
+"""
+Sync independent project files in parallel worker processes
+
+Every worker process owns its applications (an :class:`.ApplicationPool`), so
+the files are opened with separate backend instances. The issues are loaded
+once by the calling process and handed to the workers with the jobs.
+
+As MS Project serves all COM clients with a single running instance, only
+files of the file based backends can be synced in parallel, see
+:data:`PARALLEL_BACKENDS`.
+"""
+
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+from os import PathLike, getpid
+from time import perf_counter
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional
+
+from .application import ApplicationPool
+from .custom_types import ComMSProjectApplication
+from .gitlab_issues import Issue
+from .ms_project import Backend, get_backend_for_file
+from .targets import SyncTarget
+
+# Backends whose files can be synced by several processes at once
+PARALLEL_BACKENDS = frozenset({Backend.mspdi, Backend.mspdi_stream})
+
+# The applications of the worker process, set by the initializer
+_worker_applications: Optional[ApplicationPool] = None
+
+
+def can_sync_in_parallel(
+    project_file: PathLike, backend: Optional[Backend] = None
+) -> bool:
+    """
+    Check if the file can be synced by a worker while other files are synced
+
+    Args:
+        project_file: the file to sync
+        backend: the backend to use, by default depending on the file
+    """
+    if backend is None:
+        backend = get_backend_for_file(project_file)
+    return backend in PARALLEL_BACKENDS
+
+
+class SyncJob(NamedTuple):
+    """Sync the issues into the project file of the target"""
+
+    target: SyncTarget
+    issues: List[Issue]
+
+
+class SyncResult(NamedTuple):
+    """Outcome of a :class:`SyncJob`"""
+
+    target: SyncTarget
+    # Formatted exception if the sync failed
+    error: Optional[str]
+    seconds: float
+    # Process the job was run in
+    pid: int
+    # Returned by the sync, None if it failed
+    value: Any = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _init_worker(
+    factory: Optional[Callable[[], ComMSProjectApplication]],
+    initializer: Optional[Callable[[], Any]],
+    quit_on_close: bool,
+) -> None:
+    global _worker_applications
+    try:
+        import pythoncom
+    except ImportError:
+        pass
+    else:
+        # Every worker is its own COM apartment
+        pythoncom.CoInitialize()
+    if initializer is not None:
+        initializer()
+    _worker_applications = ApplicationPool(
+        attach=False, quit_on_close=quit_on_close, factory=factory
+    )
+    # Close the applications when the worker is shut down
+    Finalize(_worker_applications, _worker_applications.close, exitpriority=10)
+
+
+def _run_job(sync: Callable[..., Any], job: SyncJob) -> SyncResult:
+    assert _worker_applications is not None, "Worker was not initialised"
+    start = perf_counter()
+    error = value = None
+    try:
+        value = sync(
+            job.target.project_file, job.issues, applications=_worker_applications
+        )
+    except Exception:
+        error = traceback.format_exc()
+    return SyncResult(job.target, error, perf_counter() - start, getpid(), value)
+
+
+class ParallelSync:
+    """
+    Pool of worker processes syncing independent project files
+
+    Args:
+        workers: maximal number of jobs run at the same time
+        factory: create the applications of the workers with this, i.e. a fake
+                 in tests. Has to be picklable.
+        initializer: called in every worker when started, i.e. to set up logging.
+                     Has to be picklable.
+        quit_on_close: quit the applications started by the workers when they are
+                       shut down
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        factory: Optional[Callable[[], ComMSProjectApplication]] = None,
+        initializer: Optional[Callable[[], Any]] = None,
+        quit_on_close: bool = True,
+    ):
+        if workers < 1:
+            raise ValueError(f"At least one worker is required, not {workers}")
+        self.workers: int = workers
+        self._executor = ProcessPoolExecutor(
+            workers,
+            initializer=_init_worker,
+            initargs=(factory, initializer, quit_on_close),
+        )
+
+    def __enter__(self) -> "ParallelSync":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def run(
+        self,
+        sync: Callable[..., Any],
+        jobs: Iterable[SyncJob],
+        backend: Optional[Backend] = None,
+    ) -> List[SyncResult]:
+        """
+        Run the jobs in the workers and give their results in the order of the jobs
+
+        Args:
+            sync: called for every job with the project file, the issues and the
+                  application pool of the worker as ``applications`` keyword.
+                  Has to be picklable, i.e. a partial of a module function, like
+                  its return value given as :attr:`SyncResult.value`.
+            jobs: the jobs to run, the project files have to be different
+            backend: the backend the files are synced with, by default depending
+                     on the file. Has to be one of the :data:`PARALLEL_BACKENDS`.
+        """
+        jobs = list(jobs)
+        project_files = [job.target.project_file for job in jobs]
+        if len(set(project_files)) != len(project_files):
+            raise ValueError("A project file can't be synced by several jobs at once")
+        for project_file in project_files:
+            if not can_sync_in_parallel(project_file, backend):
+                raise ValueError(
+                    f"'{project_file}' can't be synced in parallel, as MS Project "
+                    "serves all COM clients with a single instance"
+                )
+        futures = [self._executor.submit(_run_job, sync, job) for job in jobs]
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        """Wait for the running jobs and shut the workers down"""
+        self._executor.shutdown()
@@ -1,6 +1,16 @@
-import win32com.universal
 from logging import getLogger
-from typing import Callable, Dict, List, Optional, Type, overload
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    overload,
+)
 
 from syncgitlab2msproject.custom_types import WebURL
 from syncgitlab2msproject.helper_classes import TaskTyperSetter
@@ -11,15 +21,28 @@ from .exceptions import (
     MovedIssueNotDefined,
     MSProjectValueSetError,
 )
-from .gitlab_issues import Issue
-from .ms_project import MSProject, Task
+from .gitlab_issues import GroupBy, Issue, IssueGroup
+from .ms_project import (
+    DEFAULT_SNAPSHOT_FIELDS,
+    FieldIdentifier,
+    MSProject,
+    PlannedTask,
+    Task,
+    com_error,
+    resolve_field,
+)
 
 logger = getLogger(f"{__package__}.{__name__}")
 
 GL_PREFIX = "!!DO NOT CHANGE!! Gitlab:"
+# Prefix of the reference of summary tasks standing for an epic or milestone
+GL_GROUP_PREFIX = "!!DO NOT CHANGE!! Gitlab-"
 
 DEFAULT_DURATION = 8 * 60
 
+# Task field the reference to the gitlab issue is stored in
+DEFAULT_REFERENCE_FIELD = "Text30"
+
 
 def get_issue_ref_id(issue: Issue) -> IssueRef:
     """
@@ -37,42 +60,116 @@ def get_issue_web_url(issue: Issue) -> WebURL:
     return WebURL(issue.web_url)
 
 
-def set_issue_ref_to_task(task: Task, issue: Issue) -> None:
-    """set reference to gitlab issues in MS Project task"""
-    task.text30 = (
-        f"{GL_PREFIX}{issue.id};{issue.group_id};{issue.project_id};{issue.iid}"
+def set_issue_ref_to_task(
+    task: Task,
+    issue: Issue,
+    field: FieldIdentifier = DEFAULT_REFERENCE_FIELD,
+    with_fingerprint: bool = True,
+) -> None:
+    """
+    set reference to gitlab issues in MS Project task
+
+    The reference is followed by the fingerprint of the issue (see
+    `Issue.fingerprint`), unless `with_fingerprint` is False.
+    """
+    fingerprint = f";{issue.fingerprint}" if with_fingerprint else ""
+    task.set_fields(
+        {
+            field: f"{GL_PREFIX}{issue.id};{issue.group_id};"
+            f"{issue.project_id};{issue.iid}{fingerprint}"
+        }
     )
 
 
-def get_issue_ref_from_task(task: Optional[Task]) -> Optional[IssueRef]:
-    """get reference to gitlab issues from MS Project task"""
-    if task is not None and task.text30 and task.text30.startswith(GL_PREFIX):
-        values = task.text30[len(GL_PREFIX) :].split(";")
+def get_issue_ref_from_text(value: Optional[str]) -> Optional[IssueRef]:
+    """get reference to gitlab issues from the text field value of a task"""
+    if value and value.startswith(GL_PREFIX):
+        values = value[len(GL_PREFIX) :].split(";")
         return IssueRef(int(values[0]))
     return None
 
 
+def get_fingerprint_from_text(value: Optional[str]) -> Optional[str]:
+    """get the fingerprint of the synced issue from the text field value of a task"""
+    if value and value.startswith(GL_PREFIX):
+        values = value[len(GL_PREFIX) :].split(";")
+        if len(values) > 4 and values[4]:
+            return values[4]
+    return None
+
+
+def get_issue_ref_from_task(
+    task: Optional[Task],
+    values: Optional[Dict[str, Any]] = None,
+    field: FieldIdentifier = DEFAULT_REFERENCE_FIELD,
+) -> Optional[IssueRef]:
+    """
+    get reference to gitlab issues from MS Project task
+
+    If the already loaded `values` of the task (see `MSProject.snapshot`) are given
+    they are used instead of reading from the task.
+    """
+    if values is not None:
+        return get_issue_ref_from_text(values[resolve_field(field)])
+    if task is not None:
+        return get_issue_ref_from_text(task.get_fields([field])[field])
+    return None
+
+
+def get_group_ref(group: IssueGroup) -> Tuple[GroupBy, int]:
+    """Give the key the summary task of an epic or milestone is found with"""
+    return group.kind, group.id
+
+
+def get_group_ref_text(group: IssueGroup) -> str:
+    """Give the reference stored in the summary task of an epic or milestone"""
+    return f"{GL_GROUP_PREFIX}{group.kind.value}:{group.id}"
+
+
+def get_group_ref_from_text(value: Optional[str]) -> Optional[Tuple[GroupBy, int]]:
+    """get reference to an epic or milestone from the text field value of a task"""
+    if value and value.startswith(GL_GROUP_PREFIX):
+        kind, _, group_id = value[len(GL_GROUP_PREFIX) :].partition(":")
+        try:
+            return GroupBy(kind), int(group_id)
+        except ValueError:
+            logger.warning(f"Ignoring invalid epic or milestone reference '{value}'")
+    return None
+
+
 def is_gitlab_hyperlink(url: WebURL, gitlab_url: WebURL) -> bool:
     return url.startswith(gitlab_url)
 
 
-def get_weburl_from_task(task: Optional[Task], gitlab_url: WebURL) -> Optional[WebURL]:
+def get_gitlab_weburl(value: Optional[str], gitlab_url: WebURL) -> Optional[WebURL]:
+    """Give the value as weburl if it is pointing to the gitlab instance"""
+    if value is not None:
+        check_url = WebURL(value)
+        if is_gitlab_hyperlink(check_url, gitlab_url):
+            return check_url
+    return None
+
+
+def get_weburl_from_task(
+    task: Optional[Task],
+    gitlab_url: WebURL,
+    values: Optional[Dict[str, Any]] = None,
+) -> Optional[WebURL]:
     """
     Get the weburl from MS Project Task (is saved as hyperlink)
-    """
-
-    def check_get_url(value: Optional[str]) -> Optional[WebURL]:
-        if value is not None:
-            check_url = WebURL(value)
-            if is_gitlab_hyperlink(check_url, gitlab_url):
-                return check_url
-        return None
 
+    If the already loaded `values` of the task (see `MSProject.snapshot`) are given
+    they are used instead of reading from the task.
+    """
+    if values is not None:
+        if (url := get_gitlab_weburl(values["HyperlinkAddress"], gitlab_url)) is None:
+            url = get_gitlab_weburl(values["Text29"], gitlab_url)
+        return url
     if task is not None:
-        if (url := check_get_url(task.hyperlink_address)) is not None:
+        if (url := get_gitlab_weburl(task.hyperlink_address, gitlab_url)) is not None:
             return url
         # If not as hyperlink we also look in task.text29 field
-        if (url := check_get_url(task.text29)) is not None:
+        if (url := get_gitlab_weburl(task.text29, gitlab_url)) is not None:
             return url
     return None
 
@@ -85,12 +182,19 @@ def update_task_with_issue_data(
     parent_ids: Optional[List[IssueRef]] = None,
     ignore_issue: bool = False,
     is_add: bool = False,
+    reference_field: FieldIdentifier = DEFAULT_REFERENCE_FIELD,
+    skip_unchanged: bool = True,
 ) -> List[IssueRef]:
     """
     Update task with issue data
 
     if an issue is moved the date of the new issue is used as long it is available
 
+    The fingerprint of the issue is stored with the reference. If it still matches
+    the issue, the task is skipped entirely as the sync would not change it. The
+    reference is written last and only contains the fingerprint if all other
+    values could be written, so a failed sync is repeated the next time.
+
     Args:
         task: The MS Project task that will be updated
         issue: the issue with the data to be considered
@@ -99,37 +203,48 @@ def update_task_with_issue_data(
         ignore_issue: only return the related (and moved) ids but do not really sync
                       This is required so we can ignored also moved issues correctly
         is_add:
+        reference_field: the task field the reference to the issue is stored in
+        skip_unchanged: skip the task if the stored fingerprint matches the issue,
+                        set to False to also undo changes done in MS Project
 
     Returns:
-        list of IssueRefs that
+        list of IssueRefs of the issue and the issues it was moved to
     """
     if parent_ids is None:
         parent_ids = [get_issue_ref_id(issue)]
     else:
         parent_ids += [get_issue_ref_id(issue)]
 
-    if (moved_ref := issue.moved_reference) is not None:
-        assert moved_ref is not None
+    # Follow the moved issues, the IssueFinder links them to the final target
+    while issue.moved_to_id is not None:
         try:
-            return update_task_with_issue_data(
-                task,
-                moved_ref,
-                task_type_setter,
-                parent_ids=parent_ids,
-                ignore_issue=ignore_issue,
-            )
+            moved_ref = issue.moved_reference
         except MovedIssueNotDefined:
             logger.warning(
                 f"Issue {issue} was moved outside of context."
                 f" Ignoring the issue. Please update the task {task} manually!"
             )
-    elif not ignore_issue:
-        set_issue_ref_to_task(task, issue)
+            return parent_ids
+        assert moved_ref is not None
+        if (moved_ref_id := get_issue_ref_id(moved_ref)) in parent_ids:
+            logger.warning(
+                f"Issue {issue} was moved in a cycle."
+                f" Ignoring the issue. Please update the task {task} manually!"
+            )
+            return parent_ids
+        parent_ids.append(moved_ref_id)
+        issue = moved_ref
+
+    if not ignore_issue:
+        if skip_unchanged and not is_add:
+            reference = task.get_fields([reference_field])[reference_field]
+            if get_fingerprint_from_text(reference) == issue.fingerprint:
+                logger.debug(f"Skipping {task} as issue {issue} did not change")
+                return parent_ids
         try:
             type_setter = task_type_setter(issue)
             type_setter.set_task_type_before_sync(task, is_add)
-            task.name = issue.title
-            task.notes = issue.description
+            task.set_fields({"name": issue.title, "notes": issue.description})
             if issue.due_date is not None:
                 task.deadline = issue.due_date
             if not task.has_children:
@@ -143,38 +258,153 @@ def update_task_with_issue_data(
                 task.actual_work = time_spend
             if issue.has_tasks or task.percent_complete == 0:
                 task.percent_complete = issue.percentage_tasks_done
-            task.hyperlink_name = "Open in Gitlab"
-            task.hyperlink_address = issue.web_url
-            task.text29 = issue.web_url
-            task.text28 = "; ".join([f'"{label}"' for label in issue.labels])
+            task.set_fields(
+                {
+                    "hyperlink_name": "Open in Gitlab",
+                    "hyperlink_address": issue.web_url,
+                    "text29": issue.web_url,
+                    "text28": "; ".join([f'"{label}"' for label in issue.labels]),
+                }
+            )
             if issue.is_closed:
                 task.actual_finish = issue.closed_at
             type_setter.set_task_type_after_sync(task)
-        except (MSProjectValueSetError, win32com.universal.com_error) as e:
+            # Buffered values might only fail when written
+            task.flush()
+        except (MSProjectValueSetError, com_error) as e:
             logger.error(
                 f"FATAL: Could not sync issue {issue} to task {task}.\nError: {e}"
             )
+            task.write_failed = True
+            synced = False
         else:
-            logger.info(f"Synced issue {issue} to task {task}")
+            if synced := not task.write_failed:
+                logger.info(f"Synced issue {issue} to task {task}")
+            else:
+                logger.error(f"Could not sync all values of issue {issue} to {task}")
+        # Without fingerprint the task is not skipped the next time
+        set_issue_ref_to_task(task, issue, reference_field, with_fingerprint=synced)
     return parent_ids
 
 
+def add_group_tasks_to_project(
+    tasks: MSProject,
+    groups: List[IssueGroup],
+    group_tasks: Dict[Tuple[GroupBy, int], Task],
+    reference_field: FieldIdentifier = DEFAULT_REFERENCE_FIELD,
+) -> None:
+    """
+    Add summary tasks for the epics or milestones at the end of the project
+
+    Args:
+        tasks: the project to add the tasks to
+        groups: the epics or milestones without summary task
+        group_tasks: the added tasks are stored here by :func:`get_group_ref`
+        reference_field: the task field the reference to the group is stored in
+    """
+    if not groups:
+        return
+    new_tasks = tasks.add_tasks(
+        [group.title for group in groups],
+        outline_level=1,
+        fields=[{reference_field: get_group_ref_text(group)} for group in groups],
+    )
+    for task, group in zip(new_tasks, groups):
+        logger.info(f"Created summary task {task} for {group.kind.value} {group.id}")
+        group_tasks[get_group_ref(group)] = task
+
+
+def add_issues_as_tasks_to_project(
+    tasks: MSProject,
+    issues: List[Issue],
+    task_type_setter: Type[TaskTyperSetter],
+    reference_field: FieldIdentifier = DEFAULT_REFERENCE_FIELD,
+    group_tasks: Optional[Dict[Tuple[GroupBy, int], Task]] = None,
+) -> List[Task]:
+    """
+    Add tasks for all issues at once and sync them afterwards
+
+    If `group_tasks` are given, issues with a group (see `Issue.group`) are added
+    as children of the summary task of their epic or milestone, as one block per
+    group. Missing summary tasks are added first. All other issues are added at
+    the end of the project on the top level.
+
+    Args:
+        tasks: the project to add the tasks to
+        issues: the issues to add tasks for
+        task_type_setter: Helper class to set the task type correct
+        reference_field: the task field the reference to the issue is stored in
+        group_tasks: the summary tasks of the epics or milestones by
+                     :func:`get_group_ref`, added ones are stored here as well.
+                     If None the issues are not grouped.
+
+    Returns:
+        the created tasks, ordered like `issues`
+    """
+    if not issues:
+        return []
+    # Positions of the issues in `issues` by their group, to add them in blocks
+    grouped: Dict[Optional[IssueGroup], List[int]] = {}
+    for nr, issue in enumerate(issues):
+        group = issue.group if group_tasks is not None else None
+        grouped.setdefault(group, []).append(nr)
+    added: Dict[int, Task] = {}
+    if group_tasks is not None:
+        missing = [
+            group
+            for group in grouped
+            if group is not None and get_group_ref(group) not in group_tasks
+        ]
+        add_group_tasks_to_project(tasks, missing, group_tasks, reference_field)
+    for group, numbers in grouped.items():
+        names = [issues[nr].title for nr in numbers]
+        if group is not None:
+            assert group_tasks is not None
+            group_task = group_tasks[get_group_ref(group)]
+            new_tasks = tasks.add_tasks(names, parent=group_task)
+        else:
+            # Don't let them become children of the last summary task
+            outline_level = None if group_tasks is None else 1
+            new_tasks = tasks.add_tasks(names, outline_level=outline_level)
+        added.update(zip(numbers, new_tasks))
+    new_tasks = [added[nr] for nr in range(len(issues))]
+    for task, issue in zip(new_tasks, issues):
+        logger.info(f"Created {task} as it was missing for issue, now syncing it.")
+        update_task_with_issue_data(
+            task, issue, task_type_setter, is_add=True, reference_field=reference_field
+        )
+        if tasks.reference_index is not None:
+            tasks.reference_index.add(
+                task.unique_id, get_issue_ref_id(issue), get_issue_web_url(issue)
+            )
+    return new_tasks
+
+
 def add_issue_as_task_to_project(
-    tasks: MSProject, issue: Issue, task_type_setter: Type[TaskTyperSetter]
+    tasks: MSProject,
+    issue: Issue,
+    task_type_setter: Type[TaskTyperSetter],
+    reference_field: FieldIdentifier = DEFAULT_REFERENCE_FIELD,
 ):
-    task = tasks.add_task(issue.title)
-    logger.info(f"Created {task} as it was missing for issue, now syncing it.")
-    # Add a setting to allow forcing outline level on new tasks
-    # task.outline_level = 1
-    update_task_with_issue_data(task, issue, task_type_setter, is_add=True)
+    add_issues_as_tasks_to_project(tasks, [issue], task_type_setter, reference_field)
 
 
 class IssueFinder:
+    """
+    Find the issues by reference ID or web url
+
+    Moved issues are resolved to the issue they were finally moved to when the
+    finder is created and linked to it directly (see `Issue.moved_reference`), so
+    no chain has to be followed later on.
+    """
+
     def __init__(self, issues: List[Issue]):
         # Create Dictionary of all IDs to find moved ones and relate existing
         self.ref_id_to_issue: Dict[IssueRef, Issue] = {}
         # We also try to sync according to the weburl but only in a second step
         self.web_url_to_issue: Dict[WebURL, Issue] = {}
+        # Final target of every moved issue, None if it can't be tracked
+        self._moved_targets: Dict[IssueRef, Optional[Issue]] = {}
         for issue in issues:
             """Set up all references to locate later on"""
             ref_id = get_issue_ref_id(issue)
@@ -194,16 +424,60 @@ class IssueFinder:
                     f"share the same Web URL"
                 )
             self.web_url_to_issue[web_url] = issue
+        self._resolve_moved()
+
+    def _resolve_moved(self) -> None:
+        """
+        Resolve every moved issue to the issue it was finally moved to
+
+        Each chain is only walked until an issue with an already known target,
+        all issues on the way get that target as well.
+        """
+        for start in self.ref_id_to_issue.values():
+            path: List[IssueRef] = []
+            on_path: Set[IssueRef] = set()
+            issue: Optional[Issue] = start
+            target: Optional[Issue] = None
+            while issue is not None:
+                ref_id = get_issue_ref_id(issue)
+                if ref_id in self._moved_targets:
+                    target = self._moved_targets[ref_id]
+                    break
+                if issue.moved_to_id is None:
+                    target = issue
+                    break
+                if ref_id in on_path:
+                    logger.warning(
+                        f"The issues {path} were moved in a cycle, "
+                        f"their tasks are not synced."
+                    )
+                    break
+                path.append(ref_id)
+                on_path.add(ref_id)
+                issue = self.ref_id_to_issue.get(IssueRef(issue.moved_to_id))
+            for ref_id in path:
+                self._moved_targets[ref_id] = target
+                if target is not None:
+                    self.ref_id_to_issue[ref_id].moved_reference = target
+
+    def moved_target(self, issue: Issue) -> Optional[Issue]:
+        """
+        Give the issue the given one was finally moved to, itself if not moved
+
+        None is given if the issue was moved outside of the loaded issues or in a
+        cycle, so it can't be tracked.
+        """
+        if issue.moved_to_id is None:
+            return issue
+        return self._moved_targets.get(get_issue_ref_id(issue))
 
     # Overload to make mypy aware of the fact that only None is given
     # once the id is none
     @overload
-    def by_ref_id(self, ref_id: IssueRef) -> Issue:
-        ...
+    def by_ref_id(self, ref_id: IssueRef) -> Issue: ...
 
     @overload
-    def by_ref_id(self, ref_id: None) -> None:
-        ...
+    def by_ref_id(self, ref_id: None) -> None: ...
 
     def by_ref_id(self, ref_id: Optional[IssueRef]) -> Optional[Issue]:
         """
@@ -215,6 +489,10 @@ class IssueFinder:
             return None
         return self.ref_id_to_issue[ref_id]
 
+    def knows_any(self, ref_id: Optional[IssueRef], web_url: Optional[WebURL]) -> bool:
+        """Check if the issue of the reference ID or of the web url is known"""
+        return ref_id in self.ref_id_to_issue or web_url in self.web_url_to_issue
+
     def by_web_url(self, web_url: Optional[WebURL]) -> Optional[Issue]:
         """
         Give related issue if weburl is set and the issue is found,
@@ -227,10 +505,50 @@ class IssueFinder:
 
 
 def find_related_issue(
-    task: Task, find_issue: IssueFinder, gitlab_url: WebURL
+    task: Task,
+    find_issue: IssueFinder,
+    gitlab_url: WebURL,
+    values: Optional[Dict[str, Any]] = None,
+    reference_field: FieldIdentifier = DEFAULT_REFERENCE_FIELD,
+) -> Optional[Issue]:
+    """
+    Find the issue the task is referring to
+
+    Args:
+        task: MS Project task to find the issue for
+        find_issue: finder containing all issues
+        gitlab_url: the gitlab instance url, only web urls pointing there are used
+        values: already loaded values of the task (see `MSProject.snapshot`),
+                if given the task itself is not read
+        reference_field: the task field the reference to the issue is stored in
+    """
+    try:
+        ref_id = get_issue_ref_from_task(task, values, reference_field)
+        if (issue := find_issue.by_ref_id(ref_id)) is not None:
+            return issue
+    except KeyError as key:
+        logger.warning(
+            f"Task {task} refers to Issue with ID {key} which was not found in ."
+            f"the issues loaded from gitlab --> Ignored this reference"
+        )
+    return find_issue_by_references(
+        task, find_issue, None, get_weburl_from_task(task, gitlab_url, values)
+    )
+
+
+def find_issue_by_references(
+    task: Task,
+    find_issue: IssueFinder,
+    ref_id: Optional[IssueRef],
+    web_url: Optional[WebURL],
 ) -> Optional[Issue]:
+    """
+    Find the issue by the already extracted references of the task
+
+    The reference ID is preferred, the web url is only used as fallback.
+    """
     try:
-        if (issue := find_issue.by_ref_id(get_issue_ref_from_task(task))) is not None:
+        if (issue := find_issue.by_ref_id(ref_id)) is not None:
             return issue
     except KeyError as key:
         logger.warning(
@@ -238,9 +556,7 @@ def find_related_issue(
             f"the issues loaded from gitlab --> Ignored this reference"
         )
     try:
-        if (
-            issue := find_issue.by_web_url(get_weburl_from_task(task, gitlab_url))
-        ) is not None:
+        if (issue := find_issue.by_web_url(web_url)) is not None:
             return issue
     except KeyError as key:
         logger.warning(
@@ -250,20 +566,160 @@ def find_related_issue(
     return None
 
 
-def sync_gitlab_issues_to_ms_project(
+def find_group_tasks(
+    tasks: MSProject, unique_ids: List[int], references: List[Optional[str]]
+) -> Dict[Tuple[GroupBy, int], Task]:
+    """
+    Give the summary tasks of epics and milestones by :func:`get_group_ref`
+
+    Args:
+        tasks: the project of the tasks
+        unique_ids: UniqueIDs of the tasks
+        references: values of the reference field, ordered like `unique_ids`
+    """
+    group_tasks: Dict[Tuple[GroupBy, int], Task] = {}
+    for unique_id, reference in zip(unique_ids, references):
+        if (group_ref := get_group_ref_from_text(reference)) is not None:
+            group_tasks.setdefault(group_ref, Task(tasks, unique_id))
+    return group_tasks
+
+
+class TaskUpdate(NamedTuple):
+    """The changes of an existing task"""
+
+    task: Task
+    # The issue the values are taken from, None for summary tasks of groups
+    issue: Optional[Issue]
+    # Loaded and new value by COM field name
+    changes: Dict[str, Tuple[Any, Any]]
+
+
+class SyncPlan:
+    """
+    Everything a sync would change in a project, see :func:`plan_sync`
+
+    Only :attr:`updates` and :attr:`to_add` change the project, the other lists
+    are informational.
+    """
+
+    def __init__(self, tasks: MSProject):
+        self.tasks: MSProject = tasks
+        # Existing tasks with changed fields
+        self.updates: List[TaskUpdate] = []
+        # Tasks referring to an issue, that are already up to date
+        self.unchanged: List[Task] = []
+        # Issues tasks have to be added for
+        self.to_add: List[Issue] = []
+        # Tasks referring to moved issues, they are synced with the new issue
+        self.moved: List[Tuple[Task, Issue]] = []
+        # Tasks referring to ignored issues, they are not synced
+        self.ignored: List[Tuple[Task, Issue]] = []
+        # Tasks not referring to an issue
+        self.unmatched: List[Task] = []
+        # Tasks referring to the same issue as a previous task, they are not synced
+        self.duplicates: List[Task] = []
+        # Tasks added for `to_add` by :func:`apply_plan`, ordered like them
+        self.added: List[Task] = []
+        # Summary tasks of the epics or milestones, None if not grouped
+        self.group_tasks: Optional[Dict[Tuple[GroupBy, int], Task]] = None
+
+    def __repr__(self):
+        return f"<SyncPlan({len(self.updates)} updates, {len(self.to_add)} to add)>"
+
+    @property
+    def is_empty(self) -> bool:
+        """True if applying the plan would not change anything"""
+        return not self.updates and not self.to_add
+
+    def failed_issues(self) -> List[Issue]:
+        """
+        Give the issues whose tasks could not be synced completely
+
+        Only known once the plan has been applied and all values were written.
+        """
+        synced: List[Tuple[Task, Issue]] = [
+            (update.task, update.issue)
+            for update in self.updates
+            if update.issue is not None
+        ]
+        synced += zip(self.added, self.to_add)
+        return [issue for task, issue in synced if task.write_failed]
+
+    def report(self) -> str:
+        """Describe the plan in a human readable way"""
+        lines = [
+            f"Sync plan for {self.tasks!r}: {len(self.updates)} tasks to update, "
+            f"{len(self.to_add)} to add, {len(self.unchanged)} unchanged, "
+            f"{len(self.moved)} moved, {len(self.ignored)} ignored, "
+            f"{len(self.unmatched)} without issue, {len(self.duplicates)} duplicates"
+        ]
+        for update in self.updates:
+            lines.append(f"Update {update.task}:")
+            lines += [
+                f"    {field}: {old!r} -> {new!r}"
+                for field, (old, new) in update.changes.items()
+            ]
+        lines += [f"Add task for issue {issue}" for issue in self.to_add]
+        lines += [f"Task {task} refers to moved {issue}" for task, issue in self.moved]
+        lines += [
+            f"Task {task} refers to ignored {issue}" for task, issue in self.ignored
+        ]
+        lines += [
+            f"Task {task} refers to the issue of a previous task"
+            for task in self.duplicates
+        ]
+        return "\n".join(lines)
+
+
+# COM fields of the tasks loaded to plan a sync, the notes can be large and are
+# only read for the tasks they are set for
+PLAN_SNAPSHOT_FIELDS = DEFAULT_SNAPSHOT_FIELDS + (
+    "Name",
+    "Deadline",
+    "Estimated",
+    "ActualWork",
+    "ActualFinish",
+    "Hyperlink",
+)
+
+# Fields that might be changed by MS Project depending on the task type
+SCHEDULE_FIELDS = ("Work", "Duration", "ActualWork", "PercentComplete", "Type")
+
+
+def plan_group_renames(
+    plan: SyncPlan, issues: List[Issue], values: Dict[int, Dict[str, Any]]
+) -> None:
+    """Plan to rename the summary tasks of epics and milestones to their title"""
+    assert plan.group_tasks is not None
+    groups = {issue.group for issue in issues if issue.group is not None}
+    for group in groups:
+        if (task := plan.group_tasks.get(get_group_ref(group))) is not None:
+            planned = PlannedTask(plan.tasks, task.unique_id, values[task.unique_id])
+            planned.name = group.title
+            if changes := planned.changes:
+                plan.updates.append(TaskUpdate(task, None, changes))
+
+
+def plan_sync(
     tasks: MSProject,
     issues: List[Issue],
     gitlab_url: WebURL,
     task_type_setter: Type[TaskTyperSetter],
     include_issue: Optional[Callable[[Issue], bool]] = None,
-) -> None:
+    reference_field: FieldIdentifier = DEFAULT_REFERENCE_FIELD,
+    group_by: GroupBy = GroupBy.none,
+    partial: bool = False,
+    skip_unchanged: bool = True,
+) -> SyncPlan:
     """
+    Find out what a sync would change without changing anything
+
+    All task fields are loaded in a single pass and the sync of each task is
+    done against the loaded values, see :class:`PlannedTask`. Values MS Project
+    calculates itself after a change are not known to the plan.
 
     Args:
-        tasks: MS Project Tasks that will be synchronized
-        issues:  List of Gitlab Issues
-        gitlab_url: the gitlab istance url to check url found in MS project against
-        include_issue: Include issue in sync, if None include everything
+        see :func:`sync_gitlab_issues_to_ms_project`
     """
     if include_issue is None:
 
@@ -272,33 +728,63 @@ def sync_gitlab_issues_to_ms_project(
 
         include_issue = always_true
 
+    plan = SyncPlan(tasks)
     ref_issue: Optional[Issue]
-    # Keep track of already synced issues
-    synced: List[IssueRef] = []
+    # Keep track of already synced issues, a set as it is checked for every issue
+    synced: Set[IssueRef] = set()
 
     # create finder
     find_issue = IssueFinder(issues)
 
-    # Find moved issues and reference them
-    non_moved: List[IssueRef] = []
-    for issue in issues:
-        if (ref_int_id := issue.moved_to_id) is not None:
-            if (ref_issue := find_issue.by_ref_id(IssueRef(ref_int_id))) is not None:
-                issue.moved_reference = ref_issue
-        else:
-            non_moved.append(get_issue_ref_id(issue))
+    # Moved issues are linked to their target by the finder and never added
+    non_moved = [
+        get_issue_ref_id(issue) for issue in issues if issue.moved_to_id is None
+    ]
 
     # get existing references and update them
-    for task in tasks:
-        if task is None:
+    # all values required for matching and syncing are loaded at once, empty rows
+    # are skipped
+    reference_com_field = resolve_field(reference_field)
+    snapshot_fields = PLAN_SNAPSHOT_FIELDS + (reference_com_field,)
+    snapshot = tasks.snapshot(snapshot_fields)
+    index = tasks.build_reference_index(
+        lambda values: (
+            get_issue_ref_from_task(None, values, reference_field),
+            get_weburl_from_task(None, gitlab_url, values),
+        ),
+        snapshot,
+    )
+    # The structure is only read once, has_children is asked for every task
+    tasks.build_outline(snapshot)
+    # Only the first task referring to an issue is synced
+    duplicates: Set[int] = set()
+    for reference, unique_ids in index.duplicates.items():
+        logger.warning(
+            f"The tasks with the UniqueIDs {unique_ids} all refer to {reference}, "
+            f"only the first one is synced."
+        )
+        duplicates.update(unique_ids[1:])
+    values_by_unique_id: Dict[int, Dict[str, Any]] = {}
+    for task, values in snapshot:
+        unique_id = values["UniqueID"]
+        values_by_unique_id[unique_id] = values
+        references = index.references(unique_id)
+        if partial and not find_issue.knows_any(*references):
+            if references != (None, None):
+                # The issue of the task is not given as it did not change
+                plan.unchanged.append(task)
+                continue
+        if unique_id in duplicates:
+            plan.duplicates.append(task)
             continue
-        ref_issue = find_related_issue(task, find_issue, gitlab_url)
+        ref_issue = find_issue_by_references(task, find_issue, *references)
 
         if ref_issue is None:
             logger.info(
                 f"Not Syncing {task} as a not reference "
                 f"to an gitlab issue could be found"
             )
+            plan.unmatched.append(task)
         else:
             ignore_issue = False
             if not include_issue(ref_issue):
@@ -307,14 +793,35 @@ def sync_gitlab_issues_to_ms_project(
                     f"has been marked to be ignored"
                 )
                 ignore_issue = True
+                plan.ignored.append((task, ref_issue))
             else:
-                logger.info(f"Syncing {ref_issue} into {task}")
+                logger.info(f"Planning sync of {ref_issue} into {task}")
+            if ref_issue.moved_to_id is not None:
+                plan.moved.append((task, ref_issue))
             # We want to not have the ignored task popping up in issues that need to be
             # added and we also want make sure that moved ignored issues are handled
             # correctly
-            synced += update_task_with_issue_data(
-                task, ref_issue, task_type_setter, ignore_issue=ignore_issue
+            planned = PlannedTask(tasks, unique_id, values)
+            synced.update(
+                update_task_with_issue_data(
+                    planned,
+                    ref_issue,
+                    task_type_setter,
+                    ignore_issue=ignore_issue,
+                    reference_field=reference_field,
+                    skip_unchanged=skip_unchanged,
+                )
             )
+            if changes := planned.changes:
+                plan.updates.append(TaskUpdate(task, ref_issue, changes))
+            elif not ignore_issue:
+                plan.unchanged.append(task)
+
+    if group_by is not GroupBy.none:
+        plan.group_tasks = find_group_tasks(
+            tasks, snapshot.unique_ids, snapshot.column(reference_com_field)
+        )
+        plan_group_renames(plan, issues, values_by_unique_id)
 
     # adding everything that was not synced and is not duplicate
     for ref_id in non_moved:
@@ -326,4 +833,118 @@ def sync_gitlab_issues_to_ms_project(
                         f"as it has been marked to be ignored."
                     )
                 else:
-                    add_issue_as_task_to_project(tasks, ref_issue, task_type_setter)
+                    plan.to_add.append(ref_issue)
+    return plan
+
+
+def apply_task_update(
+    update: TaskUpdate,
+    task_type_setter: Type[TaskTyperSetter],
+    reference_field: FieldIdentifier = DEFAULT_REFERENCE_FIELD,
+) -> None:
+    """
+    Write the planned changes of the task
+
+    If values that depend on the task type are changed, the task type is set by
+    `task_type_setter` around the changes like in a direct sync. The reference is
+    written last. If the changes can't be written, the fingerprint is removed from
+    the reference so the task is synced again the next time.
+    """
+    task = update.task
+    changes = {field: new for field, (_, new) in update.changes.items()}
+    reference_com_field = resolve_field(reference_field)
+    reference = changes.pop(reference_com_field, None)
+    try:
+        if update.issue is None or not any(f in changes for f in SCHEDULE_FIELDS):
+            task.set_com_values(changes)
+        else:
+            type_setter = task_type_setter(update.issue)
+            type_setter.set_task_type_before_sync(task, False)
+            # The type is set by the setter
+            changes.pop("Type", None)
+            changes.pop("EffortDriven", None)
+            task.set_com_values(changes)
+            type_setter.set_task_type_after_sync(task)
+        # Buffered values might only fail when written
+        task.flush()
+    except (MSProjectValueSetError, com_error) as e:
+        logger.error(f"FATAL: Could not update task {task}.\nError: {e}")
+        task.write_failed = True
+        synced = False
+    else:
+        if synced := not task.write_failed:
+            logger.info(f"Updated {task}")
+        else:
+            logger.error(f"Could not write all changes of {task}")
+    if not synced and update.issue is not None:
+        set_issue_ref_to_task(
+            task, update.issue, reference_field, with_fingerprint=False
+        )
+    elif reference is not None:
+        task.set_com_values({reference_com_field: reference})
+
+
+def apply_plan(
+    plan: SyncPlan,
+    task_type_setter: Type[TaskTyperSetter],
+    reference_field: FieldIdentifier = DEFAULT_REFERENCE_FIELD,
+) -> None:
+    """
+    Execute the plan: update the changed tasks and add the missing ones
+
+    Args:
+        plan: created by :func:`plan_sync`
+        task_type_setter: Helper class to set the task type correct
+        reference_field: the task field the reference to the issue is stored in
+    """
+    for update in plan.updates:
+        apply_task_update(update, task_type_setter, reference_field)
+    plan.added = add_issues_as_tasks_to_project(
+        plan.tasks, plan.to_add, task_type_setter, reference_field, plan.group_tasks
+    )
+
+
+def sync_gitlab_issues_to_ms_project(
+    tasks: MSProject,
+    issues: List[Issue],
+    gitlab_url: WebURL,
+    task_type_setter: Type[TaskTyperSetter],
+    include_issue: Optional[Callable[[Issue], bool]] = None,
+    reference_field: FieldIdentifier = DEFAULT_REFERENCE_FIELD,
+    group_by: GroupBy = GroupBy.none,
+    partial: bool = False,
+    skip_unchanged: bool = True,
+) -> SyncPlan:
+    """
+    Plan the sync and apply the plan, see :func:`plan_sync` and :func:`apply_plan`
+
+    Args:
+        tasks: MS Project Tasks that will be synchronized
+        issues:  List of Gitlab Issues
+        gitlab_url: the gitlab istance url to check url found in MS project against
+        include_issue: Include issue in sync, if None include everything
+        reference_field: the task field the reference to the issue is stored in
+        group_by: add new issues as children of a summary task of their epic or
+                  milestone (has to be assigned to `Issue.group`, see
+                  `IssueGroups`). Existing tasks are not moved.
+        partial: only the issues changed since the last sync are given, tasks
+                 referring to other issues are left alone without warning
+        skip_unchanged: skip tasks whose stored fingerprint matches their issue,
+                        see :func:`update_task_with_issue_data`
+
+    Returns:
+        the applied plan
+    """
+    plan = plan_sync(
+        tasks,
+        issues,
+        gitlab_url,
+        task_type_setter,
+        include_issue,
+        reference_field,
+        group_by,
+        partial,
+        skip_unchanged,
+    )
+    apply_plan(plan, task_type_setter, reference_field)
+    return plan
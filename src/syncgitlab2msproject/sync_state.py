@@ -0,0 +1,148 @@
+"""
+Remember what was synced to sync only changed issues the next time
+
+For every target (gitlab resource and project file) a state file is kept next to
+the project file. It records when the last successful sync started and the
+fingerprint (see :attr:`.Issue.fingerprint`) of every synced issue. The next
+sync only fetches the issues updated since then and skips the ones whose synced
+fields did not change. Issues that could not be synced completely are not
+recorded, so they are synced again. Changes done to the tasks in the project
+itself are not noticed, a full resync brings them back in line.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Dict, Iterable, List, Optional
+
+from .gitlab_issues import Issue
+from .targets import SyncTarget
+
+logger = getLogger(f"{__package__}.{__name__}")
+
+STATE_VERSION = 1
+
+# Issues updated shortly before the last sync are fetched again, in case the
+# clocks of gitlab and this machine differ. Unchanged ones are skipped anyway.
+UPDATED_AFTER_MARGIN = timedelta(minutes=5)
+
+
+def get_state_path(target: SyncTarget) -> Path:
+    """Give the state file of the target, next to the project file"""
+    project_file = target.project_file
+    resource = target.resource
+    return project_file.with_name(
+        f".{project_file.name}.{resource.type}-{resource.id}.sync-state.json"
+    )
+
+
+class SyncState:
+    """
+    The state of the last successful sync of a target
+
+    Args:
+        path: the file the state is stored in
+        synced_at: when the last successful sync started, None if never synced
+        fingerprints: fingerprints of the synced issues by issue id
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        synced_at: Optional[datetime] = None,
+        fingerprints: Optional[Dict[int, str]] = None,
+    ):
+        self.path: Path = path
+        self.synced_at: Optional[datetime] = synced_at
+        self.fingerprints: Dict[int, str] = {} if fingerprints is None else fingerprints
+
+    def __repr__(self):
+        return f"<SyncState('{self.path}', {self.synced_at})>"
+
+    @classmethod
+    def load(cls, path: Path) -> "SyncState":
+        """
+        Load the state from the file
+
+        A missing or invalid file gives an empty state, so everything is synced.
+        """
+        try:
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+            if data["version"] != STATE_VERSION:
+                raise ValueError(f"Unknown version {data['version']}")
+            return cls(
+                path,
+                datetime.fromisoformat(data["synced_at"]),
+                {int(issue_id): value for issue_id, value in data["issues"].items()},
+            )
+        except FileNotFoundError:
+            return cls(path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring invalid sync state '{path}': {e}")
+            return cls(path)
+
+    def save(self) -> None:
+        """Write the state, replacing the file only once it is complete"""
+        if self.synced_at is None:
+            raise ValueError("Only the state of a sync can be saved")
+        data = {
+            "version": STATE_VERSION,
+            "synced_at": self.synced_at.isoformat(),
+            "issues": {
+                str(issue_id): value for issue_id, value in self.fingerprints.items()
+            },
+        }
+        with NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=self.path.parent,
+            prefix=f"{self.path.name}.",
+            delete=False,
+        ) as file:
+            json.dump(data, file)
+        os.replace(file.name, self.path)
+
+    @property
+    def updated_after(self) -> Optional[datetime]:
+        """Only issues updated after this have to be fetched, None for all"""
+        if self.synced_at is None:
+            return None
+        return self.synced_at - UPDATED_AFTER_MARGIN
+
+    def changed(self, issues: Iterable[Issue]) -> List[Issue]:
+        """Give the issues whose synced fields changed since the last sync"""
+        return [
+            issue
+            for issue in issues
+            if self.fingerprints.get(issue.id) != issue.fingerprint
+        ]
+
+    def update(
+        self,
+        issues: Iterable[Issue],
+        synced_at: datetime,
+        failed: Iterable[Issue] = (),
+    ) -> None:
+        """
+        Record the sync of the issues, started at `synced_at`
+
+        The fingerprints of the `failed` issues are dropped and the time of the
+        sync is kept, so they are fetched and synced again the next time.
+        """
+        failed_ids = {issue.id for issue in failed}
+        for issue in issues:
+            if issue.id in failed_ids:
+                self.fingerprints.pop(issue.id, None)
+            else:
+                self.fingerprints[issue.id] = issue.fingerprint
+        if not failed_ids:
+            self.synced_at = synced_at
+
+
+def now() -> datetime:
+    """The current time with time zone, as stored in the state"""
+    return datetime.now(timezone.utc)
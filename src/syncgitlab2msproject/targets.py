@@ -0,0 +1,66 @@
+"""
+Targets of a sync: which gitlab resource is synced into which project file
+"""
+
+from pathlib import Path
+from typing import List, NamedTuple
+
+from .gitlab_issues import GitlabResource
+
+RESOURCE_TYPES = ("project", "group")
+
+
+class SyncTarget(NamedTuple):
+    """Sync the issues of the gitlab resource into the project file"""
+
+    resource: GitlabResource
+    project_file: Path
+
+
+def parse_target(line: str, base_dir: Path = Path(".")) -> SyncTarget:
+    """
+    Parse a target given as resource type, resource id and project file
+
+    Args:
+        line: i.e. ``group 42 plans/Project A.mpp``, the file may contain spaces
+        base_dir: relative project files are relative to this directory
+
+    Raises:
+        ValueError: if the target is not valid
+    """
+    try:
+        resource_type, resource_id, project_file = line.split(maxsplit=2)
+    except ValueError:
+        raise ValueError(
+            f"'{line}' is not a valid target, expected a resource type, "
+            "a resource id and a project file"
+        )
+    if resource_type not in RESOURCE_TYPES:
+        raise ValueError(f"Invalid resource type '{resource_type}' in '{line}'")
+    try:
+        resource = GitlabResource(resource_type, int(resource_id))
+    except ValueError:
+        raise ValueError(f"Invalid resource id '{resource_id}' in '{line}'")
+    return SyncTarget(resource, (base_dir / project_file.strip()).absolute())
+
+
+def read_targets(path: Path) -> List[SyncTarget]:
+    """
+    Read the targets from a file, one per line
+
+    Empty lines and lines starting with ``#`` are ignored. Relative project
+    files are relative to the directory of the file.
+
+    Raises:
+        ValueError: if a target is not valid
+    """
+    targets = []
+    with open(path, encoding="utf-8") as file:
+        for nr, line in enumerate(file, start=1):
+            if not (line := line.strip()) or line.startswith("#"):
+                continue
+            try:
+                targets.append(parse_target(line, path.parent))
+            except ValueError as e:
+                raise ValueError(f"{path}:{nr}: {e}")
+    return targets
@@ -1,10 +1,38 @@
 # -*- coding: utf-8 -*-
 """
-    Dummy conftest.py for syncgitlab2msproject.
-
-    If you don't know what this is for, just leave it empty.
-    Read more about conftest.py under:
-    https://pytest.org/latest/plugins.html
+Fixtures shared by the tests, neither gitlab nor MS Project are required
 """
 
-# import pytest
+import pytest
+
+import shutil
+from fake_issues import create_issue
+from pathlib import Path
+from typing import Callable
+
+from syncgitlab2msproject.gitlab_issues import Issue
+
+BASE_DIR = Path(__file__).absolute().parent
+TEST_FILE_NAME = "Project1.xml"
+
+
+@pytest.fixture
+def make_issue() -> Callable[..., Issue]:
+    """Factory to create issues without gitlab"""
+    return create_issue
+
+
+@pytest.fixture
+def make_project_file(tmp_path: Path) -> Callable[..., Path]:
+    """Factory to copy the test file with the given name, so it can be modified"""
+
+    def copy(name: str = TEST_FILE_NAME) -> Path:
+        return Path(shutil.copy(BASE_DIR / TEST_FILE_NAME, tmp_path / name))
+
+    return copy
+
+
+@pytest.fixture
+def project_file(make_project_file: Callable[..., Path]) -> Path:
+    """Copy of the test file, so it can be modified"""
+    return make_project_file()
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+Create gitlab issues without gitlab, for the tests
+"""
+
+from types import SimpleNamespace
+from typing import Any
+
+from syncgitlab2msproject.gitlab_issues import Issue
+
+
+def create_issue(issue_id: int, **kwargs: Any) -> Issue:
+    """Create an issue without gitlab, all attributes can be overwritten"""
+    values = dict(
+        id=issue_id,
+        iid=issue_id,
+        project_id=1,
+        group_id=1,
+        title=f"Issue {issue_id}",
+        description=f"Description of issue {issue_id}",
+        due_date=None,
+        closed_at=None,
+        closed_by=None,
+        state="opened",
+        moved_to_id=None,
+        has_tasks=False,
+        task_completion_status={"count": 0, "completed_count": 0},
+        time_stats={"time_estimate": 3600, "total_time_spent": 0},
+        labels=[],
+        assignees=[],
+        web_url=f"https://gitlab.com/group/project/-/issues/{issue_id}",
+    )
+    values.update(kwargs)
+    return Issue(SimpleNamespace(**values))  # type: ignore
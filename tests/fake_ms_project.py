@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+In-process fake of the MS Project COM server, only for the tests
+
+:class:`FakeMSProjectServer` offers an ``MSProject.Application`` that works on
+MS Project XML files using the in memory model of
+:mod:`syncgitlab2msproject.mspdi`, so
+:class:`~syncgitlab2msproject.ms_project.MSProject` and the whole sync can run
+without Windows. Every access to the application, its projects and tasks
+counts as a call to the COM server and can be delayed by a configurable latency,
+simulating the cost of calls into the MS Project process. As the calls are
+counted, the effect of saving COM calls can be measured deterministically::
+
+    server = FakeMSProjectServer(latency=0.001, sleep=False)
+    with MSProject("plan.xml", application=server.application) as tasks:
+        ...
+    print(server.calls, server.elapsed)
+"""
+
+import time
+from inspect import ismethod
+from typing import Any, Iterator
+
+from syncgitlab2msproject.ms_project import com_error
+from syncgitlab2msproject.mspdi import (
+    MSPDIApplication,
+    MSPDICollection,
+    MSPDIProject,
+    MSPDITask,
+    MSPDITasks,
+)
+
+# Objects that are COM objects for MS Project
+COM_TYPES = (
+    MSPDIApplication,
+    MSPDIProject,
+    MSPDITasks,
+    MSPDITask,
+    MSPDICollection,
+)
+
+
+class FakeMSProjectServer:
+    """
+    Fake MS Project COM server
+
+    Args:
+        latency: seconds every call to the server takes
+        sleep: really wait for the latency, otherwise it is only added up in
+               :attr:`elapsed`, which is deterministic and fast
+    """
+
+    def __init__(self, latency: float = 0.0, sleep: bool = True):
+        self.latency: float = latency
+        self.sleep: bool = sleep
+        self.calls: int = 0
+        self.elapsed: float = 0.0
+        self.crashed: bool = False
+        self.application: Any = FakeComObject(MSPDIApplication(), self)
+
+    def __repr__(self):
+        return f"<FakeMSProjectServer({self.calls} calls, {self.elapsed:.3f}s)>"
+
+    def call(self) -> None:
+        """Account a call to the server"""
+        if self.crashed:
+            raise com_error("The RPC server is unavailable.")
+        self.calls += 1
+        if self.latency > 0:
+            self.elapsed += self.latency
+            if self.sleep:
+                time.sleep(self.latency)
+
+    def crash(self) -> None:
+        """Simulate a crashed server, all following calls fail"""
+        self.crashed = True
+
+    def reset(self) -> None:
+        """Reset the call counter and the elapsed time"""
+        self.calls = 0
+        self.elapsed = 0.0
+
+    def wrap(self, value: Any) -> Any:
+        """Give COM objects only as proxies, so all accesses are calls"""
+        if isinstance(value, list):
+            # i.e. the projects, collections of COM are COM objects as well
+            value = MSPDICollection(value)
+        if isinstance(value, COM_TYPES) or ismethod(value):
+            return FakeComObject(value, self)
+        return value
+
+
+def create_fake_application(latency: float = 0.0, sleep: bool = True) -> Any:
+    """Give the application of a new fake server, i.e. as application factory"""
+    return FakeMSProjectServer(latency, sleep).application
+
+
+class FakeComObject:
+    """Proxy of a COM object of the fake server, every access is a call"""
+
+    __slots__ = ("_target", "_server")
+
+    def __init__(self, target: Any, server: FakeMSProjectServer):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_server", server)
+
+    def __repr__(self):
+        return f"<COMObject {self._target!r}>"
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._target, name)
+        # Looking up a method is done locally, only calling it is a call
+        if not ismethod(value):
+            self._server.call()
+        return self._server.wrap(value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        self._server.call()
+        if isinstance(value, FakeComObject):
+            value = value._target
+        setattr(self._target, name, value)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        self._server.call()
+        return self._server.wrap(self._target(*args, **kwargs))
+
+    def __len__(self) -> int:
+        # Like the collections of win32com, using the Count property
+        return self.Count
+
+    def __iter__(self) -> Iterator[Any]:
+        # Getting the enumerator is a call and so is every step
+        self._server.call()
+        for item in self._target:
+            self._server.call()
+            yield self._server.wrap(item)
+        self._server.call()
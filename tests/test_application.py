@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from fake_ms_project import FakeMSProjectServer
+from pathlib import Path
+from typing import List
+
+from syncgitlab2msproject.application import PersistentApplication
+from syncgitlab2msproject.ms_project import Backend
+
+
+@pytest.fixture
+def servers() -> List[FakeMSProjectServer]:
+    """All fake servers started by the application"""
+    return []
+
+
+@pytest.fixture
+def application(servers: List[FakeMSProjectServer]) -> PersistentApplication:
+    def start():
+        servers.append(FakeMSProjectServer())
+        return servers[-1].application
+
+    return PersistentApplication(Backend.mspdi, factory=start)
+
+
+def test_application_is_reused(
+    application: PersistentApplication, servers, project_file: Path
+):
+    for nr in range(3):
+        with application.session(project_file) as tasks:
+            tasks[0].name = f"Run {nr}"
+    assert len(servers) == 1
+    assert application.restarts == 0
+    with application.session(project_file) as tasks:
+        assert tasks[0].name == "Run 2"
+    # The file is closed after each session
+    assert application.application.Projects.Count == 0
+
+
+def test_application_is_restarted(
+    application: PersistentApplication, servers, project_file: Path
+):
+    with application.session(project_file) as tasks:
+        assert tasks[0].name == "Planning"
+    servers[0].crash()
+    assert not application.is_healthy()
+    with application.session(project_file) as tasks:
+        assert tasks[0].name == "Planning"
+    assert len(servers) == 2
+    assert application.restarts == 1
+    assert application.is_healthy()
+
+
+def test_application_is_closed(application: PersistentApplication, servers):
+    with application:
+        assert application.is_healthy() is False  # not started yet
+        application.application
+        assert application.is_healthy()
+    assert not application.is_healthy()
+    assert len(servers) == 1
+
+
+def test_application_is_kept(servers):
+    application = PersistentApplication(
+        Backend.mspdi,
+        quit_on_close=False,
+        factory=lambda: FakeMSProjectServer().application,
+    )
+    with application:
+        application.application
+    assert application.restarts == 0
+
+
+def test_open_projects_are_kept(
+    application: PersistentApplication, servers, project_file: Path, tmp_path: Path
+):
+    other_file = tmp_path / "other.xml"
+    other_file.write_bytes(project_file.read_bytes())
+    with application:
+        application.application.FileOpen(str(other_file))
+        with application.session(project_file) as tasks:
+            tasks[0].name = "Changed"
+    # Quitting would have closed the project opened by the user
+    assert servers[0].application.Projects.Count == 1
+
+
+def test_running_application_is_not_quit(monkeypatch, project_file: Path):
+    server = FakeMSProjectServer()
+    quits = []
+    server.application.Quit = lambda *args, **kwargs: quits.append(args)
+    # Starting MS Project over COM connects to the running one instead
+    monkeypatch.setattr(
+        "syncgitlab2msproject.application.attach_application",
+        lambda: server.application,
+    )
+    monkeypatch.setattr(
+        "syncgitlab2msproject.application.create_application",
+        lambda backend: server.application,
+    )
+    with PersistentApplication(Backend.com, attach=False) as application:
+        with application.session(project_file) as tasks:
+            tasks[0].name = "Changed"
+    assert quits == []
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from syncgitlab2msproject.cli import parse_args
+
+
+def parse_reference_field(field: str):
+    return parse_args(["--reference-field", field, "group", "1", "a.mpp"])
+
+
+@pytest.mark.parametrize("field", ["Text30", "text1", "188743731"])
+def test_reference_field(field: str):
+    args = parse_reference_field(field)
+    assert args.reference_field in ("Text30", "Text1")
+
+
+@pytest.mark.parametrize("field", ["name", "Notes", "duration", "Text31"])
+def test_reference_field_must_be_text(field: str, capsys):
+    with pytest.raises(SystemExit):
+        parse_reference_field(field)
+    assert "--reference-field" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("field", ["Text28", "text29"])
+def test_reference_field_not_used_by_sync(field: str, capsys):
+    with pytest.raises(SystemExit):
+        parse_reference_field(field)
+    assert "labels and web url" in capsys.readouterr().err
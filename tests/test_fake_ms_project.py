@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import importlib.util
+from fake_ms_project import FakeComObject, FakeMSProjectServer
+from pathlib import Path
+from types import SimpleNamespace
+
+from syncgitlab2msproject import ms_project
+from syncgitlab2msproject.com_stats import ComStats
+from syncgitlab2msproject.custom_types import WebURL
+from syncgitlab2msproject.exceptions import LoadingError
+from syncgitlab2msproject.helper_classes import SetTaskTypeConservative
+from syncgitlab2msproject.ms_project import MSProject, Task
+from syncgitlab2msproject.sync import sync_gitlab_issues_to_ms_project
+
+LATENCY = 0.001
+
+
+@pytest.fixture
+def server() -> FakeMSProjectServer:
+    return FakeMSProjectServer(latency=LATENCY, sleep=False)
+
+
+def test_calls_are_counted(project_file: Path, server: FakeMSProjectServer):
+    with MSProject(project_file, application=server.application) as tasks:
+        server.reset()
+        task = tasks[0]
+        assert isinstance(task._get_task(), FakeComObject)
+        # Tasks.Count to check the index, then Tasks(1)
+        assert server.calls == 4
+        assert task.name == "Planning"
+        assert server.calls == 5
+        assert server.elapsed == pytest.approx(5 * LATENCY)
+        task.name = "Changed"
+        assert server.calls == 6
+        assert len(task._get_task().OutlineChildren) == 2
+    # The application is not quit, so the file can be opened again
+    with MSProject(project_file, application=server.application) as tasks:
+        assert tasks[0].name == "Changed"
+
+
+def test_latency_is_waited_for(project_file: Path):
+    server = FakeMSProjectServer(latency=LATENCY)
+    with MSProject(project_file, application=server.application) as tasks:
+        assert tasks[0].name == "Planning"
+    assert server.elapsed == pytest.approx(server.calls * LATENCY)
+
+
+def test_loading_unknown_file(tmp_path: Path, server: FakeMSProjectServer):
+    with pytest.raises(LoadingError):
+        with MSProject(tmp_path / "unknown.mpp", application=server.application):
+            pass
+
+
+def test_mocking_stubs_are_inert(monkeypatch, tmp_path: Path):
+    # The stubs in mocking/ only exist to build the docs without pywin32
+    stub = Path(__file__).parent.parent / "mocking/win32com/client/__init__.py"
+    spec = importlib.util.spec_from_file_location("stub_client", stub)
+    client = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(client)
+    monkeypatch.setattr(ms_project, "win32com", SimpleNamespace(client=client))
+    with pytest.raises(LoadingError):
+        with MSProject(tmp_path / "plan.mpp"):
+            pass
+
+
+def test_com_stats_match_calls(project_file: Path, server: FakeMSProjectServer):
+    com_stats = ComStats()
+    with MSProject(
+        project_file, application=server.application, com_stats=com_stats
+    ) as tasks:
+        server.reset()
+        for task in tasks:
+            if task is not None:
+                assert task.name
+        # Reading a field is a single call, resolving the COM task takes none
+        assert com_stats.calls("read") == 4
+        assert server.calls == com_stats.total_calls
+
+
+def test_outline_saves_calls(project_file: Path, server: FakeMSProjectServer):
+    with MSProject(project_file, application=server.application) as tasks:
+        tasks.build_outline()
+        planning = Task(tasks, 1)
+        server.reset()
+        assert planning.has_children
+        assert [child.unique_id for child in planning.children] == [2, 3]
+        assert server.calls == 0
+        # Only the ID of the last task in the subtree and the number of tasks
+        # are read to insert a child
+        assert tasks._get_insert_position(planning) == 4
+        assert server.calls == 3
+        tasks.outline = None
+        server.reset()
+        assert tasks._get_insert_position(planning) == 4
+        assert server.calls > 3
+
+
+def test_buffered_sync_saves_calls(
+    make_project_file, server: FakeMSProjectServer, make_issue
+):
+    issues = [make_issue(nr) for nr in range(1, 6)]
+    calls = {}
+    for buffered in (False, True):
+        project_file = make_project_file()
+        for _ in range(2):
+            server.reset()
+            with MSProject(
+                project_file, buffered=buffered, application=server.application
+            ) as tasks:
+                sync_gitlab_issues_to_ms_project(
+                    tasks, issues, WebURL("https://gitlab.com"), SetTaskTypeConservative
+                )
+        calls[buffered] = server.calls
+        with MSProject(project_file, application=server.application) as tasks:
+            assert len(tasks) == 9
+    # The second sync changes nothing, which the buffered mode doesn't write
+    assert calls[True] < calls[False]
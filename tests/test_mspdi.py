@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from syncgitlab2msproject.custom_types import WebURL
+from syncgitlab2msproject.exceptions import LoadingError, MSProjectValueSetError
+from syncgitlab2msproject.gitlab_issues import GroupBy, IssueGroups
+from syncgitlab2msproject.helper_classes import SetTaskTypeConservative
+from syncgitlab2msproject.ms_project import (
+    Backend,
+    MSProject,
+    PjTaskFixedType,
+    com_error,
+)
+from syncgitlab2msproject.mspdi import format_duration, parse_duration
+from syncgitlab2msproject.mspdi_stream import MSPDIStreamTasks
+from syncgitlab2msproject.sync import (
+    apply_plan,
+    get_fingerprint_from_text,
+    get_issue_ref_from_task,
+    plan_sync,
+    sync_gitlab_issues_to_ms_project,
+)
+
+GITLAB_URL = WebURL("https://gitlab.com")
+
+
+@pytest.fixture(params=[Backend.mspdi, Backend.mspdi_stream], ids=lambda b: b.value)
+def backend(request) -> Backend:
+    return request.param
+
+
+@pytest.mark.parametrize(
+    "duration, minutes",
+    [("PT8H0M0S", 480), ("PT0H30M0S", 30), ("PT1H0M30S", 60), ("P1DT2H", 1560)],
+)
+def test_parse_duration(duration: str, minutes: int):
+    assert parse_duration(duration) == minutes
+
+
+def test_format_duration():
+    assert format_duration(90) == "PT1H30M0S"
+    assert parse_duration(format_duration(12345)) == 12345
+
+
+def test_loading_wrong_file(tmp_path: Path):
+    with pytest.raises(LoadingError):
+        with MSProject(tmp_path / "not_existing.xml"):
+            pass
+
+
+def test_reading(project_file: Path, backend: Backend):
+    with MSProject(project_file, backend=backend) as tasks:
+        assert tasks.backend is backend
+        assert project_file.name in repr(tasks)
+        assert len(tasks) == 5
+        assert [task.name if task else None for task in tasks] == [
+            "Planning",
+            "Write Concept",
+            "Review Concept",
+            None,
+            "Release",
+        ]
+        assert tasks[3] is None
+        summary, concept = tasks[0], tasks[1]
+        assert summary.has_children
+        assert not concept.has_children
+        assert concept.unique_id == 2
+        assert concept.outline_level == 2
+        assert concept.work == 16 * 60
+        assert concept.percent_complete == 50
+        assert concept.type == PjTaskFixedType.pjFixedUnits
+        assert concept.effort_driven
+        assert concept.notes == "Some notes"
+        assert concept.deadline == datetime(2020, 3, 5, 17)
+        assert concept.actual_start is None
+        assert concept.text30 == ""
+        assert tasks[4].hyperlink_address.startswith(GITLAB_URL)
+
+
+def test_writing_and_adding(project_file: Path, backend: Backend):
+    with MSProject(project_file, backend=backend) as tasks:
+        task = tasks[1]
+        task.name = "Changed"
+        task.text30 = "Reference"
+        task.work = 90
+        task.deadline = None
+        new_task = tasks.add_tasks(["New"], parent=tasks[0])[0]
+        assert new_task.id == 4
+        assert new_task.outline_level == 2
+        assert tasks[4] is None
+
+    with MSProject(project_file, backend=backend) as tasks:
+        assert len(tasks) == 6
+        task = tasks[1]
+        assert task.name == "Changed"
+        assert task.text30 == "Reference"
+        assert task.work == 90
+        assert task.deadline is None
+        assert tasks[3].name == "New"
+        assert tasks[5].name == "Release"
+        assert len(tasks[0]._get_task().OutlineChildren) == 3
+
+
+def test_adding_blocks(project_file: Path, backend: Backend):
+    with MSProject(project_file, backend=backend) as tasks:
+        first = tasks.add_tasks([f"First {nr}" for nr in range(3)], parent=tasks[0])
+        second = tasks.add_tasks([f"Second {nr}" for nr in range(2)], parent=tasks[1])
+        assert [task.id for task in first] == [6, 7, 8]
+        assert [task.id for task in second] == [3, 4]
+        assert tasks[1].has_children
+
+    with MSProject(project_file, backend=backend) as tasks:
+        assert [task.name if task else None for task in tasks] == [
+            "Planning",
+            "Write Concept",
+            "Second 0",
+            "Second 1",
+            "Review Concept",
+            "First 0",
+            "First 1",
+            "First 2",
+            None,
+            "Release",
+        ]
+        assert [task.id for task in tasks if task] == [1, 2, 3, 4, 5, 6, 7, 8, 10]
+        assert [tasks[nr].outline_level for nr in (5, 6, 7)] == [2, 2, 2]
+        assert [tasks[nr].outline_level for nr in (2, 3)] == [3, 3]
+
+
+def test_outline(project_file: Path, backend: Backend):
+    with MSProject(project_file, backend=backend) as tasks:
+        planning, concept, review, release = tasks[0], tasks[1], tasks[2], tasks[4]
+        # Without an outline the structure is read from the tasks
+        assert concept.parent.unique_id == planning.unique_id
+        assert release.parent is None
+        assert [task.name for task in planning.iter_subtree()] == [
+            "Write Concept",
+            "Review Concept",
+        ]
+        outline = tasks.build_outline()
+        assert len(outline) == 4
+        assert outline.children(None) == [planning.unique_id, release.unique_id]
+        assert planning.has_children and not release.has_children
+        assert concept.parent.unique_id == planning.unique_id
+        assert release.parent is None
+        assert [task.unique_id for task in planning.children] == [2, 3]
+
+        child = tasks.add_tasks(["Child"], parent=review)[0]
+        assert child.unique_id in outline
+        assert review.has_children
+        assert child.parent.unique_id == review.unique_id
+        assert outline.last_descendant(planning.unique_id) == child.unique_id
+        assert [task.name for task in planning.iter_subtree()] == [
+            "Write Concept",
+            "Review Concept",
+            "Child",
+        ]
+        last = tasks.add_tasks(["Last"], outline_level=2)[0]
+        assert last.parent.unique_id == release.unique_id
+        # Same result when reading the structure from the tasks
+        tasks.outline = None
+        assert review.has_children
+        assert last.parent.unique_id == release.unique_id
+        assert [task.name for task in planning.iter_subtree()] == [
+            "Write Concept",
+            "Review Concept",
+            "Child",
+        ]
+
+
+def test_sync(project_file: Path, backend: Backend, make_issue):
+    issues = [make_issue(1, title="Linked by URL"), make_issue(2, labels=["a"])]
+    with MSProject(project_file, backend=backend) as tasks:
+        sync_gitlab_issues_to_ms_project(
+            tasks, issues, GITLAB_URL, SetTaskTypeConservative
+        )
+
+    with MSProject(project_file, backend=backend) as tasks:
+        assert len(tasks) == 6
+        release = tasks[4]
+        assert release.name == "Linked by URL"
+        assert get_issue_ref_from_task(release) == 1
+        added = tasks[5]
+        assert added.name == "Issue 2"
+        assert get_issue_ref_from_task(added) == 2
+        assert added.text28 == '"a"'
+        assert added.work == 60
+
+
+def test_plan_and_apply(project_file: Path, backend: Backend, make_issue):
+    issues = [make_issue(1, title="Linked by URL"), make_issue(2)]
+    original = project_file.read_bytes()
+    with MSProject(project_file, backend=backend, read_only=True) as tasks:
+        plan = plan_sync(tasks, issues, GITLAB_URL, SetTaskTypeConservative)
+        assert [update.task.unique_id for update in plan.updates] == [5]
+        changes = plan.updates[0].changes
+        assert changes["Name"] == ("Release", "Linked by URL")
+        # The task type is only changed during the sync
+        assert "Type" not in changes
+        assert plan.to_add == [issues[1]]
+        assert len(plan.unmatched) == 3
+        assert "Add task for issue 'Issue 2'" in plan.report()
+        with pytest.raises(MSProjectValueSetError):
+            tasks.save()
+    assert project_file.read_bytes() == original
+
+    with MSProject(project_file, backend=backend) as tasks:
+        plan = plan_sync(tasks, issues, GITLAB_URL, SetTaskTypeConservative)
+        apply_plan(plan, SetTaskTypeConservative)
+    with MSProject(project_file, backend=backend) as tasks:
+        assert tasks[4].name == "Linked by URL"
+        assert tasks[5].name == "Issue 2"
+        plan = plan_sync(tasks, issues, GITLAB_URL, SetTaskTypeConservative)
+        assert plan.is_empty
+        assert len(plan.unchanged) == 2
+
+
+def test_unchanged_issues_are_skipped(project_file: Path, backend: Backend, make_issue):
+    issues = [make_issue(1, title="Linked by URL"), make_issue(2)]
+    with MSProject(project_file, backend=backend) as tasks:
+        sync_gitlab_issues_to_ms_project(
+            tasks, issues, GITLAB_URL, SetTaskTypeConservative
+        )
+    with MSProject(project_file, backend=backend) as tasks:
+        assert get_fingerprint_from_text(tasks[5].text30) == issues[1].fingerprint
+        assert get_issue_ref_from_task(tasks[5]) == 2
+        tasks[4].name = "Changed in MS Project"
+        tasks[5].name = "Changed in MS Project"
+
+    issues[1] = make_issue(2, title="Changed in Gitlab")
+    with MSProject(project_file, backend=backend) as tasks:
+        plan = plan_sync(tasks, issues, GITLAB_URL, SetTaskTypeConservative)
+        assert [update.task.unique_id for update in plan.updates] == [6]
+        apply_plan(plan, SetTaskTypeConservative)
+    with MSProject(project_file, backend=backend) as tasks:
+        assert tasks[4].name == "Changed in MS Project"
+        assert tasks[5].name == "Changed in Gitlab"
+        plan = plan_sync(
+            tasks, issues, GITLAB_URL, SetTaskTypeConservative, skip_unchanged=False
+        )
+        assert [update.task.unique_id for update in plan.updates] == [5]
+
+
+@pytest.mark.parametrize("buffered", [False, True], ids=["direct", "buffered"])
+def test_failed_writes_are_synced_again(
+    project_file: Path, backend: Backend, make_issue, monkeypatch, buffered: bool
+):
+    write_field = MSProject.write_field
+
+    def failing_write_field(self, ms_task, field: str, value):
+        if field == "Notes" and value == "Fails":
+            raise com_error("The notes can't be written")
+        write_field(self, ms_task, field, value)
+
+    monkeypatch.setattr(MSProject, "write_field", failing_write_field)
+    issues = [make_issue(1), make_issue(2, description="Fails")]
+    with MSProject(project_file, backend=backend, buffered=buffered) as tasks:
+        sync_gitlab_issues_to_ms_project(
+            tasks, issues, GITLAB_URL, SetTaskTypeConservative
+        )
+        assert tasks.failed_writes == {6}
+    with MSProject(project_file, backend=backend) as tasks:
+        assert get_fingerprint_from_text(tasks[4].text30) == issues[0].fingerprint
+        # The reference is stored, but without fingerprint
+        assert get_issue_ref_from_task(tasks[5]) == 2
+        assert get_fingerprint_from_text(tasks[5].text30) is None
+
+    issues[0] = make_issue(1, description="Fails")
+    with MSProject(project_file, backend=backend, buffered=buffered) as tasks:
+        plan = plan_sync(tasks, issues, GITLAB_URL, SetTaskTypeConservative)
+        assert [update.task.unique_id for update in plan.updates] == [5, 6]
+        apply_plan(plan, SetTaskTypeConservative)
+        assert tasks.failed_writes == {5, 6}
+    with MSProject(project_file, backend=backend) as tasks:
+        assert get_issue_ref_from_task(tasks[4]) == 1
+        assert get_fingerprint_from_text(tasks[4].text30) is None
+        plan = plan_sync(tasks, issues, GITLAB_URL, SetTaskTypeConservative)
+        assert [update.task.unique_id for update in plan.updates] == [5, 6]
+
+
+def test_sync_grouped_by_milestone(project_file: Path, backend: Backend, make_issue):
+    first, second = {"id": 7, "title": "First"}, {"id": 8, "title": "Second"}
+    issues = [
+        make_issue(1, milestone=first),
+        make_issue(2, milestone=first),
+        make_issue(3, milestone=second),
+        make_issue(4, milestone=None),
+    ]
+    groups = IssueGroups(None, GroupBy.milestone)  # type: ignore
+    groups.assign(issues)
+    assert len(groups) == 2
+
+    def sync():
+        with MSProject(project_file, backend=backend) as tasks:
+            sync_gitlab_issues_to_ms_project(
+                tasks,
+                issues,
+                GITLAB_URL,
+                SetTaskTypeConservative,
+                group_by=GroupBy.milestone,
+            )
+        with MSProject(project_file, backend=backend) as tasks:
+            return [(task.name, task.outline_level) if task else None for task in tasks]
+
+    # The existing task of issue 1 is not moved
+    assert sync()[4:] == [
+        ("Issue 1", 1),
+        ("First", 1),
+        ("Issue 2", 2),
+        ("Second", 1),
+        ("Issue 3", 2),
+        ("Issue 4", 1),
+    ]
+    # New issues are added below the existing summary tasks, which are renamed
+    first["title"] = "First renamed"
+    issues.append(make_issue(5, milestone=first))
+    groups.clear()
+    groups.assign(issues)
+    assert sync()[5:] == [
+        ("First renamed", 1),
+        ("Issue 2", 2),
+        ("Issue 5", 2),
+        ("Second", 1),
+        ("Issue 3", 2),
+        ("Issue 4", 1),
+    ]
+
+
+def test_streaming_patches_only_changed_tasks(project_file: Path):
+    original = project_file.read_bytes()
+    with MSProject(project_file, backend=Backend.mspdi_stream) as tasks:
+        tasks[1].text30 = "Reference"
+        assert tasks[1].notes == "Some notes"
+    patched = project_file.read_bytes()
+    assert patched != original
+    # The tasks before and after the changed one are copied unchanged
+    end = original.index(b"<UID>3</UID>")
+    assert patched.startswith(original[: original.index(b"<Calendars>")])
+    assert patched.endswith(original[end:])
+    assert b"<FieldName>Text30</FieldName>" in patched
+
+    with MSProject(project_file, backend=Backend.mspdi) as tasks:
+        assert tasks[1].text30 == "Reference"
+        assert tasks[1].notes == "Some notes"
+
+
+def test_streaming_memory_is_bounded(tmp_path: Path, make_issue, monkeypatch):
+    notes = "x" * 20_000
+    task = (
+        "<Task><UID>{nr}</UID><ID>{nr}</ID><Name>Task {nr}</Name>"
+        "<OutlineLevel>1</OutlineLevel><Work>PT8H0M0S</Work>"
+        f"<Notes>{notes}</Notes></Task>"
+    )
+    project_file = tmp_path / "large.xml"
+    with open(project_file, "w", encoding="utf-8") as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        file.write('<Project xmlns="http://schemas.microsoft.com/project"><Tasks>')
+        for nr in range(500):
+            file.write(task.format(nr=nr))
+        file.write("</Tasks></Project>")
+
+    tracemalloc.start()
+    try:
+        with MSProject(project_file, backend=Backend.mspdi_stream) as tasks:
+            assert len(tasks) == 499
+            assert sum(task.work for task in tasks) == 499 * 8 * 60
+            tasks[10].name = "Changed"
+            # The plan works on the extracted values, the file is not read again
+            with monkeypatch.context() as patch:
+                patch.setattr(MSPDIStreamTasks, "read_element", None)
+                plan = plan_sync(
+                    tasks, [make_issue(1)], GITLAB_URL, SetTaskTypeConservative
+                )
+            assert len(plan.unmatched) == 499
+            assert len(plan.to_add) == 1
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < project_file.stat().st_size / 4
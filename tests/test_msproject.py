@@ -1,18 +1,33 @@
 # -*- coding: utf-8 -*-
 import pytest
 
-from datetime import datetime
+import shutil
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from dateutil.parser import parse
+from fake_ms_project import FakeMSProjectServer
 from functools import partial
 from inspect import getattr_static, signature
 from pathlib import Path
-from typing import Any, Callable, Generic, Type, Union
+from typing import Any, Callable, Generic, List, Type, Union
 
+from syncgitlab2msproject.com_stats import ComStats
 from syncgitlab2msproject.exceptions import (
     ClassNotInitiated,
+    InvalidFieldError,
     LoadingError,
     MSProjectSyncError,
 )
-from syncgitlab2msproject.ms_project import MSProject, PjTaskFixedType
+from syncgitlab2msproject.ms_project import (
+    MIN_UNDO_LEVELS,
+    Backend,
+    MSProject,
+    PjCalculation,
+    PjTaskFixedType,
+    TaskReferenceIndex,
+    UndoMode,
+    win2python_datetime,
+)
 
 __author__ = "Carli"
 __copyright__ = "Carli"
@@ -51,6 +66,25 @@ class DoNotSave(Exception):
     pass
 
 
+@pytest.fixture(params=["mpp", "fake", "mspdi"])
+def open_project(
+    request, project_file: Path, tmp_path: Path
+) -> Callable[..., MSProject]:
+    """
+    Open the test file with MS Project, the fake COM server or the MSPDI backend
+
+    MS Project works on a copy of the MS Project file, the others on a copy of the
+    MS Project XML file, so tests can save their changes.
+    """
+    if request.param == "mpp":
+        mpp_file = Path(shutil.copy(TEST_FILE, tmp_path / TEST_FILE_NAME))
+        return partial(MSProject, mpp_file)
+    if request.param == "fake":
+        application = FakeMSProjectServer().application
+        return partial(MSProject, project_file, application=application)
+    return partial(MSProject, project_file, backend=Backend.mspdi)
+
+
 # TODO Set up Pytest with copying the Test file
 # TODO Make sure that the copied file was not modified
 #           --> https://docs.pytest.org/en/stable/fixture.html
@@ -107,8 +141,10 @@ def test_printing_all():
         for i, task in enumerate(tasks):
             if task:
                 print(f"*{i:>4}: '{task.name}'")
+                assert task.id == tasks[i].id
             else:
                 print(f"#{i:>4}  >is empty<")
+                assert tasks[i] is None
 
         task = tasks[0]
 
@@ -192,3 +228,227 @@ def test_percentage():
             # Test setting attributes based on typed annotation
             task = tasks[0]
             task.percent_complete = 101
+
+
+def test_task_caches_com_object(open_project: Callable[..., MSProject]):
+    with pytest.raises(DoNotSave):
+        with open_project() as tasks:
+            task = tasks[0]
+            assert task._get_task() is task._get_task()
+            new_task = tasks.add_task("Restructure")
+            # Tasks are addressed by UniqueID so adding tasks does not invalidate
+            assert task._structure_version == tasks.structure_version
+            assert task.unique_id != new_task.unique_id
+            tasks.invalidate_tasks()
+            assert task._structure_version != tasks.structure_version
+            assert task.name == tasks[0].name
+            assert task._structure_version == tasks.structure_version
+            raise DoNotSave("We do not want the file to save!")
+
+
+def test_snapshot(open_project: Callable[..., MSProject]):
+    with pytest.raises(DoNotSave):
+        with open_project() as tasks:
+            snapshot = tasks.snapshot(["ID", "Name", "Text30"])
+            # Empty rows are not part of the snapshot
+            assert len(snapshot) == len([task for task in tasks if task is not None])
+            for index, (task, values) in enumerate(snapshot):
+                assert values["ID"] == task.id == snapshot.column("ID")[index]
+                assert values["Name"] == task.name
+                assert values["Text30"] == task.text30
+            raise DoNotSave("We do not want the file to save!")
+
+
+def test_buffered_writes(open_project: Callable[..., MSProject]):
+    with pytest.raises(DoNotSave):
+        with open_project(buffered=True) as tasks:
+            task = tasks[0]
+            name = task.name
+            task.name = name
+            # Setting the same value again is not a change
+            assert tasks.pending_writes == 0
+            task.name = "Buffered Name"
+            assert tasks.pending_writes == 1
+            assert task.name == "Buffered Name"
+            assert task._get_task().Name == name
+            tasks.flush()
+            assert tasks.pending_writes == 0
+            assert task._get_task().Name == "Buffered Name"
+            raise DoNotSave("We do not want the file to save!")
+
+
+def test_buffered_layout_after_insert(open_project: Callable[..., MSProject]):
+    with pytest.raises(DoNotSave):
+        with open_project(buffered=True) as tasks:
+            snapshot = tasks.snapshot()
+            ids = snapshot.column("ID")
+            with tasks.bulk_edit():
+                tasks.add_tasks(["Inserted"], parent=tasks[0])
+                # The known IDs of the following tasks are outdated by the insert
+                new_ids = [task.id for task, _ in snapshot]
+                read_ids = [task._read_task_val("ID") for task, _ in snapshot]
+                assert new_ids == read_ids != list(ids)
+            raise DoNotSave("We do not want the file to save!")
+
+
+def test_bulk_edit_restores_settings(open_project: Callable[..., MSProject]):
+    with pytest.raises(DoNotSave):
+        with open_project() as tasks:
+            calculation = tasks.mpp.Calculation
+            screen_updating = tasks.mpp.ScreenUpdating
+            with pytest.raises(DoNotSave):
+                with tasks.bulk_edit():
+                    assert tasks.mpp.Calculation == PjCalculation.pjManual
+                    assert not tasks.mpp.ScreenUpdating
+                    raise DoNotSave("Settings have to be restored also on errors")
+            assert tasks.mpp.Calculation == calculation
+            assert tasks.mpp.ScreenUpdating == screen_updating
+            raise DoNotSave("We do not want the file to save!")
+
+
+@pytest.fixture(params=["fake", "mspdi"])
+def open_undo_project(request, project_file: Path) -> Callable[..., MSProject]:
+    """Open the test file with an application whose undo methods can be replaced"""
+    if request.param == "fake":
+        application = FakeMSProjectServer().application
+        return partial(MSProject, project_file, application=application)
+    return partial(MSProject, project_file, backend=Backend.mspdi)
+
+
+def record_undo_calls(tasks: MSProject) -> List[str]:
+    """Replace the undo methods of the application with ones that record calls"""
+    calls: List[str] = []
+    tasks.mpp.OpenUndoTransaction = lambda Label: calls.append(f"open {Label}")
+    tasks.mpp.CloseUndoTransaction = lambda: calls.append("close")
+    tasks.mpp.UndoClear = lambda: calls.append("clear")
+    return calls
+
+
+@pytest.mark.parametrize("fail", [False, True])
+def test_undo_transaction(open_undo_project: Callable[..., MSProject], fail: bool):
+    with pytest.raises(DoNotSave):
+        with open_undo_project() as tasks:
+            calls = record_undo_calls(tasks)
+            with pytest.raises(DoNotSave) if fail else nullcontext():
+                with tasks.undo_mode(UndoMode.transaction):
+                    assert calls == ["open Sync Gitlab Issues"]
+                    tasks[0].name = "Undo"
+                    if fail:
+                        raise DoNotSave("The transaction has to be closed on errors")
+            assert calls == ["open Sync Gitlab Issues", "close"]
+            raise DoNotSave("We do not want the file to save!")
+
+
+@pytest.mark.parametrize("fail", [False, True])
+def test_undo_disabled(open_undo_project: Callable[..., MSProject], fail: bool):
+    with pytest.raises(DoNotSave):
+        with open_undo_project() as tasks:
+            calls = record_undo_calls(tasks)
+            undo_levels = tasks.mpp.UndoLevels = 42
+            with pytest.raises(DoNotSave) if fail else nullcontext():
+                with tasks.undo_mode(UndoMode.off):
+                    assert tasks.mpp.UndoLevels == MIN_UNDO_LEVELS
+                    tasks[0].name = "Undo"
+                    if fail:
+                        raise DoNotSave("The undo levels have to be restored")
+            assert tasks.mpp.UndoLevels == undo_levels
+            assert calls == ["clear", "clear"]
+            raise DoNotSave("We do not want the file to save!")
+
+
+def test_undo_recorded(open_undo_project: Callable[..., MSProject]):
+    with pytest.raises(DoNotSave):
+        with open_undo_project() as tasks:
+            calls = record_undo_calls(tasks)
+            undo_levels = tasks.mpp.UndoLevels
+            with tasks.undo_mode(UndoMode.record):
+                tasks[0].name = "Undo"
+            assert calls == []
+            assert tasks.mpp.UndoLevels == undo_levels
+            raise DoNotSave("We do not want the file to save!")
+
+
+def test_get_and_set_fields(open_project: Callable[..., MSProject]):
+    with pytest.raises(DoNotSave):
+        with open_project() as tasks:
+            task = tasks[0]
+            task.set_fields({"text1": "by name", "Text2": "by COM", 188743737: "by ID"})
+            assert task.get_fields(["Text1", "text2", "TEXT3"]) == {
+                "Text1": "by name",
+                "text2": "by COM",
+                "TEXT3": "by ID",
+            }
+            with pytest.raises(InvalidFieldError):
+                task.get_fields(["not_existing"])
+            raise DoNotSave("We do not want the file to save!")
+
+
+def test_reference_index():
+    index: TaskReferenceIndex[int, str] = TaskReferenceIndex()
+    index.add(1, 10, "https://gitlab.com/issue/10")
+    index.add(2)
+    index.add(3, 10, None)
+    assert len(index) == 3
+    assert 10 in index
+    assert index.by_ref_id(10) == 1
+    assert index.by_web_url("https://gitlab.com/issue/10") == 1
+    assert index.references(2) == (None, None)
+    assert index.duplicates == {10: [1, 3]}
+
+
+def test_add_tasks(open_project: Callable[..., MSProject]):
+    with pytest.raises(DoNotSave):
+        com_stats = ComStats()
+        with open_project(com_stats=com_stats) as tasks:
+            parent = tasks[0]
+            count = len(tasks)
+            calculation = tasks.mpp.Calculation
+            added = tasks.add_tasks(
+                ["First", "Second", "Third"],
+                parent=parent,
+                fields=[{"text1": "first"}, {"text1": "second"}, {"text1": "third"}],
+            )
+            assert len(tasks) == count + 3
+            assert [task.name for task in added] == ["First", "Second", "Third"]
+            assert [task.text1 for task in added] == ["first", "second", "third"]
+            first_id = added[0].id
+            assert [task.id for task in added] == [first_id, first_id + 1, first_id + 2]
+            for task in added:
+                assert task.outline_level == parent.outline_level + 1
+            assert parent.has_children
+            # Only the level of the first task might differ from the inherited one
+            assert com_stats.calls_by_field("write").get("OutlineLevel", 0) <= 1
+            # The caller decides about the bulk mode
+            assert tasks.mpp.Calculation == calculation
+            raise DoNotSave("We do not want the file to save!")
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        datetime(2020, 3, 4, 20, 15, 30),
+        datetime(2020, 3, 4, 20, 15, 30, 123, tzinfo=timezone.utc),
+        datetime(2020, 3, 4, 8, tzinfo=timezone(timedelta(hours=2))),
+    ],
+)
+def test_win2python_datetime_like_parsing(value: datetime):
+    converted = win2python_datetime(value)
+    assert converted == parse(str(value))
+    assert str(converted) == str(parse(str(value)))
+    # Fallback for values that are not a datetime
+    assert win2python_datetime(str(value)) == converted
+
+
+def test_com_stats(open_project: Callable[..., MSProject]):
+    com_stats = ComStats()
+    with open_project(com_stats=com_stats) as tasks:
+        task = tasks[0]
+        task.name
+        task.name
+    assert com_stats.calls("FileOpen") == 1
+    assert com_stats.calls("FileSave") == 1
+    assert com_stats.calls_by_field("read")["Name"] == 2
+    # The task is only resolved once
+    assert com_stats.calls("get_task") == 1
+    assert sum(com_stats.histogram("read").values()) == com_stats.calls("read")
+    assert "FileOpen" in com_stats.report()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import os
+from fake_ms_project import create_fake_application
+from functools import partial
+from pathlib import Path
+
+from syncgitlab2msproject.cli import parse_args, sync_project_file
+from syncgitlab2msproject.gitlab_issues import GitlabResource
+from syncgitlab2msproject.helper_classes import SetTaskTypeConservative
+from syncgitlab2msproject.ms_project import Backend, MSProject
+from syncgitlab2msproject.parallel import ParallelSync, SyncJob, can_sync_in_parallel
+from syncgitlab2msproject.targets import SyncTarget
+
+
+def test_parallel_sync(make_project_file, make_issue):
+    files = [make_project_file(f"{nr}.xml") for nr in range(4)]
+    files[3].write_text("Not a project file")
+    resource = GitlabResource("group", 1)
+    jobs = [
+        SyncJob(SyncTarget(resource, project_file), [make_issue(nr + 2)])
+        for nr, project_file in enumerate(files)
+    ]
+    args = parse_args(["group", "1", str(files[0])])
+    sync = partial(sync_project_file, args, sync_task_helper=SetTaskTypeConservative)
+    with ParallelSync(2, factory=partial(create_fake_application, 0.001)) as workers:
+        results = workers.run(sync, jobs)
+
+    assert [result.target for result in results] == [job.target for job in jobs]
+    assert [result.ok for result in results] == [True, True, True, False]
+    assert "LoadingError" in results[3].error
+    assert all(result.pid != os.getpid() for result in results)
+    for nr, project_file in enumerate(files[:3]):
+        with MSProject(project_file) as tasks:
+            assert tasks[5].name == f"Issue {nr + 2}"
+
+
+def test_parallel_sync_needs_different_files(tmp_path: Path):
+    target = SyncTarget(GitlabResource("group", 1), tmp_path / "plan.xml")
+    with ParallelSync(1) as workers:
+        with pytest.raises(ValueError):
+            workers.run(print, [SyncJob(target, []), SyncJob(target, [])])
+    with pytest.raises(ValueError):
+        ParallelSync(0)
+
+
+def test_parallel_sync_only_file_backends(tmp_path: Path):
+    resource = GitlabResource("group", 1)
+    xml = SyncTarget(resource, tmp_path / "plan.xml")
+    mpp = SyncTarget(resource, tmp_path / "plan.mpp")
+    assert can_sync_in_parallel(xml.project_file)
+    assert can_sync_in_parallel(mpp.project_file, Backend.mspdi_stream)
+    assert not can_sync_in_parallel(mpp.project_file)
+    assert not can_sync_in_parallel(xml.project_file, Backend.com)
+    # All workers would share one MS Project
+    with ParallelSync(1) as workers:
+        with pytest.raises(ValueError):
+            workers.run(print, [SyncJob(xml, []), SyncJob(mpp, [])])
+        with pytest.raises(ValueError):
+            workers.run(print, [SyncJob(xml, [])], Backend.com)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from pathlib import Path
+
+from syncgitlab2msproject.custom_types import WebURL
+from syncgitlab2msproject.helper_classes import SetTaskTypeConservative
+from syncgitlab2msproject.ms_project import Backend, MSProject
+from syncgitlab2msproject.sync import (
+    IssueFinder,
+    get_issue_ref_from_task,
+    plan_sync,
+    set_issue_ref_to_task,
+    sync_gitlab_issues_to_ms_project,
+)
+
+GITLAB_URL = WebURL("https://gitlab.com")
+
+
+def test_moved_issues_are_resolved(make_issue):
+    # A chain longer than the recursion limit
+    chain = [make_issue(nr, moved_to_id=nr + 1) for nr in range(1, 5001)]
+    chain.append(make_issue(5001))
+    cycle = [
+        make_issue(10_001, moved_to_id=10_002),
+        make_issue(10_002, moved_to_id=10_001),
+    ]
+    outside = make_issue(20_001, moved_to_id=99_999)
+    finder = IssueFinder([*chain, *cycle, outside])
+
+    assert all(finder.moved_target(issue) is chain[-1] for issue in chain)
+    assert chain[0].moved_reference is chain[-1]
+    assert finder.moved_target(cycle[0]) is None
+    assert finder.moved_target(cycle[1]) is None
+    assert finder.moved_target(outside) is None
+
+
+def test_sync_moved_issues(project_file: Path, make_issue):
+    # The task "Release" refers to the first issue by its web url
+    issues = [
+        make_issue(1, moved_to_id=2, state="closed"),
+        make_issue(2, moved_to_id=3, state="closed"),
+        make_issue(3, title="Moved twice"),
+        make_issue(4, moved_to_id=99),
+    ]
+    with MSProject(project_file, backend=Backend.mspdi) as tasks:
+        plan = sync_gitlab_issues_to_ms_project(
+            tasks, issues, GITLAB_URL, SetTaskTypeConservative
+        )
+        assert plan.to_add == []
+    with MSProject(project_file, backend=Backend.mspdi) as tasks:
+        assert len(tasks) == 5
+        assert tasks[4].name == "Moved twice"
+        assert get_issue_ref_from_task(tasks[4]) == 3
+
+
+def test_only_first_duplicate_is_synced(project_file: Path, make_issue):
+    issue = make_issue(100, title="Synced")
+    with MSProject(project_file, backend=Backend.mspdi) as tasks:
+        first = tasks.add_task("First")
+        second = tasks.add_task("Second")
+        set_issue_ref_to_task(first, issue, with_fingerprint=False)
+        set_issue_ref_to_task(second, issue, with_fingerprint=False)
+    with MSProject(project_file, backend=Backend.mspdi) as tasks:
+        plan = plan_sync(tasks, [issue], GITLAB_URL, SetTaskTypeConservative)
+        assert [update.task.name for update in plan.updates] == ["First"]
+        assert [task.name for task in plan.duplicates] == ["Second"]
+        assert "1 duplicates" in plan.report()
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from fake_ms_project import create_fake_application
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from syncgitlab2msproject.application import ApplicationPool
+from syncgitlab2msproject.cli import parse_args, sync_targets, sync_targets_parallel
+from syncgitlab2msproject.gitlab_issues import GitlabResource, IssueCache
+from syncgitlab2msproject.helper_classes import SetTaskTypeConservative
+from syncgitlab2msproject.ms_project import MSProject, com_error
+from syncgitlab2msproject.parallel import ParallelSync
+from syncgitlab2msproject.sync_state import SyncState, get_state_path, now
+from syncgitlab2msproject.targets import SyncTarget
+
+
+class FakeGitlab:
+    """Gives the issues of a group, remembering the filters used"""
+
+    def __init__(self, issues: List[Any]):
+        self.issues = issues
+        self.filters: List[Dict[str, Any]] = []
+        self.groups = self
+
+    def get(self, group_id: int, lazy: bool = False):
+        def list_issues(all: bool = False, **filters: Any):
+            self.filters.append(filters)
+            return [issue.obj for issue in self.issues]
+
+        return SimpleNamespace(issues=SimpleNamespace(list=list_issues))
+
+
+def test_state_is_saved_and_loaded(tmp_path: Path, make_issue):
+    target = SyncTarget(GitlabResource("group", 1), tmp_path / "plan.xml")
+    path = get_state_path(target)
+    assert path.parent == tmp_path
+    state = SyncState.load(path)
+    assert state.synced_at is None and state.updated_after is None
+    issues = [make_issue(1), make_issue(2)]
+    assert state.changed(issues) == issues
+    with pytest.raises(ValueError):
+        state.save()
+
+    # Not saved as a sync with failed issues
+    state.update(issues, now(), failed=[issues[1]])
+    assert state.synced_at is None and list(state.fingerprints) == [1]
+
+    started = now()
+    state.update(issues, started)
+    state.save()
+    loaded = SyncState.load(path)
+    assert loaded.synced_at == started
+    assert loaded.updated_after is not None and loaded.updated_after < started
+    changed, new = make_issue(2, title="Changed"), make_issue(3)
+    assert loaded.changed([make_issue(1), changed, new]) == [changed, new]
+
+    path.write_text("{invalid")
+    assert SyncState.load(path).synced_at is None
+
+
+def test_incremental_sync(project_file: Path, make_issue):
+    target = SyncTarget(GitlabResource("group", 1), project_file)
+    gitlab = FakeGitlab([make_issue(1), make_issue(2)])
+
+    def sync(*options: str) -> None:
+        args = parse_args(["--incremental", *options, "group", "1", str(project_file)])
+        with ApplicationPool() as applications:
+            assert not sync_targets(
+                args,
+                [target],
+                IssueCache(gitlab),  # type: ignore
+                SetTaskTypeConservative,
+                applications,
+            )
+
+    sync()
+    assert gitlab.filters[-1] == {}
+    assert get_state_path(target).is_file()
+    synced = project_file.read_bytes()
+
+    # Nothing changed, so the project is not even opened
+    sync()
+    assert "updated_after" in gitlab.filters[-1]
+    assert project_file.read_bytes() == synced
+
+    gitlab.issues[1] = make_issue(2, title="Changed")
+    sync()
+    with MSProject(project_file) as tasks:
+        assert [task.name for task in tasks if task][-2:] == ["Issue 1", "Changed"]
+
+    sync("--full-resync")
+    assert gitlab.filters[-1] == {}
+
+
+def test_failed_issues_are_synced_again(project_file: Path, make_issue, monkeypatch):
+    target = SyncTarget(GitlabResource("group", 1), project_file)
+    gitlab = FakeGitlab([make_issue(1), make_issue(2)])
+    write_field = MSProject.write_field
+
+    def failing_write_field(self, ms_task, field: str, value):
+        if field == "Notes" and value == "Fails":
+            raise com_error("The notes can't be written")
+        write_field(self, ms_task, field, value)
+
+    def sync() -> None:
+        args = parse_args(["--incremental", "group", "1", str(project_file)])
+        with ApplicationPool() as applications:
+            assert not sync_targets(
+                args,
+                [target],
+                IssueCache(gitlab),  # type: ignore
+                SetTaskTypeConservative,
+                applications,
+            )
+
+    sync()
+    synced_at = SyncState.load(get_state_path(target)).synced_at
+    gitlab.issues[1] = make_issue(2, title="Changed", description="Fails")
+    with monkeypatch.context() as patch:
+        patch.setattr(MSProject, "write_field", failing_write_field)
+        sync()
+    # The issue is not remembered as synced, the next sync fetches it again
+    state = SyncState.load(get_state_path(target))
+    assert list(state.fingerprints) == [1]
+    assert state.synced_at == synced_at
+    with MSProject(project_file) as tasks:
+        assert tasks[5].name == "Changed"
+        assert tasks[5].notes == "Description of issue 2"
+
+    sync()
+    state = SyncState.load(get_state_path(target))
+    assert list(state.fingerprints) == [1, 2]
+    assert state.synced_at > synced_at
+    with MSProject(project_file) as tasks:
+        assert tasks[5].notes == "Fails"
+
+
+def test_incremental_parallel_sync(make_project_file, make_issue):
+    resource = GitlabResource("group", 1)
+    targets = [SyncTarget(resource, make_project_file(f"{nr}.xml")) for nr in range(2)]
+    gitlab = FakeGitlab([make_issue(1), make_issue(2)])
+    synced: List[List[Path]] = []
+
+    def sync() -> None:
+        args = parse_args(["--incremental", "--targets", "targets.txt"])
+        with ParallelSync(2, factory=create_fake_application) as workers:
+            run = workers.run
+
+            def record_run(sync, jobs, backend=None):
+                synced.append([job.target.project_file for job in jobs])
+                return run(sync, jobs, backend)
+
+            workers.run = record_run  # type: ignore
+            assert not sync_targets_parallel(
+                args,
+                targets,
+                IssueCache(gitlab),  # type: ignore
+                SetTaskTypeConservative,
+                workers,
+            )
+
+    sync()
+    assert synced[-1] == [target.project_file for target in targets]
+    synced_at = SyncState.load(get_state_path(targets[0])).synced_at
+
+    # Nothing changed, so like with the sequential sync no file is opened
+    sync()
+    assert synced[-1] == []
+    assert SyncState.load(get_state_path(targets[0])).synced_at > synced_at
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from fake_ms_project import FakeMSProjectServer
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict
+
+from syncgitlab2msproject.application import ApplicationPool
+from syncgitlab2msproject.cli import parse_args, sync_targets
+from syncgitlab2msproject.gitlab_issues import (
+    GitlabResource,
+    GroupBy,
+    Issue,
+    IssueCache,
+    IssueGroup,
+    IssueGroups,
+)
+from syncgitlab2msproject.helper_classes import SetTaskTypeConservative
+from syncgitlab2msproject.ms_project import MSProject
+from syncgitlab2msproject.sync import get_issue_ref_from_task
+from syncgitlab2msproject.targets import SyncTarget, parse_target, read_targets
+
+
+class FakeGitlab:
+    """Gives the issues of groups, counting how often they are loaded"""
+
+    def __init__(self, make_issue: Callable[..., Issue]):
+        self.loaded: Dict[int, int] = {}
+        self.groups = self
+        self._make_issue = make_issue
+
+    def get(self, group_id: int, lazy: bool = False):
+        def list_issues(all: bool = False):
+            self.loaded[group_id] = self.loaded.get(group_id, 0) + 1
+            return [self._make_issue(group_id * 10 + nr).obj for nr in range(2)]
+
+        return SimpleNamespace(issues=SimpleNamespace(list=list_issues))
+
+
+def test_parse_target(tmp_path: Path):
+    assert parse_target("group 42 plans/Project A.mpp", tmp_path) == SyncTarget(
+        GitlabResource("group", 42), tmp_path / "plans" / "Project A.mpp"
+    )
+    for line in ("group 42", "user 42 a.mpp", "group x a.mpp"):
+        with pytest.raises(ValueError):
+            parse_target(line)
+
+
+def test_read_targets(tmp_path: Path):
+    targets_file = tmp_path / "targets.txt"
+    targets_file.write_text("# Comment\n\nproject 1 a.mpp\n  group 2 b.xml\n")
+    assert read_targets(targets_file) == [
+        SyncTarget(GitlabResource("project", 1), tmp_path / "a.mpp"),
+        SyncTarget(GitlabResource("group", 2), tmp_path / "b.xml"),
+    ]
+    targets_file.write_text("project 1 a.mpp\ngroup b.xml\n")
+    with pytest.raises(ValueError, match="targets.txt:2"):
+        read_targets(targets_file)
+
+
+def test_parse_args_requires_targets():
+    with pytest.raises(SystemExit):
+        parse_args(["group", "1"])
+    with pytest.raises(SystemExit):
+        parse_args([])
+    assert parse_args(["--targets", "targets.txt"]).project_file is None
+    assert parse_args(["group", "1", "a.mpp"]).project_file == "a.mpp"
+
+
+def test_sync_targets(tmp_path: Path, make_project_file, make_issue):
+    files = [make_project_file(f"{name}.xml") for name in ("a", "b", "c")]
+    files[2].write_text("Not a project file")
+    targets_file = tmp_path / "targets.txt"
+    targets_file.write_text("group 1 a.xml\ngroup 1 b.xml\ngroup 2 c.xml\n")
+    args = parse_args(["--targets", str(targets_file)])
+    servers = []
+
+    def start():
+        servers.append(FakeMSProjectServer())
+        return servers[-1].application
+
+    gitlab = FakeGitlab(make_issue)
+    with ApplicationPool(factory=start) as applications:
+        failed = sync_targets(
+            args,
+            read_targets(targets_file),
+            IssueCache(gitlab),  # type: ignore
+            SetTaskTypeConservative,
+            applications,
+        )
+    assert failed == 1
+    assert gitlab.loaded == {1: 1, 2: 1}
+    assert len(servers) == 1
+    for project_file in files[:2]:
+        with MSProject(project_file) as tasks:
+            refs = [get_issue_ref_from_task(task) for task in tasks if task]
+            assert refs[-2:] == [10, 11]
+
+
+def test_epics_are_fetched_once(make_issue):
+    fetched = []
+
+    def get_epic(iid: int):
+        fetched.append(iid)
+        return SimpleNamespace(id=100 + iid, title=f"Epic {iid}")
+
+    epics = SimpleNamespace(epics=SimpleNamespace(get=get_epic))
+    gitlab = SimpleNamespace(groups=SimpleNamespace(get=lambda *_, **__: epics))
+    issues = [
+        make_issue(1, epic_iid=1),
+        make_issue(2, epic_iid=1),
+        make_issue(3, epic_iid=None),
+        make_issue(4, epic={"id": 200, "iid": 2, "title": "Epic 2"}),
+    ]
+    groups = IssueGroups(gitlab, GroupBy.epic)  # type: ignore
+    groups.assign(issues)
+    assert fetched == [1]
+    epic = IssueGroup(GroupBy.epic, 101, "Epic 1")
+    assert [issue.group for issue in issues] == [
+        epic,
+        epic,
+        None,
+        IssueGroup(GroupBy.epic, 200, "Epic 2"),
+    ]
+    assert IssueGroups(gitlab, GroupBy.none).get(issues[0]) is None  # type: ignore
+
+
+def test_dry_run_does_not_change_files(project_file: Path, make_issue, capsys):
+    original = project_file.read_bytes()
+    args = parse_args(["--dry-run", "group", "1", str(project_file)])
+    with ApplicationPool() as applications:
+        failed = sync_targets(
+            args,
+            [SyncTarget(GitlabResource("group", 1), project_file)],
+            IssueCache(FakeGitlab(make_issue)),  # type: ignore
+            SetTaskTypeConservative,
+            applications,
+        )
+    assert failed == 0
+    assert project_file.read_bytes() == original
+    assert "2 to add" in capsys.readouterr().out